@@ -0,0 +1,10 @@
+import pytest
+
+
+@pytest.fixture(autouse=True, scope='session')
+def project_test_settings():
+    """Значения настроек для тестов, как у manage.py test
+    (core.runner)."""
+    from core.runner import test_settings
+    with test_settings():
+        yield
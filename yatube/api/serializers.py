@@ -0,0 +1,54 @@
+from django.urls import reverse
+
+from posts import thumbnails
+
+
+class FieldsError(ValueError):
+    pass
+
+
+def image(post):
+    """Оригинал и готовые производные из posts.thumbnails.
+
+    Пока производные не построены, thumbnails равен None — как и
+    заглушка в шаблоне, клиент показывает оригинал или ничего.
+    """
+    if not post.image:
+        return None
+    return {
+        'url': post.image.url,
+        'thumbnails': thumbnails.post_picture(post),
+    }
+
+
+POST_FIELDS = {
+    'id': lambda post: post.pk,
+    'text': lambda post: post.text,
+    'pub_date': lambda post: post.pub_date.isoformat(),
+    'author': lambda post: post.author.username,
+    'group': lambda post: post.group.slug if post.group_id else None,
+    'image': image,
+    'url': lambda post: reverse('posts:post_detail', args=[post.pk]),
+}
+COMMENT_FIELDS = {
+    'id': lambda comment: comment.pk,
+    'text': lambda comment: comment.text,
+    'created': lambda comment: comment.created.isoformat(),
+    'author': lambda comment: comment.author.username,
+}
+
+
+def parse_fields(value, available):
+    """Имена полей из ?fields=a,b; пустое значение — все поля."""
+    if not value:
+        return tuple(available)
+    fields = tuple(dict.fromkeys(
+        name.strip() for name in value.split(',') if name.strip()))
+    unknown = [name for name in fields if name not in available]
+    if unknown:
+        raise FieldsError(f'Неизвестные поля: {", ".join(unknown)}')
+    return fields
+
+
+def serialize(obj, fields, serializers):
+    return {name: serializers[name](obj) for name in fields}
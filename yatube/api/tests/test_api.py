@@ -0,0 +1,126 @@
+import json
+
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts.models import Comment, Follow, Group, Post, User
+
+POSTS = 5
+
+
+class ApiTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(
+            username='author', first_name='Лев', last_name='Толстой')
+        cls.reader = User.objects.create_user(username='reader')
+        Follow.objects.create(user=cls.reader, author=cls.author)
+        cls.group = Group.objects.create(
+            title='Группа', slug='api-group', description='Описание')
+        for i in range(POSTS):
+            Post.objects.create(
+                author=cls.author, text=f'Пост {i}', group=cls.group)
+        cls.other_post = Post.objects.create(
+            author=cls.reader, text='Пост читателя')
+        cls.post = Post.objects.filter(author=cls.author).latest('pub_date')
+        for i in range(3):
+            Comment.objects.create(
+                post=cls.post, author=cls.reader, text=f'Комментарий {i}')
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.reader)
+
+    def get_json(self, url, client=None, **params):
+        response = (client or self.guest_client).get(url, params)
+        self.assertEqual(response['Content-Type'],
+                         'application/json; charset=utf-8')
+        return response, json.loads(response.content)
+
+    def walk(self, url, **params):
+        """Все записи ленты, пролистанные по ссылкам next."""
+        results = []
+        response, data = self.get_json(url, **params)
+        results.extend(data['results'])
+        while data['next']:
+            response, data = self.get_json(data['next'])
+            results.extend(data['results'])
+        return results
+
+    def test_cursor_pagination(self):
+        """Лента листается курсором и сохраняет параметры запроса."""
+        results = self.walk(reverse('api:posts'), limit=2, fields='id')
+        self.assertEqual(
+            [row['id'] for row in results],
+            list(Post.objects.order_by('-pub_date', '-pk')
+                 .values_list('pk', flat=True)))
+        self.assertEqual(results[0], {'id': results[0]['id']})
+
+    def test_sparse_fields(self):
+        """fields оставляет в ответе только перечисленные поля."""
+        _, data = self.get_json(
+            reverse('api:posts'), fields='id,text,author')
+        self.assertEqual(set(data['results'][0]), {'id', 'text', 'author'})
+        response, data = self.get_json(reverse('api:posts'), fields='nope')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('nope', data['detail'])
+
+    def test_scoped_lists(self):
+        """Группа, профиль и лента подписок отдают свои посты."""
+        cases = (
+            (reverse('api:group_posts', args=[self.group.slug]), None,
+             POSTS),
+            (reverse('api:profile_posts', args=[self.reader.username]),
+             None, 1),
+            (reverse('api:follow'), self.authorized_client, POSTS),
+        )
+        for url, client, count in cases:
+            with self.subTest(url=url):
+                _, data = self.get_json(url, client)
+                self.assertEqual(len(data['results']), count)
+
+    def test_follow_requires_login(self):
+        """Лента подписок без входа отвечает 401."""
+        response, _ = self.get_json(reverse('api:follow'))
+        self.assertEqual(response.status_code, 401)
+
+    def test_objects(self):
+        """Группа, профиль и пост отдаются вместе со счётчиками."""
+        _, group = self.get_json(reverse('api:group', args=[self.group.slug]))
+        self.assertEqual(group['posts_count'], POSTS)
+        _, profile = self.get_json(
+            reverse('api:profile', args=[self.author.username]),
+            self.authorized_client)
+        self.assertEqual(profile['full_name'], 'Лев Толстой')
+        self.assertIs(profile['following'], True)
+        _, post = self.get_json(
+            reverse('api:post_detail', args=[self.post.pk]), limit=2)
+        self.assertEqual(post['image'], None)
+        self.assertEqual(len(post['comments']['results']), 2)
+        self.assertEqual(
+            post['comments']['next'].split('?')[0],
+            reverse('api:post_comments', args=[self.post.pk]))
+        response, _ = self.get_json(
+            reverse('api:post_detail', args=[0]))
+        self.assertEqual(response.status_code, 404)
+
+    def test_etag(self):
+        """Совпадающий If-None-Match получает 304 и гостем, и после входа."""
+        url = reverse('api:posts')
+        for client in (self.guest_client, self.authorized_client):
+            with self.subTest(client=client):
+                etag = client.get(url)['ETag']
+                response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(response.status_code, 304)
+        Post.objects.create(author=self.author, text='Новый пост')
+        response = self.guest_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_read_only(self):
+        """Изменять данные через API нельзя."""
+        response = self.authorized_client.post(reverse('api:posts'))
+        self.assertEqual(response.status_code, 405)
@@ -0,0 +1,95 @@
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts import archive, counters
+from posts.models import Comment, Follow, Group, Post, User
+
+POSTS = 10
+
+# Запросы на ответ API гостю и пользователю при прогретых счётчиках и
+# горизонте архива; гостю добавляется поиск областей кэша, пользователю —
+# сессия, сам пользователь и проверки подписки.
+BUDGETS = {
+    'api:posts': (1, 3),
+    'api:group_posts': (3, 4),
+    'api:profile': (3, 5),
+    'api:profile_posts': (3, 4),
+    'api:post_detail': (3, 4),
+    'api:follow': (None, 4),
+}
+
+
+class ApiQueryBudgetTests(TestCase):
+    """Число запросов API не зависит от числа записей в ответе."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='budget')
+        cls.reader = User.objects.create_user(username='budget_reader')
+        Follow.objects.create(user=cls.reader, author=cls.user)
+        cls.group = Group.objects.create(
+            title='Группа', slug='budget-slug', description='Описание')
+        for i in range(POSTS):
+            Post.objects.create(
+                text=f'Пост {i}', author=cls.user, group=cls.group)
+        cls.post = Post.objects.latest('pub_date')
+        for i in range(POSTS):
+            commenter = User.objects.create_user(username=f'commenter{i}')
+            Comment.objects.create(
+                post=cls.post, author=commenter, text=f'Комментарий {i}')
+        counters.get_count(counters.AUTHOR, cls.user.pk)
+        counters.get_count(counters.GROUP, cls.group.pk)
+        counters.get_count(counters.FOLLOWERS, cls.user.pk)
+
+    def setUp(self):
+        cache.clear()
+        archive.horizon()
+        self.guest_client = Client()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.reader)
+        self.urls = {
+            'api:posts': reverse('api:posts'),
+            'api:group_posts':
+                reverse('api:group_posts', args=[self.group.slug]),
+            'api:profile': reverse('api:profile', args=[self.user.username]),
+            'api:profile_posts':
+                reverse('api:profile_posts', args=[self.user.username]),
+            'api:post_detail':
+                reverse('api:post_detail', args=[self.post.pk]),
+            'api:follow': reverse('api:follow'),
+        }
+
+    def assertBudget(self, client, url, budget):
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertLessEqual(
+            len(queries), budget,
+            '\n'.join(query['sql'] for query in queries.captured_queries)
+        )
+
+    def test_guest_budgets(self):
+        """Ответы гостю укладываются в бюджет запросов."""
+        for name, (budget, _) in BUDGETS.items():
+            if budget is None:
+                continue
+            with self.subTest(name=name):
+                self.assertBudget(self.guest_client, self.urls[name], budget)
+
+    def test_authorized_budgets(self):
+        """Ответы пользователю укладываются в бюджет запросов."""
+        for name, (_, budget) in BUDGETS.items():
+            with self.subTest(name=name):
+                self.assertBudget(
+                    self.authorized_client, self.urls[name], budget)
+
+    def test_cached_guest_response(self):
+        """Повторный ответ гостю не обращается к постам."""
+        url = self.urls['api:posts']
+        self.guest_client.get(url)
+        with self.assertNumQueries(0):
+            self.guest_client.get(url)
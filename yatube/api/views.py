@@ -0,0 +1,206 @@
+import hashlib
+import json
+from functools import wraps
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import Http404, HttpResponse, QueryDict
+from django.shortcuts import get_object_or_404
+from django.urls import reverse
+from django.utils.cache import get_conditional_response, quote_etag
+from django.views.decorators.http import require_safe
+
+from posts import archive, caching, counters
+from posts.feed import FeedPaginator
+from posts.models import ArchivedPost, Follow, Group, Post, User
+from posts.paginators import CommentPaginator, TieredPaginator
+from posts.views import (group_scopes, index_scopes, post_scopes,
+                         profile_scopes)
+
+from .serializers import (COMMENT_FIELDS, POST_FIELDS, FieldsError,
+                          parse_fields, serialize)
+
+PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+DETAIL_FIELDS = dict(POST_FIELDS, comments=None)
+
+
+class ApiError(Exception):
+    def __init__(self, status, detail):
+        super().__init__(detail)
+        self.status = status
+        self.detail = detail
+
+
+def json_response(data, status=200):
+    content = json.dumps(
+        data, cls=DjangoJSONEncoder, ensure_ascii=False,
+        separators=(',', ':'))
+    return HttpResponse(
+        content, status=status,
+        content_type='application/json; charset=utf-8')
+
+
+def api_view(view):
+    """Отдаёт данные представления как компактный JSON с ETag.
+
+    Ошибки возвращаются в виде {"detail": ...}, а запрос с совпадающим
+    If-None-Match получает 304 без тела.
+    """
+    @require_safe
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        try:
+            data = view(request, *args, **kwargs)
+        except Http404:
+            return json_response({'detail': 'Не найдено.'}, status=404)
+        except FieldsError as error:
+            return json_response({'detail': str(error)}, status=400)
+        except ApiError as error:
+            return json_response({'detail': error.detail},
+                                 status=error.status)
+        response = json_response(data)
+        etag = quote_etag(hashlib.md5(response.content).hexdigest())
+        response['ETag'] = etag
+        return get_conditional_response(
+            request, etag=etag, response=response) or response
+    return wrapper
+
+
+def page_size(request):
+    try:
+        size = int(request.GET.get('limit', PAGE_SIZE))
+    except ValueError:
+        raise ApiError(400, 'limit должен быть числом.')
+    return min(max(size, 1), MAX_PAGE_SIZE)
+
+
+def cursor_url(params, path, name, cursor):
+    if cursor is None:
+        return None
+    params = params.copy()
+    params.pop('after', None)
+    params.pop('before', None)
+    params[name] = cursor
+    return f'{path}?{params.urlencode()}'
+
+
+def page_data(request, page, fields, serializers, path=None):
+    """Порция записей со ссылками на соседние порции.
+
+    Ссылки сохраняют параметры запроса; для вложенной порции с
+    собственным адресом path параметры не переносятся.
+    """
+    params = request.GET if path is None else QueryDict()
+    path = path or request.path
+    return {
+        'next': cursor_url(params, path, 'after', page.next_cursor),
+        'previous': cursor_url(
+            params, path, 'before', page.previous_cursor),
+        'results': [serialize(obj, fields, serializers) for obj in page],
+    }
+
+
+def request_page(request, paginator):
+    return paginator.get_keyset_page(
+        after=request.GET.get('after'), before=request.GET.get('before'))
+
+
+def post_page(request, paginator):
+    fields = parse_fields(request.GET.get('fields'), POST_FIELDS)
+    return page_data(request, request_page(request, paginator),
+                     fields, POST_FIELDS)
+
+
+def post_list(request, posts, archived):
+    return post_page(
+        request, TieredPaginator(posts, archived, page_size(request)))
+
+
+def comment_paginator(request, post):
+    return CommentPaginator(post.comments.for_thread(), page_size(request))
+
+
+@caching.cache_anonymous_page(index_scopes)
+@api_view
+def posts(request):
+    return post_list(request, Post.objects.for_feed(),
+                     ArchivedPost.objects.for_feed())
+
+
+@caching.cache_anonymous_page(group_scopes)
+@api_view
+def group(request, slug):
+    group = get_object_or_404(Group, slug=slug)
+    return {
+        'slug': group.slug,
+        'title': group.title,
+        'description': group.description,
+        'posts_count': counters.get_count(counters.GROUP, group.pk),
+    }
+
+
+@caching.cache_anonymous_page(group_scopes)
+@api_view
+def group_posts(request, slug):
+    group = get_object_or_404(Group, slug=slug)
+    return post_list(request, Post.objects.for_feed().filter(group=group),
+                     ArchivedPost.objects.for_feed().filter(group=group))
+
+
+@caching.cache_anonymous_page(profile_scopes)
+@api_view
+def profile(request, username):
+    author = get_object_or_404(User, username=username)
+    following = None
+    if request.user.is_authenticated and request.user != author:
+        following = Follow.objects.filter(
+            user=request.user, author=author).exists()
+    return {
+        'username': author.username,
+        'full_name': author.get_full_name(),
+        'posts_count': counters.get_count(counters.AUTHOR, author.pk),
+        'following': following,
+    }
+
+
+@caching.cache_anonymous_page(profile_scopes)
+@api_view
+def profile_posts(request, username):
+    author = get_object_or_404(User, username=username)
+    return post_list(
+        request, Post.objects.for_feed().filter(author=author),
+        ArchivedPost.objects.for_feed().filter(author=author))
+
+
+@caching.cache_anonymous_page(post_scopes)
+@api_view
+def post_detail(request, post_id):
+    post = archive.get_post(post_id)
+    fields = parse_fields(request.GET.get('fields'), DETAIL_FIELDS)
+    data = serialize(
+        post, [name for name in fields if name != 'comments'], POST_FIELDS)
+    if 'comments' in fields:
+        # Первая порция комментариев, дальше клиент листает
+        # отдельный адрес, как кнопка «Показать ещё».
+        data['comments'] = page_data(
+            request, comment_paginator(request, post).get_keyset_page(),
+            tuple(COMMENT_FIELDS), COMMENT_FIELDS,
+            path=reverse('api:post_comments', args=[post.pk]))
+    return data
+
+
+@caching.cache_anonymous_page(post_scopes)
+@api_view
+def post_comments(request, post_id):
+    post = archive.get_post(post_id)
+    fields = parse_fields(request.GET.get('fields'), COMMENT_FIELDS)
+    return page_data(
+        request, request_page(request, comment_paginator(request, post)),
+        fields, COMMENT_FIELDS)
+
+
+@api_view
+def follow(request):
+    if not request.user.is_authenticated:
+        raise ApiError(401, 'Нужна авторизация.')
+    return post_page(request, FeedPaginator(request.user, page_size(request)))
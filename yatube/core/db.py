@@ -0,0 +1,41 @@
+"""Повтор записей, которые упёрлись в занятую базу SQLite.
+
+busy_timeout спасает не всегда: транзакция, которая начала с чтения,
+получает «database is locked» сразу, если за это время писал кто-то
+другой. Такую запись нужно повторить целиком, в новой транзакции.
+"""
+import random
+import time
+
+from django.conf import settings
+from django.db import OperationalError, connection, transaction
+
+LOCK_ERRORS = ('database is locked', 'database table is locked')
+
+
+def is_lock_error(error):
+    return isinstance(error, OperationalError) and any(
+        message in str(error) for message in LOCK_ERRORS)
+
+
+def retry_write(func, *args, **kwargs):
+    """Выполняет func в транзакции, повторяя её при блокировке базы.
+
+    Между попытками пауза растёт вдвое от DB_RETRY_DELAY, но не больше
+    DB_RETRY_MAX_DELAY, со случайным разбросом, чтобы соперники не
+    сталкивались снова. Внутри чужой транзакции повтор невозможен, и
+    func выполняется один раз.
+    """
+    if connection.in_atomic_block:
+        return func(*args, **kwargs)
+    attempts = settings.DB_WRITE_ATTEMPTS
+    delay = settings.DB_RETRY_DELAY
+    for attempt in range(1, attempts + 1):
+        try:
+            with transaction.atomic():
+                return func(*args, **kwargs)
+        except OperationalError as error:
+            if attempt == attempts or not is_lock_error(error):
+                raise
+        time.sleep(random.uniform(delay / 2, delay))
+        delay = min(delay * 2, settings.DB_RETRY_MAX_DELAY)
@@ -0,0 +1,34 @@
+"""SQLite с настройками для нескольких процессов и потоков.
+
+Каждое новое соединение переводит базу в WAL (читатели не ждут
+писателя), ждёт занятую базу busy_timeout миллисекунд и пишет журнал
+с synchronous=NORMAL. Значения берутся из OPTIONS['pragmas'] поверх
+PRAGMAS, остальные OPTIONS уходят в sqlite3.connect как обычно.
+"""
+from django.db.backends.sqlite3 import base
+
+PRAGMAS = {
+    # Действует только на новой базе, пока в ней нет таблиц;
+    # существующую переводит db_maintenance --vacuum.
+    'auto_vacuum': 'INCREMENTAL',
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'busy_timeout': 5000,
+}
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    def get_connection_params(self):
+        params = super().get_connection_params()
+        params.pop('pragmas', None)
+        return params
+
+    @property
+    def pragmas(self):
+        return {**PRAGMAS, **self.settings_dict['OPTIONS'].get('pragmas', {})}
+
+    def get_new_connection(self, conn_params):
+        connection = super().get_new_connection(conn_params)
+        for name, value in self.pragmas.items():
+            connection.execute(f'PRAGMA {name} = {value}')
+        return connection
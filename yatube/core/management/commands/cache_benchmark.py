@@ -0,0 +1,57 @@
+import os
+import tempfile
+import time
+
+from django.core.cache.backends.filebased import FileBasedCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.management.base import BaseCommand
+
+from core.cache_backends import SQLiteCache
+
+FRAGMENT = 'x' * 4096
+
+
+class Command(BaseCommand):
+    help = ('Сравнивает скорость SQLiteCache с LocMemCache '
+            'и FileBasedCache.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--operations', type=int, default=2000)
+        parser.add_argument('--keys', type=int, default=200)
+
+    def handle(self, *args, **options):
+        operations = options['operations']
+        keys = [f'bench:{i}' for i in range(options['keys'])]
+        params = {'TIMEOUT': None, 'OPTIONS': {'MAX_ENTRIES': len(keys) * 2}}
+        with tempfile.TemporaryDirectory() as directory:
+            backends = {
+                'LocMemCache': LocMemCache('bench', params),
+                'FileBasedCache': FileBasedCache(
+                    os.path.join(directory, 'files'), params),
+                'SQLiteCache': SQLiteCache(
+                    os.path.join(directory, 'cache.sqlite3'), params),
+            }
+            self.stdout.write(
+                f'{"backend":<16}{"set/s":>10}{"get/s":>10}{"incr/s":>10}')
+            for name, backend in backends.items():
+                rates = self.measure(backend, keys, operations)
+                self.stdout.write(
+                    f'{name:<16}' + ''.join(f'{rate:>10.0f}'
+                                            for rate in rates))
+
+    def measure(self, backend, keys, operations):
+        rates = []
+        started = time.perf_counter()
+        for i in range(operations):
+            backend.set(keys[i % len(keys)], FRAGMENT)
+        rates.append(operations / (time.perf_counter() - started))
+        started = time.perf_counter()
+        for i in range(operations):
+            backend.get(keys[i % len(keys)])
+        rates.append(operations / (time.perf_counter() - started))
+        backend.set('bench:counter', 0)
+        started = time.perf_counter()
+        for _ in range(operations):
+            backend.incr('bench:counter')
+        rates.append(operations / (time.perf_counter() - started))
+        return rates
@@ -0,0 +1,52 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+
+class Command(BaseCommand):
+    help = ('Обслуживание базы SQLite: статистика для планировщика, '
+            'возврат свободных страниц и сброс журнала WAL. '
+            'Рассчитана на запуск по расписанию.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--pages', type=int, default=1000,
+            help='Сколько свободных страниц вернуть за запуск; 0 — все.')
+        parser.add_argument(
+            '--vacuum', action='store_true',
+            help='Полный VACUUM; нужен один раз, чтобы включить '
+                 'auto_vacuum=INCREMENTAL на старой базе.')
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'sqlite':
+            raise CommandError('Команда работает только с SQLite.')
+        with connection.cursor() as cursor:
+            if options['vacuum']:
+                cursor.execute('PRAGMA auto_vacuum = INCREMENTAL')
+                cursor.execute('VACUUM')
+                self.stdout.write('VACUUM выполнен.')
+            cursor.execute('ANALYZE')
+            free = self.pragma(cursor, 'freelist_count')
+            if self.pragma(cursor, 'auto_vacuum') == 2:
+                pages = options['pages'] or free
+                cursor.execute(f'PRAGMA incremental_vacuum({pages})')
+                cursor.fetchall()
+                self.stdout.write(
+                    f'Свободных страниц: {free} -> '
+                    f'{self.pragma(cursor, "freelist_count")}')
+            else:
+                self.stdout.write(
+                    f'Свободных страниц: {free}; auto_vacuum выключен, '
+                    f'запустите команду с --vacuum.')
+            busy = 0
+            if self.pragma(cursor, 'journal_mode') == 'wal':
+                cursor.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+                busy, _, _ = cursor.fetchone()
+        if busy:
+            self.stdout.write('Журнал WAL занят читателями и сброшен '
+                              'не полностью.')
+        self.stdout.write(self.style.SUCCESS('Готово.'))
+
+    @staticmethod
+    def pragma(cursor, name):
+        cursor.execute(f'PRAGMA {name}')
+        return cursor.fetchone()[0]
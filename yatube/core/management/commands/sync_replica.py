@@ -0,0 +1,41 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from core import replicas
+
+
+class Command(BaseCommand):
+    help = ('Копирует основную базу SQLite в реплики из '
+            'DATABASE_REPLICAS — локальная замена репликации.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'aliases', nargs='*',
+            help='Реплики для копирования; по умолчанию все.')
+        parser.add_argument(
+            '--every', type=float,
+            help='Повторять раз в столько секунд, пока не прервут.')
+
+    def handle(self, *args, **options):
+        aliases = options['aliases'] or settings.DATABASE_REPLICAS
+        if not aliases:
+            raise CommandError('В DATABASE_REPLICAS нет реплик.')
+        unknown = set(aliases) - set(settings.DATABASE_REPLICAS)
+        if unknown:
+            raise CommandError(
+                f'Неизвестные реплики: {", ".join(sorted(unknown))}')
+        for alias in aliases:
+            if connections[alias].vendor != 'sqlite':
+                raise CommandError(f'{alias}: копируется только SQLite.')
+        while True:
+            for alias in aliases:
+                started = time.perf_counter()
+                replicas.sync(alias)
+                self.stdout.write(
+                    f'{alias}: {time.perf_counter() - started:.2f} с')
+            if not options['every']:
+                break
+            time.sleep(options['every'])
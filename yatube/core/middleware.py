@@ -0,0 +1,70 @@
+import json
+import logging
+import time
+
+from django.conf import settings
+
+from . import replicas, timing
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+logger = logging.getLogger('core.timing')
+
+
+class ServerTimingMiddleware:
+    """Отдаёт замеры запроса в Server-Timing и одной строкой JSON в лог.
+
+    Стоит первым в MIDDLEWARE, чтобы учитывать запросы сессии и
+    авторизации. Для потоковых ответов замеры заканчиваются на
+    заголовках: тело ещё не отдано.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with timing.collect() as collected:
+            response = self.get_response(request)
+        response['Server-Timing'] = collected.header()
+        if logger.isEnabledFor(logging.INFO):
+            match = request.resolver_match
+            logger.info(json.dumps(dict(
+                method=request.method,
+                path=request.path,
+                view=match.view_name if match else None,
+                status=response.status_code,
+                **collected.as_dict()
+            ), ensure_ascii=False))
+        return response
+
+
+class ReplicaMiddleware:
+    """Направляет чтения GET- и HEAD-запросов на реплику.
+
+    После запроса, который записал в базу, ставит cookie со временем
+    записи: пока реплики не синхронизированы позже него, пользователь
+    читает основную базу и видит свой пост, комментарий или подписку.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if request.method in SAFE_METHODS:
+            try:
+                written = float(
+                    request.COOKIES.get(replicas.WRITE_COOKIE, 0))
+            except ValueError:
+                written = 0
+            replica = replicas.choose(written)
+        else:
+            replica = None, None
+        with replicas.reading(*replica):
+            response = self.get_response(request)
+            wrote = replicas.wrote()
+        if wrote:
+            response.set_cookie(
+                replicas.WRITE_COOKIE, f'{time.time():.3f}',
+                max_age=settings.REPLICA_PIN_SECONDS, httponly=True,
+                samesite='Lax')
+        return response
@@ -0,0 +1,134 @@
+"""Чтение с реплик базы.
+
+ReplicaMiddleware выбирает для GET- и HEAD-запроса одну из реплик
+DATABASE_REPLICAS, ReplicaRouter отправляет на неё чтения, запись
+всегда идёт в default. Реплика годится, только если она
+синхронизирована позже последней записи пользователя (cookie после
+записи, cookie после любого пишущего запроса) и позже изменения
+данных, которые запрос положит в кэш (caching.page_state вызывает
+require_fresh). Иначе запрос целиком или с этого места читает
+основную базу; после своей записи запрос тоже читает основную базу.
+
+Время синхронизации каждой реплики лежит в кэше; его пишет sync, а
+для настоящей репликации — тот, кто следит за её отставанием.
+"""
+import random
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, connections
+
+SYNCED_KEY = 'replica:synced:{}'
+WRITE_COOKIE = 'db_write'
+
+_local = threading.local()
+
+
+def current():
+    return getattr(_local, 'alias', None)
+
+
+def mirrors_primary(alias):
+    """Реплика указывает на ту же базу, что и default: так тестовый
+    прогон подменяет её (TEST['MIRROR']), и читать с неё нечего."""
+    return (connections[alias].settings_dict['NAME']
+            == connections[DEFAULT_DB_ALIAS].settings_dict['NAME'])
+
+
+def choose(written=0):
+    """Случайная реплика, синхронизированная позже written, и время её
+    синхронизации; (None, None), если такой нет."""
+    aliases = [alias for alias in settings.DATABASE_REPLICAS
+               if not mirrors_primary(alias)]
+    if not aliases:
+        return None, None
+    synced = cache.get_many([SYNCED_KEY.format(alias) for alias in aliases])
+    fresh = [(alias, synced[SYNCED_KEY.format(alias)]) for alias in aliases
+             if synced.get(SYNCED_KEY.format(alias), 0) > written]
+    if not fresh:
+        return None, None
+    return random.choice(fresh)
+
+
+def wrote():
+    """Запрос уже писал в базу."""
+    return getattr(_local, 'wrote', False)
+
+
+@contextmanager
+def reading(alias, synced=None):
+    previous = current(), getattr(_local, 'synced', None), wrote()
+    _local.alias, _local.synced, _local.wrote = alias, synced, False
+    try:
+        yield
+    finally:
+        _local.alias, _local.synced, _local.wrote = previous
+
+
+def use_primary():
+    """До конца запроса читать основную базу."""
+    _local.alias = _local.synced = None
+
+
+def require_fresh(changed):
+    """Данные, изменённые в changed (unix-время), реплика может ещё не
+    знать: тогда запрос дальше читает основную базу.
+
+    Время изменения хранится с точностью до секунды, а синхронизации —
+    точно, поэтому изменение в ту же секунду считается более поздним.
+    """
+    synced = getattr(_local, 'synced', None)
+    if synced is not None and changed + 1 > synced:
+        use_primary()
+
+
+def copy_database(connection, path):
+    """Копирует базу SQLite соединения в файл path через backup API.
+
+    Копия делается одним шагом под блокировкой чтения источника, так
+    что файл всегда согласован, а его читатели лишь ждут конца записи.
+    """
+    connection.ensure_connection()
+    target = sqlite3.connect(path, timeout=30)
+    try:
+        connection.connection.backup(target)
+    finally:
+        target.close()
+
+
+def sync(alias, source=DEFAULT_DB_ALIAS):
+    """Обновляет реплику-копию; временем синхронизации считается
+    начало копирования."""
+    started = time.time()
+    copy_database(connections[source],
+                  connections[alias].settings_dict['NAME'])
+    cache.set(SYNCED_KEY.format(alias), started, timeout=None)
+    return started
+
+
+class ReplicaRouter:
+    """Чтения — на реплику, выбранную для запроса, запись и миграции —
+    только в default.
+
+    Запись отмечается: дальше запрос читает основную базу, а
+    ReplicaMiddleware ставит cookie со временем записи. Так работают
+    и представления, которые пишут в ответ на GET (подписка, удаление).
+    """
+
+    def db_for_read(self, model, **hints):
+        return current() or DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        _local.wrote = True
+        use_primary()
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, **hints):
+        return db not in settings.DATABASE_REPLICAS
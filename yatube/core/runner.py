@@ -0,0 +1,48 @@
+"""Настройки прогона тестов.
+
+Сами настройки проекта не знают, запущены ли тесты: значения для
+тестов включает test_settings — в manage.py test через TEST_RUNNER, в
+pytest через conftest.py в корне репозитория.
+"""
+import copy
+import logging
+import os
+import shutil
+import tempfile
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.test import override_settings
+from django.test.runner import DiscoverRunner
+
+
+@contextmanager
+def test_settings():
+    # Свой пустой файл кэша: тесты не видят записей сервера разработки
+    # и прошлых прогонов.
+    directory = tempfile.mkdtemp(prefix='yatube-test-cache-')
+    caches = copy.deepcopy(settings.CACHES)
+    caches['default']['LOCATION'] = os.path.join(directory, 'cache.sqlite3')
+    # Строки замеров каждого запроса в выводе тестов не нужны.
+    timing_logger = logging.getLogger('core.timing')
+    level = timing_logger.level
+    timing_logger.setLevel(logging.WARNING)
+    try:
+        # Миниатюры строятся прямо в запросе: фоновые потоки не
+        # переживают временный MEDIA_ROOT тестов.
+        with override_settings(CACHES=caches, THUMBNAIL_WORKERS=0):
+            yield
+    finally:
+        timing_logger.setLevel(level)
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+class TestSettingsRunner(DiscoverRunner):
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self.test_settings = test_settings()
+        self.test_settings.__enter__()
+
+    def teardown_test_environment(self, **kwargs):
+        self.test_settings.__exit__(None, None, None)
+        super().teardown_test_environment(**kwargs)
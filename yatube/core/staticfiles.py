@@ -0,0 +1,166 @@
+"""Статика с хэшем в имени, без лишних файлов и заранее сжатая.
+
+collectstatic даёт файлам имена с хэшем содержимого, и {% static %}
+подставляет их из манифеста, поэтому веб-сервер может отдавать их с
+Cache-Control: immutable. Файлы проекта, до которых нельзя дойти от
+{% static %} в шаблонах по ссылкам url(), @import и sourceMappingURL
+(полные и RTL-сборки Bootstrap, карты к ним), в STATIC_ROOT не
+остаются. Рядом с текстовыми файлами кладутся .gz и, если установлен
+пакет brotli, .br. Пока collectstatic не запускали, {% static %}
+выдаёт обычные имена.
+"""
+import gzip
+import os
+import posixpath
+import re
+from io import BytesIO
+from urllib.parse import unquote, urldefrag, urlsplit
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.contrib.staticfiles.utils import matches_patterns
+from django.core.files.base import ContentFile
+from django.template import engines
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+STATIC_TAG = re.compile(r"""{%\s*static\s+['"]([^'"]+)['"]""")
+TEMPLATE_EXTENSIONS = ('.html', '.txt', '.xml')
+COMPRESSIBLE = ('*.css', '*.js', '*.map', '*.svg', '*.ico', '*.json',
+                '*.txt', '*.xml', '*.webmanifest')
+# Сжатая копия нужна, только если она заметно меньше файла.
+MIN_RATIO = 0.9
+
+
+def gzip_compress(data):
+    # Нулевое время в заголовке: одинаковый файл — одинаковый архив.
+    buffer = BytesIO()
+    with gzip.GzipFile(fileobj=buffer, mode='wb', compresslevel=9,
+                       mtime=0) as file:
+        file.write(data)
+    return buffer.getvalue()
+
+
+def template_references():
+    """Имена из {% static '…' %} во всех шаблонах проекта и приложений."""
+    names = set()
+    for engine in engines.all():
+        for directory in engine.template_dirs:
+            for root, _, filenames in os.walk(directory):
+                for filename in filenames:
+                    if not filename.endswith(TEMPLATE_EXTENSIONS):
+                        continue
+                    path = os.path.join(root, filename)
+                    with open(path, encoding='utf-8') as file:
+                        names.update(STATIC_TAG.findall(file.read()))
+    return names
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    patterns = ManifestStaticFilesStorage.patterns + (
+        ('*.css', (
+            (r'(/\*# sourceMappingURL=(.*?) \*/)',
+             '/*# sourceMappingURL=%s */'),
+        )),
+    )
+
+    def stored_name(self, name):
+        if not self.hashed_files:
+            return name
+        return super().stored_name(name)
+
+    def post_process(self, paths, dry_run=False, **options):
+        produced = {}
+        for name, hashed_name, processed in super().post_process(
+                paths, dry_run, **options):
+            if hashed_name:
+                produced.setdefault(name, set()).add(hashed_name)
+            yield name, hashed_name, processed
+        if dry_run:
+            return
+        for name in self.prune(paths):
+            self.delete(name)
+            self.hashed_files.pop(name, None)
+        self.delete_stale_copies(paths, produced)
+        self.save_manifest()
+        for name in self.hashed_files.values():
+            if matches_patterns(name, COMPRESSIBLE):
+                self.compress(name)
+
+    def delete_stale_copies(self, paths, produced):
+        """Удаляет копии с хэшем, которых нет в манифесте.
+
+        Промежуточная копия файла со ссылками сохраняется под хэшем
+        исходного содержимого, и на неё ничто не ссылается; удалённым
+        файлам не нужна ни одна копия.
+        """
+        for name, (storage, path) in paths.items():
+            if matches_patterns(path, self._patterns):
+                with storage.open(path) as original:
+                    produced.setdefault(name, set()).add(
+                        self.hashed_name(name, original))
+        for name, hashed_names in produced.items():
+            for hashed_name in hashed_names - {self.hashed_files.get(name)}:
+                self.delete(hashed_name)
+
+    def _references(self, name, paths):
+        """Файлы, на которые ссылается исходный файл name."""
+        patterns = [
+            compiled
+            for extension, compiled_patterns in self._patterns.items()
+            if matches_patterns(name, (extension,))
+            for compiled, _ in compiled_patterns
+        ]
+        if not patterns or name not in paths:
+            return
+        storage, path = paths[name]
+        with storage.open(path) as file:
+            content = file.read().decode('utf-8', errors='replace')
+        for pattern in patterns:
+            for _, url in pattern.findall(content):
+                if re.match(r'^[a-z]+:', url) or url.startswith('#'):
+                    continue
+                url_path = unquote(urlsplit(urldefrag(url)[0]).path)
+                if url_path.startswith(settings.STATIC_URL):
+                    yield url_path[len(settings.STATIC_URL):]
+                elif not url_path.startswith('/'):
+                    yield posixpath.normpath(posixpath.join(
+                        posixpath.dirname(name), url_path))
+
+    def prune(self, paths):
+        """Файлы проекта, до которых не дойти от шаблонов."""
+        roots = {
+            os.path.realpath(root[1] if isinstance(root, (list, tuple))
+                             else root)
+            for root in settings.STATICFILES_DIRS
+        }
+        project = {
+            name for name, (storage, _) in paths.items()
+            if os.path.realpath(storage.location) in roots
+        }
+        used = template_references() | set(settings.STATIC_KEEP)
+        queue = list(used)
+        while queue:
+            for reference in self._references(queue.pop(), paths):
+                if reference not in used:
+                    used.add(reference)
+                    queue.append(reference)
+        return sorted(project - used)
+
+    def compress(self, name):
+        """Кладёт рядом с файлом сжатые копии для gzip_static и
+        brotli_static веб-сервера."""
+        with self.open(name) as file:
+            content = file.read()
+        variants = [('.gz', gzip_compress)]
+        if brotli is not None:
+            variants.append(('.br', brotli.compress))
+        for suffix, compress in variants:
+            if self.exists(name + suffix):
+                continue
+            compressed = compress(content)
+            if len(compressed) < len(content) * MIN_RATIO:
+                self._save(name + suffix, ContentFile(compressed))
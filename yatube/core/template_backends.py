@@ -0,0 +1,28 @@
+from django.template import TemplateDoesNotExist
+from django.template.backends.django import DjangoTemplates, Template, reraise
+
+from . import timing
+
+
+class TimedTemplate(Template):
+    def render(self, context=None, request=None):
+        with timing.measure('tpl'):
+            return super().render(context, request)
+
+
+class TimedDjangoTemplates(DjangoTemplates):
+    """Шаблоны Django с замером времени отрисовки для Server-Timing.
+
+    Замеряется только отрисовка верхнего уровня: include и наследование
+    выполняются внутри неё и второй раз не учитываются.
+    """
+
+    def from_string(self, template_code):
+        return TimedTemplate(self.engine.from_string(template_code), self)
+
+    def get_template(self, template_name):
+        try:
+            return TimedTemplate(
+                self.engine.get_template(template_name), self)
+        except TemplateDoesNotExist as exc:
+            reraise(exc, self)
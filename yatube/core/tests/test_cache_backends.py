@@ -0,0 +1,83 @@
+import multiprocessing
+import os
+import shutil
+import tempfile
+import time
+
+from django.test import SimpleTestCase
+
+from core.cache_backends import CULL_CHECK_EVERY, SQLiteCache
+
+INCREMENTS = 50
+WORKERS = 4
+
+
+def increment(path):
+    cache = SQLiteCache(path, {})
+    for _ in range(INCREMENTS):
+        cache.incr('counter')
+
+
+class SQLiteCacheTests(SimpleTestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'cache.sqlite3')
+        self.cache = SQLiteCache(self.path, {})
+
+    def tearDown(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def test_basic_operations(self):
+        """Кэш хранит, возвращает и удаляет значения."""
+        self.cache.set('text', {'a': [1, 2]})
+        self.cache.set_many({'one': 1, 'two': 'два'})
+        self.assertEqual(self.cache.get('text'), {'a': [1, 2]})
+        self.assertEqual(
+            self.cache.get_many(['one', 'two', 'missing']),
+            {'one': 1, 'two': 'два'})
+        self.assertFalse(self.cache.add('one', 10))
+        self.assertTrue(self.cache.add('three', 3))
+        self.cache.delete('one')
+        self.assertIsNone(self.cache.get('one'))
+        self.assertTrue(self.cache.has_key('three'))
+        self.cache.clear()
+        self.assertFalse(self.cache.has_key('three'))
+
+    def test_timeout(self):
+        """Значение с истёкшим сроком не возвращается."""
+        self.cache.set('short', 'value', timeout=1)
+        self.cache.set('forever', 'value', timeout=None)
+        time.sleep(1.1)
+        self.assertIsNone(self.cache.get('short'))
+        self.assertTrue(self.cache.add('short', 'new'))
+        self.assertEqual(self.cache.get('forever'), 'value')
+
+    def test_lru_eviction(self):
+        """При переполнении вытесняются давно не читавшиеся записи."""
+        cache = SQLiteCache(
+            self.path, {'OPTIONS': {'MAX_ENTRIES': 10, 'CULL_FREQUENCY': 2}})
+        cache.set('hot', 'value')
+        cache._connection().execute(
+            "UPDATE cache SET accessed = ? WHERE key = ?",
+            (time.time() + 3600, cache.make_key('hot')))
+        for i in range(CULL_CHECK_EVERY * 2):
+            cache.set(f'cold{i}', i)
+        self.assertEqual(cache.get('hot'), 'value')
+        total = cache._connection().execute(
+            'SELECT COUNT(*) FROM cache').fetchone()[0]
+        self.assertLess(total, CULL_CHECK_EVERY * 2)
+
+    def test_incr_is_shared_between_processes(self):
+        """incr атомарен и виден всем процессам."""
+        self.cache.set('counter', 0)
+        with self.assertRaises(ValueError):
+            self.cache.incr('missing')
+        workers = [
+            multiprocessing.Process(target=increment, args=(self.path,))
+            for _ in range(WORKERS)
+        ]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        self.assertEqual(self.cache.get('counter'), INCREMENTS * WORKERS)
@@ -0,0 +1,121 @@
+import os
+import shutil
+import tempfile
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.db import OperationalError, connection
+from django.test import SimpleTestCase, TestCase, TransactionTestCase
+from django.test import override_settings
+
+from core import db
+from core.db_backends.sqlite3.base import DatabaseWrapper
+
+
+class FileDatabaseTests(SimpleTestCase):
+    """Соединения с файловой базой через свой бэкенд."""
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.wrappers = []
+
+    def tearDown(self):
+        for wrapper in self.wrappers:
+            wrapper.close()
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def connect(self, **pragmas):
+        settings_dict = dict(
+            connection.settings_dict,
+            NAME=os.path.join(self.directory, 'db.sqlite3'),
+            OPTIONS={'pragmas': pragmas},
+        )
+        wrapper = DatabaseWrapper(settings_dict)
+        self.wrappers.append(wrapper)
+        return wrapper.cursor()
+
+    def pragma(self, cursor, name):
+        cursor.execute(f'PRAGMA {name}')
+        return cursor.fetchone()[0]
+
+    def test_pragmas(self):
+        """Новое соединение включает WAL и таймаут из OPTIONS."""
+        cursor = self.connect(busy_timeout=1234)
+        self.assertEqual(self.pragma(cursor, 'journal_mode'), 'wal')
+        self.assertEqual(self.pragma(cursor, 'busy_timeout'), 1234)
+        self.assertEqual(self.pragma(cursor, 'synchronous'), 1)
+        self.assertEqual(self.pragma(cursor, 'auto_vacuum'), 2)
+
+    def test_readers_do_not_wait_for_writer(self):
+        """Пока идёт запись, читатель видит прошлое состояние."""
+        writer = self.connect()
+        writer.execute('CREATE TABLE note (text TEXT)')
+        writer.execute("INSERT INTO note VALUES ('было')")
+        reader = self.connect(busy_timeout=0)
+        writer.execute('BEGIN IMMEDIATE')
+        writer.execute("UPDATE note SET text = 'стало'")
+        reader.execute('SELECT text FROM note')
+        self.assertEqual(reader.fetchone()[0], 'было')
+        writer.execute('COMMIT')
+
+
+@override_settings(DB_WRITE_ATTEMPTS=3, DB_RETRY_DELAY=0.1,
+                   DB_RETRY_MAX_DELAY=0.15)
+class RetryWriteTests(TransactionTestCase):
+    def flaky(self, failures, error='database is locked'):
+        calls = []
+
+        def write():
+            calls.append(connection.in_atomic_block)
+            if len(calls) <= failures:
+                raise OperationalError(error)
+            return 'ok'
+        return write, calls
+
+    @mock.patch('core.db.time.sleep')
+    def test_retries_with_backoff(self, sleep):
+        """Блокировка повторяется в новой транзакции с растущей паузой."""
+        write, calls = self.flaky(2)
+        self.assertEqual(db.retry_write(write), 'ok')
+        self.assertEqual(calls, [True, True, True])
+        first, second = (call[0][0] for call in sleep.call_args_list)
+        self.assertTrue(0.05 <= first <= 0.1)
+        self.assertTrue(0.075 <= second <= 0.15)
+
+    @mock.patch('core.db.time.sleep')
+    def test_gives_up(self, sleep):
+        """После последней попытки ошибка уходит наверх."""
+        write, calls = self.flaky(3)
+        with self.assertRaises(OperationalError):
+            db.retry_write(write)
+        self.assertEqual(len(calls), 3)
+        self.assertEqual(sleep.call_count, 2)
+
+    @mock.patch('core.db.time.sleep')
+    def test_other_errors(self, sleep):
+        """Прочие ошибки базы не повторяются."""
+        write, calls = self.flaky(1, 'no such table: note')
+        with self.assertRaises(OperationalError):
+            db.retry_write(write)
+        self.assertEqual(len(calls), 1)
+        sleep.assert_not_called()
+
+
+class InTransactionTests(TestCase):
+    def test_inside_transaction(self):
+        """Внутри внешней транзакции запись выполняется один раз."""
+        write = mock.Mock(side_effect=OperationalError('database is locked'))
+        with self.assertRaises(OperationalError):
+            db.retry_write(write)
+        write.assert_called_once_with()
+
+    def test_maintenance(self):
+        """Команда обслуживания собирает статистику для планировщика."""
+        out = StringIO()
+        call_command('db_maintenance', stdout=out)
+        self.assertIn('Готово', out.getvalue())
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT count(*) FROM sqlite_master "
+                           "WHERE name = 'sqlite_stat1'")
+            self.assertEqual(cursor.fetchone()[0], 1)
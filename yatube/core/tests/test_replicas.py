@@ -0,0 +1,217 @@
+import os
+import shutil
+import sqlite3
+import tempfile
+import time
+from unittest import mock
+
+from django.core.cache import cache
+from django.db import connection, connections
+from django.http import HttpResponse
+from django.urls import reverse
+from django.test import (Client, RequestFactory, SimpleTestCase,
+                         TransactionTestCase, override_settings)
+
+from core import replicas
+from core.db_backends.sqlite3.base import DatabaseWrapper
+from core.middleware import ReplicaMiddleware
+from posts import caching, counters
+from posts.models import Comment, Follow, Post, User
+
+SYNCED = 1000.0
+
+
+@override_settings(DATABASE_REPLICAS=['replica'])
+@mock.patch('core.replicas.mirrors_primary', lambda alias: False)
+class ReplicaRoutingTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        self.factory = RequestFactory()
+        self.router = replicas.ReplicaRouter()
+        self.middleware = ReplicaMiddleware(self.view)
+        self.seen = []
+
+    def view(self, request):
+        self.seen.append(self.router.db_for_read(Post))
+        if request.method == 'POST' or 'write' in request.GET:
+            self.router.db_for_write(Post)
+            self.seen.append(self.router.db_for_read(Post))
+        return HttpResponse()
+
+    def synced(self):
+        cache.set(replicas.SYNCED_KEY.format('replica'), SYNCED)
+
+    def test_router(self):
+        """Чтения идут на выбранную реплику, запись — в default."""
+        self.assertEqual(self.router.db_for_read(Post), 'default')
+        with replicas.reading('replica', SYNCED):
+            self.assertEqual(self.router.db_for_read(Post), 'replica')
+            self.assertEqual(self.router.db_for_write(Post), 'default')
+        self.assertEqual(self.router.db_for_read(Post), 'default')
+        self.assertFalse(self.router.allow_migrate('replica', 'posts'))
+        self.assertTrue(self.router.allow_migrate('default', 'posts'))
+
+    def test_only_synced_replicas(self):
+        """Несинхронизированная реплика не используется."""
+        self.middleware(self.factory.get('/'))
+        self.synced()
+        self.middleware(self.factory.get('/'))
+        self.middleware(self.factory.head('/'))
+        self.assertEqual(self.seen, ['default', 'replica', 'replica'])
+
+    def test_read_your_writes(self):
+        """После записи пользователь читает основную базу, пока реплика
+        не синхронизирована позже."""
+        self.synced()
+        response = self.middleware(self.factory.post('/'))
+        written = response.cookies[replicas.WRITE_COOKIE].value
+        self.assertEqual(self.seen, ['default', 'default'])
+        request = self.factory.get('/')
+        request.COOKIES[replicas.WRITE_COOKIE] = written
+        self.middleware(request)
+        cache.set(replicas.SYNCED_KEY.format('replica'), float(written) + 1)
+        self.middleware(request)
+        self.assertEqual(
+            self.seen, ['default', 'default', 'default', 'replica'])
+
+    def test_get_that_writes(self):
+        """GET, который пишет, дальше читает основную базу и ставит
+        cookie; GET без записи cookie не ставит."""
+        self.synced()
+        response = self.middleware(self.factory.get('/'))
+        self.assertNotIn(replicas.WRITE_COOKIE, response.cookies)
+        response = self.middleware(self.factory.get('/', {'write': 1}))
+        self.assertIn(replicas.WRITE_COOKIE, response.cookies)
+        self.assertEqual(self.seen, ['replica', 'replica', 'default'])
+
+    def test_changed_after_sync(self):
+        """Страница, данные которой изменились после синхронизации,
+        читается из основной базы, чтобы не закэшировать старое."""
+        self.synced()
+        with replicas.reading(*replicas.choose()):
+            caching.page_state(caching.POSTS)
+            self.assertIsNone(replicas.current())
+        caching.bump(caching.POSTS)
+        cache.set(replicas.SYNCED_KEY.format('replica'), 2e9)
+        with replicas.reading(*replicas.choose()):
+            caching.page_state(caching.POSTS)
+            self.assertEqual(replicas.current(), 'replica')
+
+    def test_changed_in_sync_second(self):
+        """Изменение в ту же секунду, что и синхронизация, но позже неё,
+        тоже читается из основной базы."""
+        cache.set(replicas.SYNCED_KEY.format('replica'), SYNCED + 0.5)
+        with mock.patch('posts.caching.time.time', return_value=SYNCED + 0.9):
+            caching.bump(caching.POSTS)
+        with replicas.reading(*replicas.choose()):
+            caching.page_state(caching.POSTS)
+            self.assertIsNone(replicas.current())
+
+
+class TestMirrorTests(SimpleTestCase):
+    @override_settings(DATABASE_REPLICAS=['replica'])
+    def test_mirror_ignored(self):
+        """Реплика-зеркало тестовой базы не выбирается, даже если в кэше
+        осталось время её синхронизации."""
+        cache.set(replicas.SYNCED_KEY.format('replica'), SYNCED)
+        self.assertTrue(replicas.mirrors_primary('replica'))
+        self.assertEqual(replicas.choose(), (None, None))
+
+
+@override_settings(DATABASE_REPLICAS=['replica'])
+class SeparateReplicaTests(TransactionTestCase):
+    """Реплика — отдельный файл, который отстаёт от тестовой базы."""
+    databases = {'default', 'replica'}
+
+    def setUp(self):
+        cache.clear()
+        self.directory = tempfile.mkdtemp()
+        self.replica = connections['replica']
+        self.replica.close()
+        self.name = self.replica.settings_dict['NAME']
+        self.replica.settings_dict['NAME'] = os.path.join(
+            self.directory, 'replica.sqlite3')
+        # Данные изменились задолго до синхронизации, иначе страницы
+        # читали бы основную базу из-за require_fresh.
+        with mock.patch('posts.caching.time.time',
+                        return_value=time.time() - 10):
+            self.author = User.objects.create_user(
+                username='replica_author')
+            self.reader = User.objects.create_user(
+                username='replica_reader')
+            self.post = Post.objects.create(author=self.author, text='Пост')
+            self.comment = Comment.objects.create(
+                post=self.post, author=self.reader,
+                text='Лишний комментарий')
+            caching.bump(caching.GROUPS)
+        self.client = Client()
+        self.client.force_login(self.reader)
+        # Недостающий счётчик создаётся записью, а запись читает основную
+        # базу: счётчики должны быть в реплике заранее.
+        counters.rebuild_counts()
+        replicas.sync('replica')
+
+    def tearDown(self):
+        self.replica.close()
+        self.replica.settings_dict['NAME'] = self.name
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def test_replica_lags(self):
+        """Запрос без своей записи читает реплику и не видит подписку,
+        сделанную после синхронизации."""
+        Follow.objects.create(user=self.reader, author=self.author)
+        response = self.client.get(
+            reverse('posts:profile', args=[self.author.username]))
+        self.assertFalse(response.context['following'])
+
+    def test_get_writes_pin_primary(self):
+        """После подписки и удаления комментария по GET пользователь
+        видит свои изменения, а не отставшую реплику."""
+        profile = reverse('posts:profile', args=[self.author.username])
+        response = self.client.get(
+            reverse('posts:profile_follow', args=[self.author.username]),
+            follow=True)
+        self.assertIn(replicas.WRITE_COOKIE, response.client.cookies)
+        self.assertTrue(response.context['following'])
+        self.assertTrue(Follow.objects.filter(
+            user=self.reader, author=self.author).exists())
+        response = self.client.get(reverse('posts:follow_index'))
+        self.assertEqual(list(response.context['page_obj']), [self.post])
+        response = self.client.get(
+            reverse('posts:comment_delete', args=[self.comment.pk]),
+            follow=True)
+        self.assertNotContains(response, 'Лишний комментарий')
+        response = self.client.get(
+            reverse('posts:profile_unfollow', args=[self.author.username]),
+            follow=True)
+        self.assertFalse(response.context['following'])
+        self.assertFalse(self.client.get(profile).context['following'])
+
+
+class CopyDatabaseTests(SimpleTestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def test_copy(self):
+        """Копия повторяет базу и обновляется поверх открытых читателей."""
+        source = DatabaseWrapper(dict(
+            connection.settings_dict,
+            NAME=os.path.join(self.directory, 'db.sqlite3')))
+        path = os.path.join(self.directory, 'replica.sqlite3')
+        with source.cursor() as cursor:
+            cursor.execute('CREATE TABLE note (text TEXT)')
+            cursor.execute("INSERT INTO note VALUES ('первая')")
+        replicas.copy_database(source, path)
+        reader = sqlite3.connect(path)
+        self.assertEqual(
+            reader.execute('SELECT count(*) FROM note').fetchone()[0], 1)
+        with source.cursor() as cursor:
+            cursor.execute("INSERT INTO note VALUES ('вторая')")
+        replicas.copy_database(source, path)
+        self.assertEqual(
+            reader.execute('SELECT count(*) FROM note').fetchone()[0], 2)
+        reader.close()
+        source.close()
@@ -0,0 +1,53 @@
+import gzip
+import os
+import shutil
+import tempfile
+
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.cache import cache
+from django.core.management import call_command
+from django.templatetags.static import static
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+CSS = 'css/bootstrap.min.css'
+
+
+class StaticFilesTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root, ignore_errors=True)
+        override = override_settings(STATIC_ROOT=self.root)
+        override.enable()
+        self.addCleanup(override.disable)
+
+    def path(self, name):
+        return os.path.join(self.root, *name.split('/'))
+
+    def test_plain_names_before_collectstatic(self):
+        """Без манифеста {% static %} выдаёт обычные имена."""
+        self.assertEqual(static(CSS), f'/static/{CSS}')
+
+    def test_collectstatic(self):
+        """collectstatic даёт имена с хэшем, отбрасывает ненужные сборки
+        Bootstrap и кладёт рядом сжатые копии."""
+        call_command('collectstatic', interactive=False, verbosity=0)
+        hashed = staticfiles_storage.stored_name(CSS)
+        self.assertRegex(hashed, r'^css/bootstrap\.min\.[0-9a-f]{12}\.css$')
+        self.assertEqual(static(CSS), f'/static/{hashed}')
+        for name in ('css/bootstrap.rtl.min.css', 'css/bootstrap.css',
+                     'css/bootstrap.css.map'):
+            self.assertFalse(os.path.exists(self.path(name)), name)
+            self.assertNotIn(name, staticfiles_storage.hashed_files)
+        # Карта нужна подключённому файлу и тоже получает хэш.
+        with open(self.path(hashed)) as file:
+            self.assertIn(
+                staticfiles_storage.stored_name('css/bootstrap.min.css.map')
+                .split('/')[-1], file.read())
+        with open(self.path(hashed), 'rb') as file, \
+                gzip.open(self.path(hashed + '.gz')) as compressed:
+            self.assertEqual(compressed.read(), file.read())
+        self.assertFalse(os.path.exists(self.path(
+            staticfiles_storage.stored_name('img/logo.png') + '.gz')))
+        self.assertContains(self.client.get(reverse('posts:index')), hashed)
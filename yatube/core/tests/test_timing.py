@@ -0,0 +1,56 @@
+import json
+
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from core import timing
+from posts.models import Post, User
+
+
+class ServerTimingTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='timed')
+        Post.objects.create(author=cls.user, text='Пост')
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+
+    def metrics(self, response):
+        return {part.split(';')[0]: part
+                for part in response['Server-Timing'].split(', ')}
+
+    def test_header(self):
+        """Заголовок содержит SQL, шаблоны и кэш страницы."""
+        metrics = self.metrics(self.client.get(reverse('posts:index')))
+        self.assertIn('total', metrics)
+        self.assertIn('queries', metrics['db'])
+        self.assertIn('tpl', metrics)
+        self.assertIn('miss', metrics['cache'])
+        metrics = self.metrics(self.client.get(reverse('posts:index')))
+        self.assertNotIn('db', metrics)
+        self.assertNotIn('tpl', metrics)
+        self.assertRegex(metrics['cache'], r'desc="[1-9]\d* hit / 0 miss"')
+
+    def test_log_line(self):
+        """Замеры пишутся в лог одной строкой JSON."""
+        with self.assertLogs('core.timing', 'INFO') as logs:
+            self.client.get(reverse('posts:index'))
+        data = json.loads(logs.records[0].getMessage())
+        self.assertEqual(data['view'], 'posts:index')
+        self.assertEqual(data['status'], 200)
+        self.assertGreater(data['db_count'], 0)
+        self.assertGreater(data['cache_misses'], 0)
+
+    def test_outside_request(self):
+        """Вне запроса замеры ничего не делают."""
+        self.assertIsNone(timing.current())
+        with timing.measure('tpl'):
+            timing.cache_read(1, 0, 0.1)
+        with timing.collect() as collected:
+            User.objects.count()
+        self.assertEqual(collected.counts['db'], 1)
+        self.assertIsNone(timing.current())
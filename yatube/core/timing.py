@@ -0,0 +1,125 @@
+"""Лёгкие замеры запроса для заголовка Server-Timing.
+
+Замер активен только внутри ServerTimingMiddleware и только в потоке
+запроса; в остальных потоках record и measure ничего не делают.
+"""
+import threading
+import time
+from contextlib import ExitStack, contextmanager
+
+from django.db import connections
+
+# Метрики в порядке заголовка: запросы SQL, отрисовка шаблонов, чтение
+# кэша, построение миниатюр.
+METRICS = ('db', 'tpl', 'cache', 'thumb')
+
+_local = threading.local()
+
+
+class Timing:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.total = None
+        self.durations = dict.fromkeys(METRICS, 0.0)
+        self.counts = dict.fromkeys(METRICS, 0)
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.thumbnails_queued = 0
+
+    def add(self, metric, duration, count=1):
+        self.durations[metric] += duration
+        self.counts[metric] += count
+
+    def stop(self):
+        self.total = time.perf_counter() - self.started
+
+    def header(self):
+        """Значение Server-Timing, длительности в миллисекундах."""
+        parts = [f'total;dur={self.total * 1000:.1f}']
+        for metric in METRICS:
+            if not self.counts[metric]:
+                continue
+            desc = self.describe(metric)
+            parts.append(
+                f'{metric};dur={self.durations[metric] * 1000:.1f}'
+                f';desc="{desc}"'
+            )
+        return ', '.join(parts)
+
+    def describe(self, metric):
+        count = self.counts[metric]
+        if metric == 'cache':
+            return f'{self.cache_hits} hit / {self.cache_misses} miss'
+        if metric == 'db':
+            return f'{count} queries'
+        return f'{count}'
+
+    def as_dict(self):
+        data = {'total_ms': round(self.total * 1000, 1)}
+        for metric in METRICS:
+            data[f'{metric}_ms'] = round(self.durations[metric] * 1000, 1)
+            data[f'{metric}_count'] = self.counts[metric]
+        data['cache_hits'] = self.cache_hits
+        data['cache_misses'] = self.cache_misses
+        data['thumbnails_queued'] = self.thumbnails_queued
+        return data
+
+
+def current():
+    return getattr(_local, 'timing', None)
+
+
+def _query_wrapper(execute, sql, params, many, context):
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        timing = current()
+        if timing is not None:
+            timing.add('db', time.perf_counter() - started)
+
+
+@contextmanager
+def collect():
+    """Собирает замеры запроса; вложенный вызов замер не начинает."""
+    if current() is not None:
+        yield current()
+        return
+    timing = Timing()
+    _local.timing = timing
+    try:
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(
+                    connection.execute_wrapper(_query_wrapper))
+            yield timing
+    finally:
+        timing.stop()
+        _local.timing = None
+
+
+@contextmanager
+def measure(metric):
+    timing = current()
+    if timing is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timing.add(metric, time.perf_counter() - started)
+
+
+def cache_read(hits, misses, duration):
+    timing = current()
+    if timing is not None:
+        timing.add('cache', duration)
+        timing.cache_hits += hits
+        timing.cache_misses += misses
+
+
+def thumbnail_queued():
+    timing = current()
+    if timing is not None:
+        timing.thumbnails_queued += 1
@@ -1,5 +1,6 @@
 from django.contrib import admin
 
+from . import fulltext
 from .models import Comment, Follow, Post, Group
 
 
@@ -16,6 +17,11 @@ class PostAdmin(admin.ModelAdmin):
     list_filter = ('pub_date',)
     empty_value_display = '-пусто-'
 
+    def get_search_results(self, request, queryset, search_term):
+        if not search_term:
+            return queryset, False
+        return fulltext.filter_posts(queryset, search_term), False
+
 
 class GroupAdmin(admin.ModelAdmin):
     prepopulated_fields = {'slug': ('title',)}
@@ -26,10 +32,15 @@ class GroupAdmin(admin.ModelAdmin):
 
 class CommentAdmin(admin.ModelAdmin):
     list_display = ('pk', 'created', 'text', 'author')
-    search_fields = ('text', 'author')
+    search_fields = ('text', 'author__username')
     list_filter = ('created',)
     empty_value_display = '-пусто-'
 
+    def get_search_results(self, request, queryset, search_term):
+        if not search_term:
+            return queryset, False
+        return fulltext.filter_comments(queryset, search_term), False
+
 
 class FollowAdmin(admin.ModelAdmin):
     list_display = ('pk', 'user', 'author')
@@ -0,0 +1,95 @@
+"""Архив старых постов.
+
+archive_posts переносит посты старше ARCHIVE_AFTER_DAYS вместе с
+комментариями в ArchivedPost и ArchivedComment небольшими пачками,
+каждую в своей транзакции, так что сайт при этом работает. Ленты
+группы, автора и главная листают оба яруса (TieredPaginator),
+страница поста ищет его и в архиве. Архивные посты только читаются:
+их нет в ленте подписок и в поиске, комментировать их нельзя.
+"""
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import Http404
+from django.utils import timezone
+
+from core.db import retry_write
+
+from . import caching, fulltext
+from .models import ArchivedComment, ArchivedPost, Comment, FeedEntry, Post
+
+HORIZON_KEY = 'archive:horizon'
+POST_FIELDS = ('id', 'text', 'pub_date', 'author_id', 'group_id', 'image')
+COMMENT_FIELDS = ('id', 'post_id', 'author_id', 'text', 'created')
+
+
+def horizon():
+    """Дата самого нового поста в архиве или None, если архив пуст."""
+    value = cache.get(HORIZON_KEY)
+    if value is None:
+        value = ArchivedPost.objects.order_by('-pub_date').values_list(
+            'pub_date', flat=True).first() or 0
+        cache.set(HORIZON_KEY, value, timeout=None)
+    return value or None
+
+
+def cutoff(days=None):
+    if days is None:
+        days = settings.ARCHIVE_AFTER_DAYS
+    return timezone.now() - timedelta(days=days)
+
+
+def get_post(post_id):
+    """Пост по id из свежих или из архива; иначе Http404."""
+    for model in (Post, ArchivedPost):
+        post = model.objects.for_feed().filter(pk=post_id).first()
+        if post is not None:
+            return post
+    raise Http404
+
+
+def move_batch(before, size):
+    """Переносит до size самых старых постов, опубликованных раньше
+    before, и возвращает перенесённые посты как словари полей.
+
+    Строки удаляются без сигналов: счётчики считают оба яруса, а ленты
+    и поисковый индекс чистятся здесь же.
+    """
+    posts = list(Post.objects.filter(pub_date__lt=before)
+                 .order_by('pub_date', 'pk').values(*POST_FIELDS)[:size])
+    if not posts:
+        return posts
+    ids = [post['id'] for post in posts]
+    ArchivedPost.objects.bulk_create(ArchivedPost(**post) for post in posts)
+    comments = Comment.objects.filter(post_id__in=ids)
+    comment_ids = list(comments.values_list('pk', flat=True))
+    ArchivedComment.objects.bulk_create(
+        ArchivedComment(**comment)
+        for comment in comments.values(*COMMENT_FIELDS).iterator())
+    FeedEntry.objects.filter(post_id__in=ids)._raw_delete(FeedEntry.objects.db)
+    comments._raw_delete(Comment.objects.db)
+    Post.objects.filter(pk__in=ids)._raw_delete(Post.objects.db)
+    fulltext.unindex(ids, comment_ids)
+    return posts
+
+
+def archive(before, batch_size, pause=0, on_batch=None):
+    """Переносит в архив все посты старше before; возвращает их число."""
+    moved = 0
+    while True:
+        posts = retry_write(move_batch, before, batch_size)
+        if not posts:
+            return moved
+        moved += len(posts)
+        newest = max(post['pub_date'] for post in posts)
+        current = horizon()
+        if current is None or newest > current:
+            cache.set(HORIZON_KEY, newest, timeout=None)
+        caching.bump(*(caching.post_scope(post['id']) for post in posts))
+        if on_batch is not None:
+            on_batch(moved)
+        if len(posts) < batch_size:
+            return moved
+        time.sleep(pause)
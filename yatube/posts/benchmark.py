@@ -0,0 +1,270 @@
+"""Нагрузочный прогон страниц yatube через WSGI-приложение.
+
+Данные создаются в отдельной тестовой базе, запросы идут в
+yatube.wsgi.application из нескольких потоков, число SQL-запросов
+берётся из заголовка Server-Timing.
+"""
+import json
+import random
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from io import BytesIO, StringIO
+from wsgiref.util import setup_testing_defaults
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import Client
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.http import urlencode
+
+from .importer import insert_posts
+from .models import Comment, Follow, Group, Post, User
+
+WORDS = (
+    'утро', 'город', 'море', 'поезд', 'книга', 'чай', 'дорога', 'горы',
+    'снег', 'лес', 'кофе', 'музыка', 'река', 'письмо', 'ветер', 'осень',
+)
+QUERIES_RE = re.compile(r'\bdb;[^,]*desc="(\d+) queries"')
+PERCENTILES = (50, 95, 99)
+
+
+def dataset_size(scale):
+    return {
+        'users': 50 * scale,
+        'groups': 5 * scale,
+        'posts': 2000 * scale,
+        'comments': 4000 * scale,
+        'follows': 10,
+    }
+
+
+def _text(rng, words=12):
+    return ' '.join(rng.choice(WORDS) for _ in range(words)).capitalize()
+
+
+def seed(scale=1, seed_value=0):
+    """Наполняет базу и пересчитывает производные данные.
+
+    Возвращает объекты, на которые ссылаются адреса прогона.
+    """
+    rng = random.Random(seed_value)
+    size = dataset_size(scale)
+    password = make_password(None)
+    User.objects.bulk_create(
+        User(username=f'user{i}', password=password)
+        for i in range(size['users']))
+    Group.objects.bulk_create(
+        Group(title=f'Группа {i}', slug=f'group-{i}', description=_text(rng))
+        for i in range(size['groups']))
+    user_ids = list(User.objects.values_list('pk', flat=True))
+    group_ids = list(Group.objects.values_list('pk', flat=True)) + [None]
+    now = timezone.now()
+    insert_posts(
+        Post(author_id=rng.choice(user_ids),
+             group_id=rng.choice(group_ids),
+             text=_text(rng, rng.randint(5, 60)),
+             pub_date=now - timedelta(minutes=i))
+        for i in range(size['posts']))
+    post_ids = list(Post.objects.values_list('pk', flat=True))
+    # Комментарии сосредоточены на немногих постах, как в жизни.
+    hot = post_ids[:max(len(post_ids) // 50, 1)]
+    Comment.objects.bulk_create(
+        (Comment(post_id=rng.choice(hot), author_id=rng.choice(user_ids),
+                 text=_text(rng))
+         for _ in range(size['comments'])))
+    follows = set()
+    for user_id in user_ids:
+        for author_id in rng.sample(
+                user_ids, min(size['follows'] + 1, len(user_ids))):
+            if author_id != user_id:
+                follows.add((user_id, author_id))
+    Follow.objects.bulk_create(
+        (Follow(user_id=user_id, author_id=author_id)
+         for user_id, author_id in follows))
+    for command in ('rebuild_counters', 'rebuild_feeds',
+                    'rebuild_search_index'):
+        call_command(command, stdout=StringIO())
+    reader = User.objects.get(pk=user_ids[0])
+    post = Post.objects.filter(pk__in=hot).order_by('-pub_date').first()
+    return {
+        'reader': reader,
+        'author': post.author,
+        'group': Group.objects.first(),
+        'post': post,
+        'editable': Post.objects.filter(author=reader).first(),
+    }
+
+
+def urls(objects):
+    """Адреса GET-страниц из posts/urls.py: имя -> (путь, только для
+    вошедших). Подписки, комментарии и удаление меняют данные и в прогон
+    не входят."""
+    reader = objects['reader']
+    author = objects['author']
+    group = objects['group']
+    post = objects['post']
+    pages = {
+        'index': (reverse('posts:index'), False),
+        'index_page_5': (reverse('posts:index') + '?page=5', False),
+        'group_list': (reverse('posts:group_list', args=[group.slug]),
+                       False),
+        'profile': (reverse('posts:profile', args=[author.username]),
+                    False),
+        'post_detail': (reverse('posts:post_detail', args=[post.pk]),
+                        False),
+        'post_comments': (reverse('posts:post_comments', args=[post.pk]),
+                          False),
+        'search': (
+            reverse('posts:search') + '?' + urlencode({'q': 'море'}), False),
+        'feed_rss': (reverse('posts:feed_rss'), False),
+        'group_atom': (reverse('posts:group_atom', args=[group.slug]),
+                       False),
+        'profile_rss': (reverse('posts:profile_rss', args=[author.username]),
+                        False),
+        'follow_index': (reverse('posts:follow_index'), True),
+        'post_create': (reverse('posts:post_create'), True),
+        'profile_export': (
+            reverse('posts:profile_export', args=[reader.username]), True),
+    }
+    if objects['editable'] is not None:
+        pages['post_edit'] = (
+            reverse('posts:post_edit', args=[objects['editable'].pk]), True)
+    return pages
+
+
+def session_cookie(user):
+    client = Client()
+    client.force_login(user)
+    name = settings.SESSION_COOKIE_NAME
+    return f'{name}={client.cookies[name].value}'
+
+
+def wsgi_get(application, url, cookie=''):
+    """GET через WSGI: (статус, время в секундах, SQL-запросов или None)."""
+    path, _, query = url.partition('?')
+    environ = {
+        'REQUEST_METHOD': 'GET',
+        'PATH_INFO': path,
+        'QUERY_STRING': query,
+        'wsgi.input': BytesIO(),
+    }
+    if cookie:
+        environ['HTTP_COOKIE'] = cookie
+    setup_testing_defaults(environ)
+    response = {}
+
+    def start_response(status, headers, exc_info=None):
+        response['status'] = int(status.split()[0])
+        response['headers'] = dict(headers)
+
+    started = time.perf_counter()
+    body = application(environ, start_response)
+    try:
+        for _ in body:
+            pass
+    finally:
+        if hasattr(body, 'close'):
+            body.close()
+    elapsed = time.perf_counter() - started
+    match = QUERIES_RE.search(response['headers'].get('Server-Timing', ''))
+    queries = int(match.group(1)) if match else None
+    return response['status'], elapsed, queries
+
+
+def percentile(values, percent):
+    """Перцентиль по ближайшему рангу."""
+    ordered = sorted(values)
+    if not ordered:
+        return None
+    rank = max(int(-(-percent * len(ordered) // 100)), 1)
+    return ordered[rank - 1]
+
+
+def summarize(samples, wall_time):
+    timings = [elapsed for _, elapsed, _ in samples]
+    queries = [count for _, _, count in samples if count is not None]
+    summary = {
+        'requests': len(samples),
+        'errors': sum(1 for status, _, _ in samples if status >= 400),
+        'throughput': round(len(samples) / wall_time, 1) if wall_time else 0,
+        'queries': round(sum(queries) / len(samples), 2) if samples else 0,
+    }
+    for percent in PERCENTILES:
+        summary[f'p{percent}_ms'] = round(
+            percentile(timings, percent) * 1000, 2)
+    return summary
+
+
+def run_cold(application, url, cookie, requests):
+    """Каждый запрос — после очистки кэша, по одному."""
+    samples = []
+    started = time.perf_counter()
+    for _ in range(requests):
+        cache.clear()
+        samples.append(wsgi_get(application, url, cookie))
+    return summarize(samples, time.perf_counter() - started)
+
+
+def run_warm(application, url, cookie, requests, clients):
+    """Кэш прогрет одним запросом, затем clients потоков делят запросы."""
+    wsgi_get(application, url, cookie)
+    samples = []
+    lock = threading.Lock()
+
+    def client(count):
+        local = [wsgi_get(application, url, cookie) for _ in range(count)]
+        connection.close()
+        with lock:
+            samples.extend(local)
+
+    started = time.perf_counter()
+    if clients == 1:
+        samples.extend(wsgi_get(application, url, cookie)
+                       for _ in range(requests))
+    else:
+        shares = [requests // clients + (i < requests % clients)
+                  for i in range(clients)]
+        with ThreadPoolExecutor(max_workers=clients) as executor:
+            for future in [executor.submit(client, share)
+                           for share in shares if share]:
+                future.result()
+    return summarize(samples, time.perf_counter() - started)
+
+
+def compare(results, baseline, threshold):
+    """Строки сравнения с базовым прогоном и список регрессий.
+
+    Регрессия — p95 хуже базового больше чем на threshold процентов
+    или больше SQL-запросов на страницу.
+    """
+    rows, regressions = [], []
+    for key, current in results.items():
+        base = baseline.get(key)
+        if base is None:
+            continue
+        change = ((current['p95_ms'] - base['p95_ms'])
+                  / base['p95_ms'] * 100 if base['p95_ms'] else 0.0)
+        worse = (change > threshold
+                 or current['queries'] > base['queries'])
+        rows.append((key, base['p95_ms'], current['p95_ms'], change,
+                     base['queries'], current['queries'], worse))
+        if worse:
+            regressions.append(key)
+    return rows, regressions
+
+
+def load(path):
+    with open(path, encoding='utf-8') as stream:
+        return json.load(stream)
+
+
+def dump(path, report):
+    with open(path, 'w', encoding='utf-8') as stream:
+        json.dump(report, stream, ensure_ascii=False, indent=2)
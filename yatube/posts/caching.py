@@ -0,0 +1,126 @@
+import hashlib
+import time
+from functools import wraps
+
+from django.core.cache import cache
+from django.utils.cache import (get_conditional_response, patch_vary_headers,
+                                quote_etag)
+from django.utils.http import http_date
+from django.utils.translation import get_language
+
+from core import replicas
+
+POSTS = 'posts'
+GROUPS = 'groups'
+GENERATION_KEY = 'generation:{}'
+CHANGED_KEY = 'changed:{}'
+PAGE_KEY = 'page:{}:{}:{}'
+
+
+def group_scope(group_id):
+    return f'group:{group_id}'
+
+
+def author_scope(author_id):
+    return f'author:{author_id}'
+
+
+def post_scope(post_id):
+    return f'post:{post_id}'
+
+
+def _initial():
+    # Поколение, вытесненное из кэша, не должно начинаться заново с
+    # уже использованного значения, иначе вернутся старые фрагменты.
+    return int(time.time() * 1000000)
+
+
+def _ensure(found, key, initial):
+    if key not in found:
+        cache.add(key, initial(), timeout=None)
+        found[key] = cache.get(key) or initial()
+
+
+def get_version(*scopes):
+    """Строка поколений для ключа кэша страницы.
+
+    Кэшированные фрагменты живут без срока и перестают использоваться,
+    как только сигнал об изменении данных увеличит одно из поколений.
+    """
+    return page_state(*scopes)[0]
+
+
+def page_state(*scopes):
+    """Строка поколений и время последнего изменения данных страницы.
+
+    Если время изменения области не записано или вытеснено из кэша,
+    область считается изменённой сейчас: так клиент в худшем случае
+    лишний раз получит страницу целиком.
+
+    Если данные изменились позже синхронизации реплики, запрос дальше
+    читает основную базу, иначе под новым поколением в кэш легла бы
+    старая страница. Поэтому поколения запрашиваются до чтения данных.
+    """
+    keys = [GENERATION_KEY.format(scope) for scope in scopes]
+    changed_keys = [CHANGED_KEY.format(scope) for scope in scopes]
+    found = cache.get_many(keys + changed_keys)
+    for key in keys:
+        _ensure(found, key, _initial)
+    for key in changed_keys:
+        _ensure(found, key, lambda: int(time.time()))
+    version = '.'.join(str(found[key]) for key in keys)
+    changed = max(found[key] for key in changed_keys)
+    replicas.require_fresh(changed)
+    return version, changed
+
+
+def bump(*scopes):
+    for scope in scopes:
+        key = GENERATION_KEY.format(scope)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.add(key, _initial(), timeout=None)
+    now = int(time.time())
+    cache.set_many(
+        {CHANGED_KEY.format(scope): now for scope in scopes}, timeout=None
+    )
+
+
+def cache_anonymous_page(get_scopes):
+    """Кэширует страницу целиком для гостей и отвечает 304 на повторные
+    запросы с совпадающими ETag или Last-Modified.
+
+    get_scopes получает аргументы представления и возвращает области
+    данных страницы или None, если кэшировать нечего.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if (request.method not in ('GET', 'HEAD')
+                    or request.user.is_authenticated):
+                return view(request, *args, **kwargs)
+            scopes = get_scopes(*args, **kwargs)
+            if scopes is None:
+                return view(request, *args, **kwargs)
+            version, changed = page_state(*scopes)
+            language = get_language()
+            etag = quote_etag(f'{language}-{version}')
+            response = get_conditional_response(
+                request, etag=etag, last_modified=changed)
+            if response is None:
+                path = hashlib.md5(
+                    request.get_full_path().encode()).hexdigest()
+                key = PAGE_KEY.format(language, path, version)
+                response = cache.get(key)
+                if response is None:
+                    response = view(request, *args, **kwargs)
+                    if response.status_code != 200:
+                        return response
+                    cache.set(key, response, timeout=None)
+            response['ETag'] = etag
+            response['Last-Modified'] = http_date(changed)
+            patch_vary_headers(response, ('Cookie', 'Accept-Language'))
+            return response
+        return wrapper
+    return decorator
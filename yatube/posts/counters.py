@@ -0,0 +1,88 @@
+from django.db import transaction
+from django.db.models import Count, F
+
+from .models import ArchivedPost, Follow, Post, PostCounter
+
+ALL = 'all'
+AUTHOR = 'author'
+GROUP = 'group'
+FOLLOWERS = 'followers'
+
+SCOPE_QUERYSETS = {
+    ALL: lambda key: Post.objects.all(),
+    AUTHOR: lambda key: Post.objects.filter(author_id=key),
+    GROUP: lambda key: Post.objects.filter(group_id=key),
+    FOLLOWERS: lambda key: Follow.objects.filter(author_id=key),
+}
+# Счётчики постов учитывают и архив: ленты листают оба яруса.
+ARCHIVE_QUERYSETS = {
+    ALL: lambda key: ArchivedPost.objects.all(),
+    AUTHOR: lambda key: ArchivedPost.objects.filter(author_id=key),
+    GROUP: lambda key: ArchivedPost.objects.filter(group_id=key),
+}
+
+
+def count_rows(scope, key=0):
+    total = SCOPE_QUERYSETS[scope](key).count()
+    if scope in ARCHIVE_QUERYSETS:
+        total += ARCHIVE_QUERYSETS[scope](key).count()
+    return total
+
+
+def get_count(scope, key=0):
+    """Значение счётчика из таблицы счётчиков.
+
+    Если счётчика ещё нет, он один раз считается по исходной таблице
+    и сохраняется.
+    """
+    value = PostCounter.objects.filter(
+        scope=scope, key=key
+    ).values_list('value', flat=True).first()
+    if value is None:
+        counter, _ = PostCounter.objects.get_or_create(
+            scope=scope, key=key,
+            defaults={'value': count_rows(scope, key)}
+        )
+        value = counter.value
+    return value
+
+
+def change_count(scope, key, delta):
+    # Отсутствующий счётчик не создаём: при первом чтении он будет
+    # посчитан уже с учётом изменения.
+    PostCounter.objects.filter(scope=scope, key=key).update(
+        value=F('value') + delta
+    )
+
+
+def post_scopes(author_id, group_id):
+    scopes = [(ALL, 0), (AUTHOR, author_id)]
+    if group_id is not None:
+        scopes.append((GROUP, group_id))
+    return scopes
+
+
+def rebuild_counts():
+    totals = {(ALL, 0): count_rows(ALL)}
+    grouped = (
+        (AUTHOR, Post, 'author'),
+        (GROUP, Post, 'group'),
+        (AUTHOR, ArchivedPost, 'author'),
+        (GROUP, ArchivedPost, 'group'),
+        (FOLLOWERS, Follow, 'author'),
+    )
+    for scope, model, field in grouped:
+        counts = (
+            model.objects.filter(**{f'{field}__isnull': False})
+            .order_by()
+            .values_list(field)
+            .annotate(total=Count('pk'))
+        )
+        for key, total in counts:
+            totals[scope, key] = totals.get((scope, key), 0) + total
+    rows = [PostCounter(scope=scope, key=key, value=value)
+            for (scope, key), value in totals.items()]
+    with transaction.atomic():
+        PostCounter.objects.all().delete()
+        PostCounter.objects.bulk_create(rows)
+    return len(rows)
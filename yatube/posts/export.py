@@ -0,0 +1,186 @@
+import csv
+import json
+import zipfile
+
+from .models import ArchivedPost, Post
+
+FORMATS = ('jsonl', 'csv')
+CHUNK_SIZE = 500
+FILE_CHUNK = 64 * 1024
+CSV_FIELDS = (
+    'type', 'id', 'post_id', 'author', 'group', 'slug', 'title',
+    'pub_date', 'text', 'image',
+)
+CONTENT_TYPES = {
+    'jsonl': 'application/x-ndjson; charset=utf-8',
+    'csv': 'text/csv; charset=utf-8',
+    'zip': 'application/zip',
+}
+
+
+def sources(**filters):
+    """Посты для выгрузки из обоих ярусов: сначала архив, затем свежие."""
+    return [ArchivedPost.objects.filter(**filters),
+            Post.objects.filter(**filters)]
+
+
+def post_chunks(querysets, chunk_size=CHUNK_SIZE):
+    """Посты querysets порциями по chunk_size вместе с их комментариями.
+
+    Посты читаются через iterator(), комментарии — одним запросом на
+    порцию, поэтому в памяти не больше одной порции.
+    """
+    for queryset in querysets:
+        posts = queryset.select_related('author', 'group').order_by('pk')
+        chunk = []
+        for post in posts.iterator(chunk_size=chunk_size):
+            chunk.append(post)
+            if len(chunk) >= chunk_size:
+                yield _with_comments(chunk)
+                chunk = []
+        if chunk:
+            yield _with_comments(chunk)
+
+
+def _with_comments(posts):
+    comments = {post.pk: [] for post in posts}
+    # Comment у свежих постов, ArchivedComment у архивных.
+    model = type(posts[0])._meta.get_field('comments').related_model
+    rows = (model.objects.filter(post_id__in=list(comments))
+            .select_related('author').order_by('created', 'pk'))
+    for comment in rows:
+        comments[comment.post_id].append(comment)
+    return [(post, comments[post.pk]) for post in posts]
+
+
+def records(querysets, chunk_size=CHUNK_SIZE):
+    """Записи выгрузки в формате import_content: группа перед первым
+    своим постом, затем посты с комментариями."""
+    seen_groups = set()
+    for chunk in post_chunks(querysets, chunk_size):
+        for post, comments in chunk:
+            if post.group_id and post.group_id not in seen_groups:
+                seen_groups.add(post.group_id)
+                yield {
+                    'type': 'group',
+                    'slug': post.group.slug,
+                    'title': post.group.title,
+                    'description': post.group.description,
+                }
+            yield {
+                'type': 'post',
+                'id': post.pk,
+                'author': post.author.username,
+                'group': post.group.slug if post.group_id else '',
+                'pub_date': post.pub_date.isoformat(),
+                'text': post.text,
+                'image': post.image.name,
+                'comments': [{
+                    'id': comment.pk,
+                    'author': comment.author.username,
+                    'created': comment.created.isoformat(),
+                    'text': comment.text,
+                } for comment in comments],
+            }
+
+
+def jsonl_lines(rows):
+    for row in rows:
+        yield json.dumps(row, ensure_ascii=False) + '\n'
+
+
+class _Echo:
+    """Буфер csv.writer, который сразу отдаёт записанную строку."""
+
+    def write(self, value):
+        return value
+
+
+def csv_lines(rows):
+    writer = csv.DictWriter(_Echo(), CSV_FIELDS, extrasaction='ignore')
+    yield writer.writerow(dict(zip(CSV_FIELDS, CSV_FIELDS)))
+    for row in rows:
+        comments = row.pop('comments', ())
+        yield writer.writerow(row)
+        for comment in comments:
+            yield writer.writerow({
+                'type': 'comment',
+                'id': comment['id'],
+                'post_id': row['id'],
+                'author': comment['author'],
+                'pub_date': comment['created'],
+                'text': comment['text'],
+            })
+
+
+def lines(querysets, format_, chunk_size=CHUNK_SIZE):
+    rows = records(querysets, chunk_size)
+    return csv_lines(rows) if format_ == 'csv' else jsonl_lines(rows)
+
+
+class _ZipBuffer:
+    """Поток без seek для ZipFile: копит байты до следующей выдачи."""
+
+    def __init__(self):
+        self.parts = []
+        self.pending = 0
+        self.position = 0
+
+    def write(self, data):
+        self.parts.append(bytes(data))
+        self.pending += len(data)
+        self.position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.position
+
+    def flush(self):
+        pass
+
+    def take(self):
+        data = b''.join(self.parts)
+        self.parts = []
+        self.pending = 0
+        return data
+
+
+def zip_stream(querysets, format_, chunk_size=CHUNK_SIZE):
+    """Zip-архив из выгрузки и файлов картинок, отдаваемый по частям."""
+    buffer = _ZipBuffer()
+    with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED) as archive:
+        with archive.open(f'posts.{format_}', 'w',
+                          force_zip64=True) as entry:
+            for line in lines(querysets, format_, chunk_size):
+                entry.write(line.encode())
+                if buffer.pending >= FILE_CHUNK:
+                    yield buffer.take()
+        written = set()
+        for storage, name in _images(querysets, chunk_size):
+            # Одинаковые картинки разных постов — один файл в хранилище.
+            if name in written or not storage.exists(name):
+                continue
+            written.add(name)
+            info = zipfile.ZipInfo(f'media/{name}')
+            # Картинки уже сжаты, повторное сжатие только тратит время.
+            info.compress_type = zipfile.ZIP_STORED
+            with storage.open(name) as source, \
+                    archive.open(info, 'w', force_zip64=True) as entry:
+                for data in iter(lambda: source.read(FILE_CHUNK), b''):
+                    entry.write(data)
+                    yield buffer.take()
+    yield buffer.take()
+
+
+def _images(querysets, chunk_size):
+    """Пары (хранилище, имя) картинок постов."""
+    for queryset in querysets:
+        storage = queryset.model._meta.get_field('image').storage
+        images = (queryset.exclude(image='').order_by('pk')
+                  .values_list('image', flat=True))
+        for name in images.iterator(chunk_size=chunk_size):
+            yield storage, name
+
+
+def filename(name, format_, images=False):
+    return f'{name}.{"zip" if images else format_}'
@@ -0,0 +1,165 @@
+from django.conf import settings
+from django.core.paginator import Page
+from django.db import transaction
+from django.db.models import Count
+from django.utils.functional import cached_property
+
+from . import counters
+from .models import FeedEntry, Follow, Post, PulledAuthor
+from .paginators import KeysetPaginator, keyset_slice
+
+BATCH_SIZE = 500
+
+
+def is_pulled(author_id):
+    """Посты авторов с большим числом подписчиков не раскладываются
+    по лентам, а читаются при показе ленты.
+
+    Автор переходит на чтение на лету, когда подписчиков становится
+    больше FEED_PULL_LIMIT, а возвращается к раскладке, только когда их
+    не больше FEED_PUSH_LIMIT и rebuild_feeds --returning разложил его
+    посты. Поэтому автор у границы не раскладывается заново на каждой
+    подписке и отписке.
+    """
+    return PulledAuthor.objects.filter(author_id=author_id).exists()
+
+
+def pulled_authors(user):
+    return list(PulledAuthor.objects.filter(
+        author_id__in=Follow.objects.filter(user=user).values('author_id'),
+    ).values_list('author_id', flat=True))
+
+
+def fan_out(post):
+    if is_pulled(post.author_id):
+        return
+    followers = Follow.objects.filter(
+        author_id=post.author_id
+    ).values_list('user_id', flat=True)
+    FeedEntry.objects.bulk_create(
+        (FeedEntry(user_id=user_id, post=post, author_id=post.author_id,
+                   pub_date=post.pub_date)
+         for user_id in followers.iterator()),
+        batch_size=BATCH_SIZE,
+        ignore_conflicts=True,
+    )
+
+
+def backfill(user_id, author_id):
+    posts = Post.objects.filter(
+        author_id=author_id
+    ).order_by('-pub_date').values_list('pk', 'pub_date')
+    FeedEntry.objects.bulk_create(
+        (FeedEntry(user_id=user_id, post_id=pk, author_id=author_id,
+                   pub_date=pub_date)
+         for pk, pub_date in posts[:settings.FEED_BACKFILL_LIMIT]),
+        batch_size=BATCH_SIZE,
+        ignore_conflicts=True,
+    )
+
+
+def trim(user_id, author_id):
+    FeedEntry.objects.filter(user_id=user_id, author_id=author_id).delete()
+
+
+def mark_pulled():
+    """Пересчитывает отметки по числу подписчиков: отмеченный автор
+    остаётся на чтении на лету, пока подписчиков больше FEED_PUSH_LIMIT,
+    новый отмечается, когда их больше FEED_PULL_LIMIT."""
+    pulled = set(PulledAuthor.objects.values_list('author_id', flat=True))
+    followers = Follow.objects.values('author_id').annotate(
+        total=Count('id')).values_list('author_id', 'total')
+    rows = [
+        PulledAuthor(author_id=author_id)
+        for author_id, total in followers
+        if total > settings.FEED_PULL_LIMIT
+        or author_id in pulled and total > settings.FEED_PUSH_LIMIT
+    ]
+    with transaction.atomic():
+        PulledAuthor.objects.all().delete()
+        PulledAuthor.objects.bulk_create(rows, batch_size=BATCH_SIZE)
+
+
+def follow_changed(follow, created):
+    if not created:
+        trim(follow.user_id, follow.author_id)
+        return
+    if is_pulled(follow.author_id):
+        return
+    followers = counters.get_count(counters.FOLLOWERS, follow.author_id)
+    if followers > settings.FEED_PULL_LIMIT:
+        # Старые записи автора в лентах остаются, но не читаются.
+        PulledAuthor.objects.get_or_create(author_id=follow.author_id)
+    else:
+        backfill(follow.user_id, follow.author_id)
+
+
+def returning_authors():
+    """Авторы, читаемые на лету, у которых подписчиков стало не больше
+    FEED_PUSH_LIMIT."""
+    pulled = PulledAuthor.objects.values_list('author_id', flat=True)
+    return [author_id for author_id in pulled
+            if counters.get_count(counters.FOLLOWERS, author_id)
+            <= settings.FEED_PUSH_LIMIT]
+
+
+def push_back(author_id):
+    """Возвращает автора к раскладке по лентам подписчиков.
+
+    Отметка снимается до раскладки, чтобы новые посты уже расходились
+    по лентам; старые появляются в лентах по мере раскладки.
+    """
+    PulledAuthor.objects.filter(author_id=author_id).delete()
+    followers = Follow.objects.filter(
+        author_id=author_id).values_list('user_id', flat=True)
+    for user_id in followers.iterator():
+        backfill(user_id, author_id)
+
+
+class FeedPaginator(KeysetPaginator):
+    """Лента подписок: материализованные записи пользователя плюс посты
+    авторов, читаемых на лету, слитые по ключу (pub_date, id)."""
+    id_field = 'post_id'
+
+    def __init__(self, user, per_page, **kwargs):
+        pulled = pulled_authors(user)
+        entries = FeedEntry.objects.filter(user=user).select_related(
+            'post__author', 'post__group')
+        self.pulled = None
+        self.pulled_authors = pulled
+        if pulled:
+            entries = entries.exclude(author_id__in=pulled)
+            # По запросу на автора: каждый идёт по индексу автора, а
+            # общий author_id IN (...) сортировал бы все их посты.
+            self.pulled = [Post.objects.for_feed().filter(author_id=pk)
+                           for pk in pulled]
+        super().__init__(entries, per_page, **kwargs)
+
+    def posts(self, rows):
+        return [entry.post for entry in rows]
+
+    def keyset_posts(self, key, newer, limit):
+        posts = super().keyset_posts(key, newer, limit)
+        if self.pulled is None:
+            return posts
+        for author_posts in self.pulled:
+            posts.extend(keyset_slice(author_posts, key, newer, limit))
+        posts.sort(key=lambda post: (post.pub_date, post.pk),
+                   reverse=not newer)
+        return posts[:limit]
+
+    def page(self, number):
+        if self.pulled is None:
+            return super().page(number)
+        number = self.validate_number(number)
+        bottom = (number - 1) * self.per_page
+        posts = self.keyset_posts(None, False, bottom + self.per_page)
+        return Page(posts[bottom:], number, self)
+
+    @cached_property
+    def count(self):
+        total = super().count
+        if self.pulled is not None:
+            total += sum(counters.get_count(counters.AUTHOR, author_id)
+                         for author_id in self.pulled_authors)
+        return total
@@ -1,5 +1,7 @@
 from django import forms
+from django.core.files.uploadedfile import SimpleUploadedFile, UploadedFile
 
+from . import images
 from .models import Post, Comment
 
 
@@ -11,6 +13,16 @@ class PostForm(forms.ModelForm):
             'group': 'Можете выбрать группу',
             'text': 'Здесь напишите свой текст', }
 
+    def clean_image(self):
+        """Новый файл сохраняется уже нормализованным."""
+        image = self.cleaned_data.get('image')
+        if not isinstance(image, UploadedFile):
+            return image
+        data = images.normalize(image)
+        if data is None:
+            return image
+        return SimpleUploadedFile(image.name, data, image.content_type)
+
 
 class CommentForm(forms.ModelForm):
     class Meta:
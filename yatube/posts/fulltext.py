@@ -0,0 +1,364 @@
+import re
+
+from django.db import connection
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+
+from .models import Comment, Post
+
+POST_TABLE = 'posts_post_fts'
+COMMENT_TABLE = 'posts_comment_fts'
+# Вес совпадения в тексте, названии группы и имени автора для bm25.
+POST_WEIGHTS = (1.0, 0.5, 0.5)
+# Не больше параметров в одном IN, чем разрешают старые сборки SQLite.
+UNINDEX_CHUNK = 500
+WORD = re.compile(r'\w+')
+CYRILLIC = re.compile('[а-я]')
+VOWELS = 'аеиоуыэюя'
+
+
+def _longest_first(*endings):
+    return tuple(sorted(endings, key=len, reverse=True))
+
+
+# Окончания стеммера Snowball для русского языка. Окончания первой группы
+# снимаются только после «а» или «я».
+PERFECTIVE_GERUND = (
+    _longest_first('в', 'вши', 'вшись'),
+    _longest_first('ив', 'ивши', 'ившись', 'ыв', 'ывши', 'ывшись'),
+)
+ADJECTIVE = ((), _longest_first(
+    'ее', 'ие', 'ые', 'ое', 'ими', 'ыми', 'ей', 'ий', 'ый', 'ой', 'ем',
+    'им', 'ым', 'ом', 'его', 'ого', 'ему', 'ому', 'их', 'ых', 'ую', 'юю',
+    'ая', 'яя', 'ою', 'ею',
+))
+PARTICIPLE = (
+    _longest_first('ем', 'нн', 'вш', 'ющ', 'щ'),
+    _longest_first('ивш', 'ывш', 'ующ'),
+)
+REFLEXIVE = ((), ('ся', 'сь'))
+VERB = (
+    _longest_first(
+        'ла', 'на', 'ете', 'йте', 'ли', 'й', 'л', 'ем', 'н', 'ло', 'но',
+        'ет', 'ют', 'ны', 'ть', 'ешь', 'нно',
+    ),
+    _longest_first(
+        'ила', 'ыла', 'ена', 'ейте', 'уйте', 'ите', 'или', 'ыли', 'ей',
+        'уй', 'ил', 'ыл', 'им', 'ым', 'ен', 'ило', 'ыло', 'ено', 'ят',
+        'ует', 'уют', 'ит', 'ыт', 'ены', 'ить', 'ыть', 'ишь', 'ую', 'ю',
+    ),
+)
+NOUN = ((), _longest_first(
+    'а', 'ев', 'ов', 'ие', 'ье', 'е', 'иями', 'ями', 'ами', 'еи', 'ии',
+    'и', 'ией', 'ей', 'ой', 'ий', 'й', 'иям', 'ям', 'ием', 'ем', 'ам',
+    'ом', 'о', 'у', 'ах', 'иях', 'ях', 'ы', 'ь', 'ию', 'ью', 'ю', 'ия',
+    'ья', 'я',
+))
+SUPERLATIVE = _longest_first('ейш', 'ейше')
+DERIVATIONAL = _longest_first('ост', 'ость')
+
+
+def _strip(rv, groups):
+    """Снимает самое длинное подходящее окончание или возвращает None."""
+    after_a, plain = groups
+    for ending in after_a:
+        if rv.endswith(ending) and rv[:-len(ending)][-1:] in ('а', 'я'):
+            return rv[:-len(ending)]
+    for ending in plain:
+        if rv.endswith(ending):
+            return rv[:-len(ending)]
+    return None
+
+
+def _region(word, start=0):
+    for i in range(start + 1, len(word)):
+        if word[i] not in VOWELS and word[i - 1] in VOWELS:
+            return i + 1
+    return len(word)
+
+
+def _strip_inflection(rv):
+    """Шаг 1: деепричастие, иначе возвратная частица и прилагательное
+    (с причастием), глагол или существительное."""
+    stripped = _strip(rv, PERFECTIVE_GERUND)
+    if stripped is not None:
+        return stripped
+    reflexive = _strip(rv, REFLEXIVE)
+    if reflexive is not None:
+        rv = reflexive
+    stripped = _strip(rv, ADJECTIVE)
+    if stripped is not None:
+        participle = _strip(stripped, PARTICIPLE)
+        return stripped if participle is None else participle
+    for groups in (VERB, NOUN):
+        stripped = _strip(rv, groups)
+        if stripped is not None:
+            return stripped
+    return rv
+
+
+def _strip_derivational(word):
+    """Шаг 3: словообразовательное окончание в области R2."""
+    r2 = _region(word, _region(word))
+    for ending in DERIVATIONAL:
+        if word.endswith(ending) and len(word) - len(ending) >= r2:
+            return word[:-len(ending)]
+    return word
+
+
+def _strip_tail(word, rv_start):
+    """Шаг 4: «нн» в «н», превосходная степень или мягкий знак."""
+    if word.endswith('нн'):
+        return word[:-1]
+    for ending in SUPERLATIVE:
+        if word.endswith(ending) and len(word) - len(ending) >= rv_start:
+            word = word[:-len(ending)]
+            return word[:-1] if word.endswith('нн') else word
+    if word.endswith('ь'):
+        return word[:-1]
+    return word
+
+
+def stem(word):
+    """Основа слова по алгоритму Snowball; не русские слова не меняются."""
+    word = word.lower().replace('ё', 'е')
+    if not CYRILLIC.search(word):
+        return word
+    for i, letter in enumerate(word):
+        if letter in VOWELS:
+            break
+    else:
+        return word
+    rv_start = i + 1
+    rv = _strip_inflection(word[rv_start:])
+    if rv.endswith('и'):
+        rv = rv[:-1]
+    word = _strip_derivational(word[:rv_start] + rv)
+    return _strip_tail(word, rv_start)
+
+
+def normalize(text):
+    return ' '.join(stem(word) for word in WORD.findall(text or ''))
+
+
+def match_expression(query):
+    """Запрос FTS5 из строки поиска: все основы, последняя — префиксом."""
+    terms = [f'"{stem(word)}"' for word in WORD.findall(query)]
+    if not terms:
+        return None
+    terms[-1] += '*'
+    return ' '.join(terms)
+
+
+def is_supported():
+    return connection.vendor == 'sqlite'
+
+
+def author_name(user):
+    return f'{user.username} {user.get_full_name()}'
+
+
+def _execute(sql, params=()):
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+
+
+def create_tables():
+    # Индекс хранит основы слов, поэтому запрос «котами» находит «кот».
+    _execute(
+        f'CREATE VIRTUAL TABLE IF NOT EXISTS {POST_TABLE} USING fts5('
+        "text, group_title, author, tokenize='unicode61', prefix='2 3')"
+    )
+    _execute(
+        f'CREATE VIRTUAL TABLE IF NOT EXISTS {COMMENT_TABLE} USING fts5('
+        "text, author, tokenize='unicode61', prefix='2 3')"
+    )
+
+
+def drop_tables():
+    _execute(f'DROP TABLE IF EXISTS {POST_TABLE}')
+    _execute(f'DROP TABLE IF EXISTS {COMMENT_TABLE}')
+
+
+def _post_row(post_id, text, group_title, username, first_name, last_name):
+    author = f'{username} {first_name} {last_name}'
+    return (post_id, normalize(text), normalize(group_title),
+            normalize(author))
+
+
+def _comment_row(comment_id, text, username, first_name, last_name):
+    return (comment_id, normalize(text),
+            normalize(f'{username} {first_name} {last_name}'))
+
+
+def _insert_posts(rows):
+    with connection.cursor() as cursor:
+        cursor.executemany(
+            f'INSERT INTO {POST_TABLE} (rowid, text, group_title, author) '
+            'VALUES (%s, %s, %s, %s)', rows)
+
+
+def _insert_comments(rows):
+    with connection.cursor() as cursor:
+        cursor.executemany(
+            f'INSERT INTO {COMMENT_TABLE} (rowid, text, author) '
+            'VALUES (%s, %s, %s)', rows)
+
+
+def rebuild(post_model=Post, comment_model=Comment):
+    """Заново заполняет индекс по всем постам и комментариям."""
+    if not is_supported():
+        return
+    _execute(f'DELETE FROM {POST_TABLE}')
+    _execute(f'DELETE FROM {COMMENT_TABLE}')
+    posts = post_model.objects.values_list(
+        'pk', 'text', 'group__title', 'author__username',
+        'author__first_name', 'author__last_name',
+    )
+    _insert_posts([_post_row(*row) for row in posts.iterator()])
+    comments = comment_model.objects.values_list(
+        'pk', 'text', 'author__username',
+        'author__first_name', 'author__last_name',
+    )
+    _insert_comments([_comment_row(*row) for row in comments.iterator()])
+
+
+def index_post(post):
+    if not is_supported():
+        return
+    unindex_post(post.pk)
+    group_title = post.group.title if post.group_id else ''
+    _insert_posts([(
+        post.pk, normalize(post.text), normalize(group_title),
+        normalize(author_name(post.author)),
+    )])
+
+
+def unindex_post(post_id):
+    if is_supported():
+        _execute(f'DELETE FROM {POST_TABLE} WHERE rowid = %s', [post_id])
+
+
+def index_comment(comment):
+    if not is_supported():
+        return
+    unindex_comment(comment.pk)
+    _insert_comments([(
+        comment.pk, normalize(comment.text),
+        normalize(author_name(comment.author)),
+    )])
+
+
+def unindex_comment(comment_id):
+    if is_supported():
+        _execute(f'DELETE FROM {COMMENT_TABLE} WHERE rowid = %s', [comment_id])
+
+
+def unindex(post_ids, comment_ids=()):
+    """Убирает из индекса посты и комментарии пачками по UNINDEX_CHUNK."""
+    if not is_supported():
+        return
+    for table, ids in ((POST_TABLE, post_ids), (COMMENT_TABLE, comment_ids)):
+        ids = list(ids)
+        for start in range(0, len(ids), UNINDEX_CHUNK):
+            chunk = ids[start:start + UNINDEX_CHUNK]
+            _execute(f'DELETE FROM {table} WHERE rowid IN '
+                     f'({", ".join(["%s"] * len(chunk))})', chunk)
+
+
+def rename_group(group_id, title):
+    if is_supported():
+        _execute(
+            f'UPDATE {POST_TABLE} SET group_title = %s WHERE rowid IN '
+            '(SELECT id FROM posts_post WHERE group_id = %s)',
+            [normalize(title), group_id],
+        )
+
+
+def rename_author(user):
+    if not is_supported():
+        return
+    name = normalize(author_name(user))
+    _execute(
+        f'UPDATE {POST_TABLE} SET author = %s WHERE rowid IN '
+        '(SELECT id FROM posts_post WHERE author_id = %s)',
+        [name, user.pk],
+    )
+    _execute(
+        f'UPDATE {COMMENT_TABLE} SET author = %s WHERE rowid IN '
+        '(SELECT id FROM posts_comment WHERE author_id = %s)',
+        [name, user.pk],
+    )
+
+
+def _match_ids(table, match):
+    return RawSQL(
+        f'SELECT rowid FROM {table} WHERE {table} MATCH %s', [match])
+
+
+def filter_posts(queryset, query):
+    """Посты из queryset, подходящие под строку поиска."""
+    if not is_supported():
+        return queryset.filter(
+            Q(text__icontains=query) | Q(group__title__icontains=query)
+            | Q(author__username__icontains=query))
+    match = match_expression(query)
+    if match is None:
+        return queryset.none()
+    return queryset.filter(pk__in=_match_ids(POST_TABLE, match))
+
+
+def filter_comments(queryset, query):
+    """Комментарии из queryset, подходящие под строку поиска."""
+    if not is_supported():
+        return queryset.filter(
+            Q(text__icontains=query) | Q(author__username__icontains=query))
+    match = match_expression(query)
+    if match is None:
+        return queryset.none()
+    return queryset.filter(pk__in=_match_ids(COMMENT_TABLE, match))
+
+
+class RankedPosts:
+    """Посты по релевантности bm25 для Paginator.
+
+    Число совпадений и каждая страница считаются отдельными запросами
+    к индексу, посты страницы догружаются одним запросом.
+    """
+
+    def __init__(self, match):
+        self.match = match
+
+    def count(self):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT COUNT(*) FROM {POST_TABLE} '
+                f'WHERE {POST_TABLE} MATCH %s', [self.match])
+            return cursor.fetchone()[0]
+
+    def __getitem__(self, index):
+        if not isinstance(index, slice):
+            return self[index:index + 1][0]
+        offset = index.start or 0
+        limit = -1 if index.stop is None else index.stop - offset
+        weights = ', '.join(str(weight) for weight in POST_WEIGHTS)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT rowid FROM {POST_TABLE} '
+                f'WHERE {POST_TABLE} MATCH %s '
+                f'ORDER BY bm25({POST_TABLE}, {weights}), rowid DESC '
+                'LIMIT %s OFFSET %s', [self.match, limit, offset])
+            ids = [row[0] for row in cursor.fetchall()]
+        posts = Post.objects.for_feed().in_bulk(ids)
+        return [posts[pk] for pk in ids if pk in posts]
+
+
+def search_posts(query):
+    """Выдача поиска: по индексу, а без SQLite — обычным фильтром."""
+    if not is_supported():
+        return filter_posts(
+            Post.objects.for_feed(), query).order_by('-pub_date')
+    match = match_expression(query)
+    if match is None:
+        return Post.objects.none()
+    return RankedPosts(match)
@@ -0,0 +1,53 @@
+"""Нормализация загружаемых изображений.
+
+Оригинал поворачивается по тегу Orientation, уменьшается до
+IMAGE_MAX_SIZE по длинной стороне, теряет EXIF, XMP и комментарии
+(цветовой профиль остаётся) и пережимается в том же формате.
+Анимация не трогается.
+"""
+from io import BytesIO
+
+from django.conf import settings
+from PIL import Image, ImageOps
+
+ORIENTATION = 0x0112
+METADATA = ('exif', 'xmp', 'XML:com.adobe.xmp', 'comment', 'photoshop')
+
+
+def encoders():
+    quality = settings.IMAGE_QUALITY
+    return {
+        'JPEG': {'quality': quality, 'optimize': True, 'progressive': True},
+        'WEBP': {'quality': quality, 'method': 6},
+        'PNG': {'optimize': True},
+        'GIF': {'optimize': True},
+    }
+
+
+def normalize(file):
+    """Байты нормализованного изображения или None, если файл лучше
+    оставить как есть: формат не поддерживается, анимация или править
+    нечего, а пережатие не уменьшает размер."""
+    file.seek(0)
+    original = file.read()
+    with Image.open(BytesIO(original)) as image:
+        options = encoders().get(image.format)
+        if options is None or getattr(image, 'is_animated', False):
+            return None
+        format_ = image.format
+        icc_profile = image.info.get('icc_profile')
+        rotated = image.getexif().get(ORIENTATION, 1) != 1
+        metadata = any(key in image.info for key in METADATA)
+        image = ImageOps.exif_transpose(image)
+        limit = settings.IMAGE_MAX_SIZE
+        resized = max(image.size) > limit
+        if resized:
+            image.thumbnail((limit, limit), Image.LANCZOS)
+        if icc_profile:
+            options = dict(options, icc_profile=icc_profile)
+        output = BytesIO()
+        image.save(output, format_, **options)
+    data = output.getvalue()
+    if not (rotated or metadata or resized) and len(data) >= len(original):
+        return None
+    return data
@@ -0,0 +1,38 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from posts import archive
+from posts.importer import LOOKUP_CHUNK
+
+
+class Command(BaseCommand):
+    help = ('Переносит старые посты с комментариями в архив пачками, '
+            'не останавливая сайт.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days', type=int,
+            help='Возраст поста в днях; по умолчанию ARCHIVE_AFTER_DAYS.')
+        parser.add_argument(
+            '--batch-size', type=int, default=200,
+            help=f'Постов в одной транзакции, не больше {LOOKUP_CHUNK}.')
+        parser.add_argument(
+            '--pause', type=float, default=0.1,
+            help='Пауза между пачками в секундах, чтобы не мешать записи.')
+
+    def handle(self, *args, **options):
+        if not 0 < options['batch_size'] <= LOOKUP_CHUNK:
+            raise CommandError(
+                f'Размер пачки должен быть от 1 до {LOOKUP_CHUNK}.')
+        if options['days'] is not None and options['days'] < 0:
+            raise CommandError('Возраст не может быть отрицательным.')
+        before = archive.cutoff(options['days'])
+        started = time.perf_counter()
+        moved = archive.archive(
+            before, options['batch_size'], options['pause'],
+            on_batch=lambda moved: self.stdout.write(
+                f'Перенесено постов: {moved}'))
+        self.stdout.write(self.style.SUCCESS(
+            f'Готово: {moved} постов старше {before:%Y-%m-%d} за '
+            f'{time.perf_counter() - started:.1f} с.'))
@@ -0,0 +1,148 @@
+import logging
+import os
+import platform
+import tempfile
+import time
+
+import django
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import override_settings
+
+from posts import benchmark
+
+USERS = ('anonymous', 'user')
+PHASES = ('cold', 'warm')
+
+
+class Command(BaseCommand):
+    help = ('Нагрузочный прогон страниц на отдельной базе с '
+            'сгенерированными данными; результаты сохраняются в JSON.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--scale', type=int, default=1,
+            help='Множитель объёма данных: 1 — 2000 постов.')
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--clients', type=int, default=8)
+        parser.add_argument(
+            '--requests', type=int, default=200,
+            help='Запросов на страницу с прогретым кэшем.')
+        parser.add_argument(
+            '--cold-requests', type=int, default=20,
+            help='Запросов на страницу с пустым кэшем.')
+        parser.add_argument(
+            '--views', nargs='*',
+            help='Только эти страницы, например index post_detail.')
+        parser.add_argument('--output', default='benchmark.json')
+        parser.add_argument(
+            '--baseline', help='Прошлый результат для сравнения.')
+        parser.add_argument(
+            '--threshold', type=float, default=20,
+            help='Допустимый рост p95 в процентах.')
+
+    def handle(self, *args, **options):
+        baseline = None
+        if options['baseline']:
+            baseline = benchmark.load(options['baseline'])['results']
+        # yatube.wsgi заново настраивает логирование, поэтому замеры
+        # глушатся уже после его импорта.
+        from yatube.wsgi import application
+        timing_logger = logging.getLogger('core.timing')
+        level = timing_logger.level
+        timing_logger.setLevel(logging.WARNING)
+        with tempfile.TemporaryDirectory() as directory:
+            cache_settings = {'default': {
+                'BACKEND': 'core.cache_backends.SQLiteCache',
+                'LOCATION': os.path.join(directory, 'cache.sqlite3'),
+                'OPTIONS': {'MAX_ENTRIES': 100000},
+            }}
+            old_name = connection.settings_dict['NAME']
+            connection.settings_dict['TEST']['NAME'] = os.path.join(
+                directory, 'benchmark.sqlite3')
+            try:
+                with override_settings(CACHES=cache_settings):
+                    connection.creation.create_test_db(
+                        verbosity=0, autoclobber=True, serialize=False)
+                    try:
+                        results = self.run(application, options)
+                    finally:
+                        connection.creation.destroy_test_db(
+                            old_name, verbosity=0)
+            finally:
+                timing_logger.setLevel(level)
+        report = {
+            'meta': {
+                'scale': options['scale'],
+                'seed': options['seed'],
+                'clients': options['clients'],
+                'requests': options['requests'],
+                'cold_requests': options['cold_requests'],
+                'dataset': benchmark.dataset_size(options['scale']),
+                'python': platform.python_version(),
+                'django': django.get_version(),
+                'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            },
+            'results': results,
+        }
+        benchmark.dump(options['output'], report)
+        self.stdout.write(f'Результаты: {options["output"]}')
+        if baseline is not None:
+            self.compare(results, baseline, options['threshold'])
+
+    def run(self, application, options):
+        started = time.perf_counter()
+        objects = benchmark.seed(options['scale'], options['seed'])
+        self.stdout.write(
+            f'Данные созданы за {time.perf_counter() - started:.1f} с')
+        cookies = {
+            'anonymous': '',
+            'user': benchmark.session_cookie(objects['reader']),
+        }
+        pages = benchmark.urls(objects)
+        if options['views']:
+            unknown = set(options['views']) - set(pages)
+            if unknown:
+                raise CommandError(
+                    f'Неизвестные страницы: {", ".join(sorted(unknown))}')
+            pages = {name: pages[name] for name in options['views']}
+        self.stdout.write(
+            f'{"страница":<36}{"p50":>9}{"p95":>9}{"p99":>9}'
+            f'{"зап/с":>9}{"SQL":>7}{"ошибки":>8}')
+        results = {}
+        for name, (url, login_only) in pages.items():
+            for user in USERS:
+                if login_only and user == 'anonymous':
+                    continue
+                for phase in PHASES:
+                    if phase == 'cold':
+                        summary = benchmark.run_cold(
+                            application, url, cookies[user],
+                            options['cold_requests'])
+                    else:
+                        summary = benchmark.run_warm(
+                            application, url, cookies[user],
+                            options['requests'], options['clients'])
+                    key = f'{name}:{user}:{phase}'
+                    results[key] = dict(summary, url=url)
+                    self.stdout.write(
+                        f'{key:<36}{summary["p50_ms"]:>9.1f}'
+                        f'{summary["p95_ms"]:>9.1f}{summary["p99_ms"]:>9.1f}'
+                        f'{summary["throughput"]:>9.0f}'
+                        f'{summary["queries"]:>7.1f}{summary["errors"]:>8}')
+        return results
+
+    def compare(self, results, baseline, threshold):
+        rows, regressions = benchmark.compare(results, baseline, threshold)
+        self.stdout.write(
+            f'{"страница":<36}{"было p95":>10}{"стало":>9}{"%":>8}'
+            f'{"SQL было":>10}{"стало":>7}')
+        for key, old, new, change, old_queries, new_queries, worse in rows:
+            line = (f'{key:<36}{old:>10.1f}{new:>9.1f}{change:>+8.1f}'
+                    f'{old_queries:>10.1f}{new_queries:>7.1f}')
+            self.stdout.write(self.style.ERROR(line) if worse else line)
+        if regressions:
+            raise CommandError(
+                f'Регрессии относительно базового прогона: '
+                f'{", ".join(regressions)}')
+        self.stdout.write(self.style.SUCCESS('Регрессий нет.'))
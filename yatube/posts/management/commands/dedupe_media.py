@@ -0,0 +1,48 @@
+import os
+
+from django.core.management.base import BaseCommand
+
+from posts import media
+
+
+class Command(BaseCommand):
+    help = ('Переводит картинки постов на имена по содержимому, сводя '
+            'одинаковые файлы в один, и удаляет файлы без ссылок.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--no-sweep', action='store_true',
+            help='Не удалять файлы, на которые не ссылается ни один пост.')
+
+    def disk_usage(self):
+        files = media.storage()
+        return sum(os.path.getsize(files.path(name))
+                   for name in media.stored_names())
+
+    def handle(self, *args, **options):
+        before = self.disk_usage()
+        moved = merged = removed = 0
+        names = media.image_names()
+        seen = {name for name in names if media.ADDRESSED.match(name)}
+        for name in names:
+            if media.ADDRESSED.match(name):
+                continue
+            try:
+                new_name = media.readdress(name)
+            except FileNotFoundError:
+                self.stderr.write(f'{name}: файла нет')
+                continue
+            moved += 1
+            if new_name in seen:
+                merged += 1
+            seen.add(new_name)
+        if not options['no_sweep']:
+            for name in list(media.stored_names()):
+                if media.release(name):
+                    removed += 1
+        after = self.disk_usage()
+        self.stdout.write(
+            f'Переименовано: {moved}, из них дубликатов: {merged}, '
+            f'удалено файлов без ссылок: {removed}')
+        self.stdout.write(self.style.SUCCESS(
+            f'Диск: {before} -> {after} байт, освобождено {before - after}'))
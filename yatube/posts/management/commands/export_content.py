@@ -0,0 +1,52 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from posts import export
+from posts.models import Group, User
+
+
+class Command(BaseCommand):
+    help = ('Потоково выгружает посты автора или группы с комментариями '
+            'вместе с архивом в JSONL или CSV, по желанию — zip-архивом '
+            'с картинками.')
+
+    def add_arguments(self, parser):
+        source = parser.add_mutually_exclusive_group(required=True)
+        source.add_argument('--author')
+        source.add_argument('--group')
+        parser.add_argument(
+            '--format', choices=export.FORMATS, default=export.FORMATS[0])
+        parser.add_argument(
+            '--images', action='store_true',
+            help='Собрать zip-архив с файлами картинок.')
+        parser.add_argument(
+            '--output', help='Файл выгрузки, по умолчанию stdout.')
+        parser.add_argument(
+            '--chunk-size', type=int, default=export.CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        if options['author']:
+            author = User.objects.filter(username=options['author']).first()
+            if author is None:
+                raise CommandError(f'Автор {options["author"]} не найден.')
+            posts = export.sources(author=author)
+        else:
+            group = Group.objects.filter(slug=options['group']).first()
+            if group is None:
+                raise CommandError(f'Группа {options["group"]} не найдена.')
+            posts = export.sources(group=group)
+        format_ = options['format']
+        chunk_size = options['chunk_size']
+        if options['images']:
+            if not options['output']:
+                raise CommandError('Для архива укажите --output.')
+            with open(options['output'], 'wb') as output:
+                for data in export.zip_stream(posts, format_, chunk_size):
+                    output.write(data)
+            return
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8',
+                      newline='') as output:
+                output.writelines(export.lines(posts, format_, chunk_size))
+        else:
+            for line in export.lines(posts, format_, chunk_size):
+                self.stdout.write(line, ending='')
@@ -0,0 +1,39 @@
+from collections import Counter
+
+from django.core.management.base import BaseCommand
+
+from posts import thumbnails
+from posts.models import Post
+
+
+class Command(BaseCommand):
+    help = ('Сравнивает объём прежней обложки 960x339 '
+            'с новыми производными изображений постов.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--limit', type=int, default=100)
+
+    def handle(self, *args, **options):
+        names = (Post.objects.exclude(image='')
+                 .values_list('image', flat=True)[:options['limit']])
+        totals = Counter()
+        images = 0
+        for name in names:
+            try:
+                report = thumbnails.size_report(name)
+            except Exception as error:
+                self.stderr.write(f'{name}: {error}')
+                continue
+            totals.update(report)
+            images += 1
+        if not images:
+            self.stdout.write('Нет изображений для отчёта.')
+            return
+        legacy = totals.pop('legacy')
+        self.stdout.write(f'Изображений: {images}')
+        self.stdout.write(f'{"вариант":<12}{"байт":>12}{"к прежней":>12}')
+        self.stdout.write(f'{"JPEG 960x339":<12}{legacy:>12}{"100%":>12}')
+        for (format_, width), size in sorted(totals.items()):
+            self.stdout.write(
+                f'{f"{format_} {width}":<12}{size:>12}'
+                f'{size / legacy:>12.0%}')
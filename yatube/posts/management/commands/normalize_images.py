@@ -0,0 +1,64 @@
+from io import BytesIO
+
+from django.core.files.base import ContentFile
+from django.core.management.base import BaseCommand
+from PIL import Image
+
+from posts import images, media
+
+
+def pixels(data):
+    with Image.open(BytesIO(data)) as image:
+        return image.size[0] * image.size[1]
+
+
+class Command(BaseCommand):
+    help = ('Нормализует уже загруженные изображения постов так же, как '
+            'форма: поворот, уменьшение, без метаданных, пережатие.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--limit', type=int)
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='Только посчитать экономию, файлы не менять.')
+
+    def handle(self, *args, **options):
+        names = media.image_names()[:options['limit']]
+        checked = changed = before = after = pixels_before = pixels_after = 0
+        for name in names:
+            try:
+                with media.storage().open(name) as file:
+                    original = file.read()
+                    data = images.normalize(file)
+            except Exception as error:
+                self.stderr.write(f'{name}: {error}')
+                continue
+            checked += 1
+            before += len(original)
+            pixels_before += pixels(original)
+            if data is None:
+                after += len(original)
+                pixels_after += pixels(original)
+                continue
+            changed += 1
+            after += len(data)
+            pixels_after += pixels(data)
+            if not options['dry_run']:
+                # Новое содержимое — новое имя, посты переводятся на него.
+                media.readdress(name, ContentFile(data))
+        if not checked:
+            self.stdout.write('Нет изображений.')
+            return
+        saved = before - after
+        self.stdout.write(f'Изображений: {checked}, изменено: {changed}')
+        self.stdout.write(
+            f'Диск: {before} -> {after} байт, экономия {saved} байт '
+            f'({saved / before:.0%})')
+        self.stdout.write(
+            f'Трафик: {saved} байт на каждую отдачу всех оригиналов, '
+            f'в среднем {saved // checked} байт на изображение')
+        self.stdout.write(
+            f'Пикселей при построении миниатюр: {pixels_before} -> '
+            f'{pixels_after}')
+        if options['dry_run']:
+            self.stdout.write('Пробный прогон: файлы не изменены.')
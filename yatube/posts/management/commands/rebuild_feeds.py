@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand
+
+from posts import feed
+from posts.models import FeedEntry, Follow
+
+
+class Command(BaseCommand):
+    help = 'Заново раскладывает посты по лентам подписок.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--returning', action='store_true',
+            help='Только вернуть к раскладке авторов, у которых подписчиков '
+                 'стало не больше FEED_PUSH_LIMIT (для cron).')
+
+    def handle(self, *args, **options):
+        if options['returning']:
+            authors = feed.returning_authors()
+            for author_id in authors:
+                feed.push_back(author_id)
+            self.stdout.write(self.style.SUCCESS(
+                f'Возвращено к раскладке авторов: {len(authors)}'
+            ))
+            return
+        FeedEntry.objects.all().delete()
+        feed.mark_pulled()
+        follows = Follow.objects.values_list('user_id', 'author_id')
+        for user_id, author_id in follows.iterator():
+            if not feed.is_pulled(author_id):
+                feed.backfill(user_id, author_id)
+        self.stdout.write(self.style.SUCCESS(
+            f'Записей в лентах: {FeedEntry.objects.count()}'
+        ))
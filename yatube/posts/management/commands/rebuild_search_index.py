@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from posts import fulltext
+
+
+class Command(BaseCommand):
+    help = 'Заново строит полнотекстовый индекс постов и комментариев.'
+
+    def handle(self, *args, **options):
+        if not fulltext.is_supported():
+            self.stderr.write('Полнотекстовый индекс есть только в SQLite.')
+            return
+        fulltext.create_tables()
+        fulltext.rebuild()
+        self.stdout.write(self.style.SUCCESS('Индекс поиска перестроен.'))
@@ -0,0 +1,133 @@
+"""Ссылки на файлы картинок постов.
+
+В ContentAddressedStorage один файл служит всем постам с одинаковой
+картинкой, поэтому при удалении поста или замене картинки файл и его
+миниатюры удаляются, только когда на него не ссылается ни один пост ни
+в одном ярусе. Ссылки считаются запросом по индексу image: так счёт не
+сбивают bulk_create импорта и перенос в архив, идущие без сигналов.
+"""
+import os
+import posixpath
+import re
+import time
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from core.db import retry_write
+
+from . import caching, thumbnails
+from .models import ArchivedPost, Post
+
+MODELS = (Post, ArchivedPost)
+ADDRESSED = re.compile(r'^posts/[0-9a-f]{2}/[0-9a-f]{64}(\.\w+)?$')
+
+
+def storage():
+    return Post._meta.get_field('image').storage
+
+
+def _name(value):
+    return getattr(value, 'name', value) or ''
+
+
+def image_names():
+    """Имена всех файлов, на которые ссылаются посты обоих ярусов."""
+    names = set()
+    for model in MODELS:
+        names.update(model.objects.exclude(image='').order_by()
+                     .values_list('image', flat=True).distinct())
+    return sorted(names)
+
+
+def stored_names():
+    """Имена всех файлов в каталоге картинок постов."""
+    files = storage()
+    upload_to = Post._meta.get_field('image').upload_to
+    root = files.path(upload_to)
+    for directory, _, filenames in os.walk(root):
+        for filename in filenames:
+            path = os.path.join(directory, filename)
+            yield posixpath.join(
+                upload_to, os.path.relpath(path, root).replace(os.sep, '/'))
+
+
+def references(name):
+    return sum(model.objects.filter(image=name).count() for model in MODELS)
+
+
+def release(name, grace=None):
+    """Удаляет файл и его миниатюры, если на него больше нет ссылок.
+
+    Файл, записанный меньше grace секунд назад, остаётся: ссылку на него
+    из параллельной загрузки, возможно, ещё не сохранили.
+    """
+    if not name or references(name):
+        return False
+    if grace is None:
+        grace = settings.MEDIA_RELEASE_GRACE
+    files = storage()
+    try:
+        path = files.path(name)
+    except SuspiciousFileOperation:
+        # Имя вне каталога картинок: такой файл хранилищу не принадлежит.
+        return False
+    try:
+        age = time.time() - os.path.getmtime(path)
+    except FileNotFoundError:
+        age = None
+    if age is not None and age < grace:
+        return False
+    thumbnails.forget(name)
+    files.delete(name)
+    return True
+
+
+def readdress(name, content=None):
+    """Сохраняет файл name (или content вместо него) под именем по
+    содержимому, переводит на него все посты и возвращает новое имя."""
+    files = storage()
+    upload_name = posixpath.join(
+        Post._meta.get_field('image').upload_to, posixpath.basename(name))
+    if content is None:
+        with files.open(name) as file:
+            new_name = files.save(upload_name, file)
+    else:
+        new_name = files.save(upload_name, content)
+    if new_name == name:
+        return name
+    scopes = {caching.POSTS}
+    for model in MODELS:
+        posts = model.objects.filter(image=name)
+        for post_id, author_id, group_id in posts.values_list(
+                'pk', 'author_id', 'group_id'):
+            scopes.add(caching.post_scope(post_id))
+            scopes.add(caching.author_scope(author_id))
+            if group_id is not None:
+                scopes.add(caching.group_scope(group_id))
+        retry_write(posts.update, image=new_name)
+    caching.bump(*scopes)
+    release(name, grace=0)
+    return new_name
+
+
+def _release_on_commit(name):
+    if name:
+        transaction.on_commit(lambda: release(name))
+
+
+@receiver(post_save, sender=Post)
+def post_image_saved(sender, instance, created, raw=False, **kwargs):
+    old_name = '' if created else _name(instance._saved_image)
+    instance._saved_image = _name(instance.image)
+    if not raw and old_name != instance._saved_image:
+        _release_on_commit(old_name)
+
+
+@receiver(post_delete, sender=Post)
+@receiver(post_delete, sender=ArchivedPost)
+def post_image_deleted(sender, instance, **kwargs):
+    _release_on_commit(_name(instance.image))
@@ -0,0 +1,30 @@
+# Generated by Django 2.2.16 on 2026-10-18 18:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0006_auto_20220218_1629'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PostCounter',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('scope', models.CharField(max_length=16, verbose_name='Область подсчёта')),
+                ('key', models.PositiveIntegerField(default=0, verbose_name='Идентификатор объекта')),
+                ('value', models.IntegerField(default=0, verbose_name='Количество постов')),
+            ],
+            options={
+                'verbose_name': 'Счётчик постов',
+                'verbose_name_plural': 'Счётчики постов',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='postcounter',
+            constraint=models.UniqueConstraint(fields=('scope', 'key'), name='counter_scope_key'),
+        ),
+    ]
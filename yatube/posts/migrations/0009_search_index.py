@@ -0,0 +1,27 @@
+from django.db import migrations
+
+
+def create_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    from posts import fulltext
+    fulltext.create_tables()
+    fulltext.rebuild(
+        apps.get_model('posts', 'Post'), apps.get_model('posts', 'Comment'))
+
+
+def drop_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'sqlite':
+        from posts import fulltext
+        fulltext.drop_tables()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0008_feedentry'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_index, drop_index),
+    ]
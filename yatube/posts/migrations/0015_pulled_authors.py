@@ -0,0 +1,40 @@
+# Generated by Django 2.2.16 on 2026-10-18 20:28
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+from django.db.models import Count
+
+# FEED_PULL_LIMIT на момент миграции; дальше отметки ведёт posts.feed.
+PULL_LIMIT = 1000
+
+
+def mark_pulled(apps, schema_editor):
+    Follow = apps.get_model('posts', 'Follow')
+    PulledAuthor = apps.get_model('posts', 'PulledAuthor')
+    popular = Follow.objects.values('author_id').annotate(
+        total=Count('id')).filter(total__gt=PULL_LIMIT)
+    PulledAuthor.objects.bulk_create(
+        PulledAuthor(author_id=row['author_id']) for row in popular)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0011_update_proxy_permissions'),
+        ('posts', '0014_content_addressed_media'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PulledAuthor',
+            fields=[
+                ('author', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='+', serialize=False, to=settings.AUTH_USER_MODEL, verbose_name='Автор')),
+            ],
+            options={
+                'verbose_name': 'Автор, читаемый на лету',
+                'verbose_name_plural': 'Авторы, читаемые на лету',
+            },
+        ),
+        migrations.RunPython(mark_pulled, migrations.RunPython.noop),
+    ]
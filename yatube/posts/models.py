@@ -1,6 +1,8 @@
 from django.contrib.auth import get_user_model
 from django.db import models
 
+from .storage import ContentAddressedStorage
+
 User = get_user_model()
 LENGHT = 15
 
@@ -14,6 +16,16 @@ class Group(models.Model):
         return self.title
 
 
+class PostQuerySet(models.QuerySet):
+    def for_feed(self):
+        return self.select_related('author', 'group')
+
+
+class CommentQuerySet(models.QuerySet):
+    def for_thread(self):
+        return self.select_related('author')
+
+
 class Post(models.Model):
     text = models.TextField(
         'Текст поста',
@@ -42,11 +54,25 @@ class Post(models.Model):
     image = models.ImageField(
         'Картинка',
         upload_to='posts/',
-        blank=True
+        storage=ContentAddressedStorage(),
+        blank=True,
+        db_index=True,
     )
 
+    objects = PostQuerySet.as_manager()
+
+    archived = False
+
     class Meta:
         ordering = ('-pub_date',)
+        # Ленты группы и автора фильтруют по ним и листают по ключу
+        # (pub_date, id): индекс отдаёт строки уже в нужном порядке.
+        indexes = [
+            models.Index(fields=['group', '-pub_date', '-id'],
+                         name='post_group_date'),
+            models.Index(fields=['author', '-pub_date', '-id'],
+                         name='post_author_date'),
+        ]
         verbose_name = 'Пост'
         verbose_name_plural = 'Посты'
 
@@ -65,13 +91,90 @@ class Comment(models.Model):
                                    auto_now_add=True,
                                    help_text='Дата публикации')
 
+    objects = CommentQuerySet.as_manager()
+
     class Meta:
         ordering = ('-created',)
+        indexes = [
+            models.Index(
+                fields=['post', '-created', '-id'],
+                name='comment_post_created'),
+        ]
 
         def __str__(self):
             return self.text[:LENGHT]
 
 
+class ArchivedPost(models.Model):
+    """Старый пост, перенесённый из Post командой archive_posts.
+
+    id совпадает с исходным, поэтому адрес поста не меняется.
+    """
+    id = models.IntegerField(primary_key=True)
+    text = models.TextField('Текст поста')
+    pub_date = models.DateTimeField('Дата публикации', db_index=True)
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='archived_posts',
+        verbose_name='Автор'
+    )
+    group = models.ForeignKey(
+        Group,
+        on_delete=models.SET_NULL,
+        blank=True,
+        null=True,
+        related_name='archived_posts',
+        verbose_name='Группа'
+    )
+    image = models.ImageField(
+        'Картинка', upload_to='posts/', storage=ContentAddressedStorage(),
+        blank=True, db_index=True)
+
+    objects = PostQuerySet.as_manager()
+
+    archived = True
+
+    class Meta:
+        ordering = ('-pub_date',)
+        indexes = [
+            models.Index(fields=['group', '-pub_date', '-id'],
+                         name='archived_group_date'),
+            models.Index(fields=['author', '-pub_date', '-id'],
+                         name='archived_author_date'),
+        ]
+        verbose_name = 'Пост в архиве'
+        verbose_name_plural = 'Посты в архиве'
+
+    def __str__(self):
+        return self.text[:LENGHT]
+
+
+class ArchivedComment(models.Model):
+    id = models.IntegerField(primary_key=True)
+    post = models.ForeignKey(ArchivedPost, on_delete=models.CASCADE,
+                             related_name='comments')
+    author = models.ForeignKey(User, on_delete=models.CASCADE,
+                               related_name='archived_comments')
+    text = models.TextField(verbose_name='Текст комментария')
+    created = models.DateTimeField(verbose_name='date published')
+
+    objects = CommentQuerySet.as_manager()
+
+    class Meta:
+        ordering = ('-created',)
+        indexes = [
+            models.Index(
+                fields=['post', '-created', '-id'],
+                name='archived_comment_created'),
+        ]
+        verbose_name = 'Комментарий в архиве'
+        verbose_name_plural = 'Комментарии в архиве'
+
+    def __str__(self):
+        return self.text[:LENGHT]
+
+
 class Follow(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE,
                              related_name='follower')
@@ -87,3 +190,75 @@ class Follow(models.Model):
 
     def __str__(self):
         return f'Пользователь:{self.user} подписался на {self.author}'
+
+
+class PostCounter(models.Model):
+    scope = models.CharField('Область подсчёта', max_length=16)
+    key = models.PositiveIntegerField('Идентификатор объекта', default=0)
+    value = models.IntegerField('Количество постов', default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['scope', 'key'],
+                name='counter_scope_key')
+        ]
+        verbose_name = 'Счётчик постов'
+        verbose_name_plural = 'Счётчики постов'
+
+    def __str__(self):
+        return f'{self.scope}:{self.key} = {self.value}'
+
+
+class FeedEntry(models.Model):
+    user = models.ForeignKey(User, on_delete=models.CASCADE,
+                             related_name='feed_entries')
+    post = models.ForeignKey(Post, on_delete=models.CASCADE,
+                             related_name='feed_entries')
+    author = models.ForeignKey(User, on_delete=models.CASCADE,
+                               related_name='+')
+    pub_date = models.DateTimeField('Дата публикации')
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'post'],
+                name='feed_user_post')
+        ]
+        indexes = [
+            models.Index(fields=['user', '-pub_date', '-post'],
+                         name='feed_user_date'),
+        ]
+        verbose_name = 'Запись ленты'
+        verbose_name_plural = 'Записи лент'
+
+    def __str__(self):
+        return f'{self.post_id} в ленте {self.user_id}'
+
+
+class PulledAuthor(models.Model):
+    """Автор, чьи посты не раскладываются по лентам подписчиков, а
+    читаются при показе ленты (posts.feed)."""
+    author = models.OneToOneField(
+        User, on_delete=models.CASCADE, primary_key=True,
+        related_name='+', verbose_name='Автор')
+
+    class Meta:
+        verbose_name = 'Автор, читаемый на лету'
+        verbose_name_plural = 'Авторы, читаемые на лету'
+
+    def __str__(self):
+        return str(self.author_id)
+
+
+class ImportProgress(models.Model):
+    source = models.CharField('Источник', max_length=255, unique=True)
+    rows = models.PositiveIntegerField('Обработано строк', default=0)
+    updated = models.DateTimeField('Обновлено', auto_now=True)
+
+    class Meta:
+        verbose_name = 'Ход импорта'
+        verbose_name_plural = 'Ход импорта'
+
+    def __str__(self):
+        return f'{self.source}: {self.rows}'
@@ -0,0 +1,236 @@
+import base64
+import binascii
+
+from django.core.paginator import Page, Paginator
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from django.utils.functional import cached_property
+
+from . import archive
+from .counters import get_count
+
+
+def encode_cursor(obj, date_field='pub_date'):
+    raw = f'{getattr(obj, date_field).isoformat()}|{obj.pk}'
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(token):
+    """Возвращает пару (pub_date, pk) или None, если токен испорчен."""
+    if not token:
+        return None
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        raw = base64.urlsafe_b64decode(padded.encode()).decode()
+        stamp, pk = raw.rsplit('|', 1)
+        pub_date = parse_datetime(stamp)
+        pk = int(pk)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        return None
+    if pub_date is None:
+        return None
+    return pub_date, pk
+
+
+def keyset_slice(queryset, key, newer, limit,
+                 date_field='pub_date', id_field='pk'):
+    """До limit записей старше (или новее) ключа.
+
+    Старшие записи идут от новых к старым, новые — в обратном порядке,
+    чтобы выборка начиналась вплотную к ключу.
+    """
+    if key is not None:
+        lookup = 'gt' if newer else 'lt'
+        pub_date, pk = key
+        # Лишнее с виду условие lte/gte даёт базе диапазон по индексу:
+        # по одному OR она начала бы чтение с края ленты.
+        queryset = queryset.filter(
+            Q(**{f'{date_field}__{lookup}e': pub_date}),
+            Q(**{f'{date_field}__{lookup}': pub_date})
+            | Q(**{date_field: pub_date, f'{id_field}__{lookup}': pk})
+        )
+    if newer:
+        queryset = queryset.order_by(date_field, id_field)
+    else:
+        queryset = queryset.order_by(f'-{date_field}', f'-{id_field}')
+    return queryset[:limit]
+
+
+class KeysetPaginator(Paginator):
+    """Пагинатор, листающий ленту по ключу (pub_date, id).
+
+    Соседние страницы выбираются условием по ключу последней записи
+    вместо OFFSET, поэтому глубина страницы не влияет на стоимость запроса,
+    а общее количество записей не считается вовсе.
+    """
+    date_field = 'pub_date'
+    id_field = 'pk'
+
+    def __init__(self, object_list, per_page, **kwargs):
+        super().__init__(
+            object_list.order_by(f'-{self.date_field}', f'-{self.id_field}'),
+            per_page, **kwargs
+        )
+
+    def posts(self, rows):
+        return list(rows)
+
+    def keyset_posts(self, key, newer, limit):
+        return self.posts(keyset_slice(
+            self.object_list, key, newer, limit,
+            self.date_field, self.id_field
+        ))
+
+    def get_keyset_page(self, after=None, before=None):
+        after_key = decode_cursor(after)
+        before_key = decode_cursor(before)
+        limit = self.per_page
+        if before_key is not None:
+            rows = self.keyset_posts(before_key, True, limit + 1)
+            if rows:
+                has_previous = len(rows) > limit
+                return self._keyset_page(
+                    rows[:limit][::-1], has_previous, True,
+                    f'before={before}'
+                )
+            after_key = None
+        cursor = f'after={after}' if after_key is not None else ''
+        rows = self.keyset_posts(after_key, False, limit + 1)
+        return self._keyset_page(
+            rows[:limit], after_key is not None, len(rows) > limit, cursor
+        )
+
+    def _get_page(self, object_list, number, paginator):
+        return Page(self.posts(object_list), number, paginator)
+
+    def _keyset_page(self, rows, has_previous, has_next, cursor):
+        page = Page(rows, None, self)
+        page.keyset = True
+        page.cursor = cursor
+        page.previous_cursor = (
+            encode_cursor(rows[0], self.date_field)
+            if has_previous and rows else None
+        )
+        page.next_cursor = (
+            encode_cursor(rows[-1], self.date_field) if has_next else None
+        )
+        return page
+
+
+class CountedPaginator(KeysetPaginator):
+    """Пагинатор, берущий общее число записей из таблицы счётчиков.
+
+    count_key — пара (область, идентификатор) из posts.counters;
+    без неё количество считается обычным COUNT(*).
+    """
+
+    def __init__(self, object_list, per_page, count_key=None, **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        self.count_key = count_key
+
+    @cached_property
+    def count(self):
+        if self.count_key is None:
+            return super().count
+        return get_count(*self.count_key)
+
+
+class TieredPaginator(CountedPaginator):
+    """Лента из свежих постов и архива, слитых по ключу (pub_date, id).
+
+    Архив старше почти всех свежих постов, поэтому к нему обращаются,
+    только когда выборка доходит до горизонта архива — даты самого
+    нового поста в нём. Первые страницы лент читают одну таблицу.
+    """
+
+    def __init__(self, object_list, archived, per_page, **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        self.archived = archived.order_by(
+            f'-{self.date_field}', f'-{self.id_field}')
+
+    @cached_property
+    def horizon(self):
+        return archive.horizon()
+
+    def reaches_archive(self, posts, key, newer, limit):
+        if self.horizon is None:
+            return False
+        if newer:
+            return key is None or key[0] <= self.horizon
+        return (len(posts) < limit
+                or getattr(posts[-1], self.date_field) <= self.horizon)
+
+    def keyset_posts(self, key, newer, limit):
+        posts = super().keyset_posts(key, newer, limit)
+        if not self.reaches_archive(posts, key, newer, limit):
+            return posts
+        posts.extend(self.posts(keyset_slice(
+            self.archived, key, newer, limit,
+            self.date_field, self.id_field
+        )))
+        posts.sort(key=lambda post: (getattr(post, self.date_field), post.pk),
+                   reverse=not newer)
+        return posts[:limit]
+
+    def page(self, number):
+        # Старые ссылки ?page=N: архив продолжает свежие посты, с
+        # которыми он пересекается только до следующего запуска
+        # archive_posts.
+        number = self.validate_number(number)
+        bottom = (number - 1) * self.per_page
+        top = bottom + self.per_page
+        posts = self.posts(self.object_list[bottom:top])
+        if len(posts) < self.per_page and self.horizon is not None:
+            fresh = (bottom + len(posts) if posts
+                     else self.object_list.count())
+            posts.extend(self.posts(
+                self.archived[max(bottom - fresh, 0):top - fresh]))
+        return Page(posts, number, self)
+
+
+class CommentPaginator(KeysetPaginator):
+    """Комментарии поста от новых к старым по ключу (created, id)."""
+    date_field = 'created'
+
+
+def elided_page_range(num_pages, number, on_each_side=2, on_ends=1):
+    """Номера страниц для навигации: края и окно вокруг текущей.
+
+    Пропуски обозначены None. Число ссылок не зависит от числа страниц,
+    поэтому навигация по большой ленте остаётся короткой.
+    """
+    window = range(max(number - on_each_side, 1),
+                   min(number + on_each_side, num_pages) + 1)
+    head = range(1, min(on_ends, num_pages) + 1)
+    tail = range(max(num_pages - on_ends + 1, 1), num_pages + 1)
+    pages = []
+    for page in sorted(set(head) | set(window) | set(tail)):
+        if pages and page - pages[-1] > 2:
+            pages.append(None)
+        elif pages and page - pages[-1] == 2:
+            pages.append(page - 1)
+        pages.append(page)
+    return pages
+
+
+def paginate(request, queryset, per_page, count_key=None, archived=None):
+    if archived is None:
+        paginator = CountedPaginator(queryset, per_page, count_key=count_key)
+    else:
+        paginator = TieredPaginator(
+            queryset, archived, per_page, count_key=count_key)
+    return page_for_request(request, paginator)
+
+
+def page_for_request(request, paginator):
+    """Страница ленты для запроса.
+
+    Старые ссылки вида ?page=N обслуживаются обычной постраничной
+    навигацией, все остальные запросы листаются по ключу.
+    """
+    after = request.GET.get('after')
+    before = request.GET.get('before')
+    page_number = request.GET.get('page')
+    if page_number is not None and not (after or before):
+        return paginator.get_page(page_number)
+    return paginator.get_keyset_page(after=after, before=before)
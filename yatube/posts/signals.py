@@ -0,0 +1,133 @@
+from django.db.models.signals import (post_delete, post_init, post_save,
+                                      pre_delete)
+from django.dispatch import receiver
+
+from . import caching, counters, feed, fulltext
+from .models import (ArchivedPost, Comment, Follow, Group, Post, PostCounter,
+                     User)
+
+AUTHOR_NAME_FIELDS = {'username', 'first_name', 'last_name'}
+
+
+def expire_post_pages(post, *group_ids):
+    scopes = [
+        caching.POSTS,
+        caching.author_scope(post.author_id),
+        caching.post_scope(post.pk),
+    ]
+    scopes.extend(
+        caching.group_scope(group_id)
+        for group_id in set(group_ids) if group_id is not None
+    )
+    caching.bump(*scopes)
+
+
+@receiver(post_init, sender=Post)
+def remember_saved(sender, instance, **kwargs):
+    instance._saved_group_id = instance.__dict__.get('group_id')
+    instance._saved_image = instance.__dict__.get('image')
+
+
+@receiver(post_save, sender=Post)
+def post_saved(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    old_group_id = instance._saved_group_id
+    if created:
+        for scope, key in counters.post_scopes(
+                instance.author_id, instance.group_id):
+            counters.change_count(scope, key, 1)
+        feed.fan_out(instance)
+    elif old_group_id != instance.group_id:
+        if old_group_id is not None:
+            counters.change_count(counters.GROUP, old_group_id, -1)
+        if instance.group_id is not None:
+            counters.change_count(counters.GROUP, instance.group_id, 1)
+    fulltext.index_post(instance)
+    expire_post_pages(instance, old_group_id, instance.group_id)
+    instance._saved_group_id = instance.group_id
+
+
+@receiver(post_delete, sender=Post)
+def post_deleted(sender, instance, **kwargs):
+    for scope, key in counters.post_scopes(
+            instance.author_id, instance.group_id):
+        counters.change_count(scope, key, -1)
+    fulltext.unindex_post(instance.pk)
+    expire_post_pages(instance, instance.group_id)
+
+
+@receiver(post_delete, sender=ArchivedPost)
+def archived_post_deleted(sender, instance, **kwargs):
+    # Архивных постов нет в поиске, счётчики же учитывают оба яруса.
+    for scope, key in counters.post_scopes(
+            instance.author_id, instance.group_id):
+        counters.change_count(scope, key, -1)
+    expire_post_pages(instance, instance.group_id)
+
+
+@receiver(post_save, sender=Group)
+def group_saved(sender, instance, raw=False, **kwargs):
+    if not raw:
+        fulltext.rename_group(instance.pk, instance.title)
+        caching.bump(caching.GROUPS, caching.group_scope(instance.pk))
+
+
+@receiver(pre_delete, sender=Group)
+def group_deleting(sender, instance, **kwargs):
+    # После удаления у постов уже не будет group_id, по которому их найти.
+    fulltext.rename_group(instance.pk, '')
+
+
+@receiver(post_delete, sender=Group)
+def group_deleted(sender, instance, **kwargs):
+    PostCounter.objects.filter(
+        scope=counters.GROUP, key=instance.pk).delete()
+    caching.bump(caching.GROUPS, caching.group_scope(instance.pk))
+
+
+@receiver(post_save, sender=Comment)
+def comment_saved(sender, instance, raw=False, **kwargs):
+    if not raw:
+        fulltext.index_comment(instance)
+        caching.bump(caching.post_scope(instance.post_id))
+
+
+@receiver(post_delete, sender=Comment)
+def comment_deleted(sender, instance, **kwargs):
+    fulltext.unindex_comment(instance.pk)
+    caching.bump(caching.post_scope(instance.post_id))
+
+
+@receiver(post_save, sender=User)
+def user_saved(sender, instance, created, raw=False,
+               update_fields=None, **kwargs):
+    # Вход сохраняет только last_login, индекс при этом не трогаем.
+    if raw or created:
+        return
+    if update_fields is None or AUTHOR_NAME_FIELDS & set(update_fields):
+        fulltext.rename_author(instance)
+        # Имя автора выводится на его страницах и в лентах с его постами.
+        group_ids = {
+            group_id
+            for model in (Post, ArchivedPost)
+            for group_id in model.objects.filter(
+                author=instance, group__isnull=False
+            ).values_list('group_id', flat=True).distinct()
+        }
+        caching.bump(caching.POSTS, caching.author_scope(instance.pk),
+                     *map(caching.group_scope, group_ids))
+
+
+@receiver(post_save, sender=Follow)
+def follow_created(sender, instance, created, raw=False, **kwargs):
+    if raw or not created:
+        return
+    counters.change_count(counters.FOLLOWERS, instance.author_id, 1)
+    feed.follow_changed(instance, created=True)
+
+
+@receiver(post_delete, sender=Follow)
+def follow_deleted(sender, instance, **kwargs):
+    counters.change_count(counters.FOLLOWERS, instance.author_id, -1)
+    feed.follow_changed(instance, created=False)
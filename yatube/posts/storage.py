@@ -0,0 +1,66 @@
+import hashlib
+import os
+import posixpath
+import tempfile
+
+from django.core.files import File
+from django.core.files.storage import FileSystemStorage
+from django.utils.deconstruct import deconstructible
+
+HASH_CHUNK = 64 * 1024
+
+
+def content_name(name, content):
+    """Имя по sha256 содержимого: posts/ab/abcd….jpg."""
+    digest = hashlib.sha256()
+    content.seek(0)
+    for chunk in content.chunks(HASH_CHUNK):
+        digest.update(chunk)
+    content.seek(0)
+    digest = digest.hexdigest()
+    extension = os.path.splitext(name)[1].lower()
+    return posixpath.join(
+        posixpath.dirname(name), digest[:2], digest + extension)
+
+
+@deconstructible
+class ContentAddressedStorage(FileSystemStorage):
+    """Файловое хранилище, где имя файла — хэш его содержимого.
+
+    Одинаковые загрузки получают одно имя, один файл на диске и, раз
+    sorl называет миниатюры по имени оригинала, один набор миниатюр.
+    Файл удаляется, когда на него не остаётся ссылок (posts.media).
+    """
+
+    def save(self, name, content, max_length=None):
+        if name is None:
+            name = content.name
+        if not hasattr(content, 'chunks'):
+            content = File(content, name)
+        return super().save(content_name(name, content), content, max_length)
+
+    def get_available_name(self, name, max_length=None):
+        # Занятое имя значит то же содержимое, файл не нужно переименовывать.
+        return name
+
+    def _save(self, name, content):
+        path = self.path(name)
+        if os.path.exists(path):
+            # Свежая отметка времени защищает файл от удаления, пока
+            # запись о новой ссылке на него ещё не сохранена.
+            os.utime(path)
+            return name
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+        fd, temp = tempfile.mkstemp(dir=directory)
+        try:
+            with os.fdopen(fd, 'wb') as file:
+                for chunk in content.chunks():
+                    file.write(chunk)
+            os.chmod(temp, self.file_permissions_mode or 0o644)
+            os.replace(temp, path)
+        except BaseException:
+            if os.path.exists(temp):
+                os.remove(temp)
+            raise
+        return name
@@ -0,0 +1,145 @@
+import hashlib
+
+from django.contrib.syndication.views import Feed
+from django.core.cache import cache
+from django.http import Http404
+from django.shortcuts import get_object_or_404
+from django.urls import reverse
+from django.utils.cache import get_conditional_response, quote_etag
+from django.utils.feedgenerator import Atom1Feed
+from django.utils.http import http_date
+from django.utils.text import Truncator
+from django.utils.translation import get_language
+
+from . import caching
+from .models import Group, Post, User
+from .views import group_scopes, index_scopes, profile_scopes
+
+FEED_SIZE = 20
+FEED_KEY = 'feed:{}:{}:{}'
+
+
+class PostsFeed(Feed):
+    """Последние посты в порядке Post.Meta.ordering."""
+
+    def posts(self, obj):
+        return Post.objects.for_feed()
+
+    def items(self, obj):
+        return self.posts(obj)[:FEED_SIZE]
+
+    def item_title(self, item):
+        return Truncator(item.text).words(8)
+
+    def item_description(self, item):
+        return item.text
+
+    def item_link(self, item):
+        return reverse('posts:post_detail', args=[item.pk])
+
+    def item_pubdate(self, item):
+        return item.pub_date
+
+    def item_author_name(self, item):
+        return item.author.get_full_name() or item.author.username
+
+    def item_categories(self, item):
+        return (item.group.title,) if item.group_id else ()
+
+
+class LatestPostsFeed(PostsFeed):
+    title = 'Yatube: последние записи'
+    description = 'Последние обновления на сайте'
+
+    def link(self):
+        return reverse('posts:index')
+
+
+class GroupPostsFeed(PostsFeed):
+    def get_object(self, request, slug):
+        return get_object_or_404(Group, slug=slug)
+
+    def posts(self, group):
+        return super().posts(group).filter(group=group)
+
+    def title(self, group):
+        return f'Yatube: {group.title}'
+
+    def description(self, group):
+        return group.description
+
+    def link(self, group):
+        return reverse('posts:group_list', args=[group.slug])
+
+
+class AuthorPostsFeed(PostsFeed):
+    def get_object(self, request, username):
+        return get_object_or_404(User, username=username)
+
+    def posts(self, author):
+        return super().posts(author).filter(author=author)
+
+    def title(self, author):
+        return f'Yatube: {author.get_full_name() or author.username}'
+
+    def description(self, author):
+        return f'Записи пользователя {author.username}'
+
+    def link(self, author):
+        return reverse('posts:profile', args=[author.username])
+
+
+class LatestPostsAtom(LatestPostsFeed):
+    feed_type = Atom1Feed
+    subtitle = LatestPostsFeed.description
+
+
+class GroupPostsAtom(GroupPostsFeed):
+    feed_type = Atom1Feed
+
+    def subtitle(self, group):
+        return self.description(group)
+
+
+class AuthorPostsAtom(AuthorPostsFeed):
+    feed_type = Atom1Feed
+
+    def subtitle(self, author):
+        return self.description(author)
+
+
+def cached_feed(feed, get_scopes):
+    """Представление ленты с кэшем XML до изменения её областей данных.
+
+    Last-Modified — время последнего изменения областей, как у страниц
+    (caching.page_state), а не pub_date самого свежего поста: правка или
+    удаление поста тоже меняют ленту. ETag — хэш XML. Опрос
+    неизменившейся ленты не обращается к таблице постов.
+    """
+    def view(request, *args, **kwargs):
+        scopes = get_scopes(*args, **kwargs)
+        if scopes is None:
+            raise Http404
+        path = hashlib.md5(request.get_full_path().encode()).hexdigest()
+        version, changed = caching.page_state(*scopes)
+        key = FEED_KEY.format(get_language(), path, version)
+        response = cache.get(key)
+        if response is None:
+            response = feed(request, *args, **kwargs)
+            response['ETag'] = quote_etag(
+                hashlib.md5(response.content).hexdigest())
+            cache.set(key, response, timeout=None)
+        response['Last-Modified'] = http_date(changed)
+        return get_conditional_response(
+            request, etag=response['ETag'], last_modified=changed,
+            response=response,
+        ) or response
+    return view
+
+
+latest_rss = cached_feed(LatestPostsFeed(), index_scopes)
+latest_atom = cached_feed(LatestPostsAtom(), index_scopes)
+group_rss = cached_feed(GroupPostsFeed(), group_scopes)
+group_atom = cached_feed(GroupPostsAtom(), group_scopes)
+author_rss = cached_feed(AuthorPostsFeed(), profile_scopes)
+author_atom = cached_feed(AuthorPostsAtom(), profile_scopes)
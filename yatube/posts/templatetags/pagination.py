@@ -0,0 +1,11 @@
+from django import template
+
+from posts.paginators import elided_page_range
+
+register = template.Library()
+
+
+@register.simple_tag
+def page_window(page_obj, on_each_side=2, on_ends=1):
+    return elided_page_range(
+        page_obj.paginator.num_pages, page_obj.number, on_each_side, on_ends)
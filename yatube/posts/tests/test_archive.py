@@ -0,0 +1,166 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from posts import archive, counters, export
+from posts.feed import FeedPaginator
+from posts.models import (ArchivedComment, ArchivedPost, Comment, FeedEntry,
+                          Follow, Group, Post, User)
+
+OLD = 15
+FRESH = 12
+
+
+def create_post(pub_date, **fields):
+    """Пост с заданной датой; запись в ленте получает ту же дату."""
+    post = Post.objects.create(**fields)
+    Post.objects.filter(pk=post.pk).update(pub_date=pub_date)
+    FeedEntry.objects.filter(post=post).update(pub_date=pub_date)
+    return post
+
+
+class ArchiveTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='archivist')
+        cls.reader = User.objects.create_user(username='archive_reader')
+        Follow.objects.create(user=cls.reader, author=cls.author)
+        cls.group = Group.objects.create(
+            title='Группа', slug='archive-group', description='Описание')
+        now = timezone.now()
+        for i in range(OLD):
+            create_post(now - timedelta(days=400, minutes=i),
+                        author=cls.author, group=cls.group,
+                        text=f'Старый {i}')
+        for i in range(FRESH):
+            create_post(now - timedelta(minutes=i),
+                        author=cls.author, group=cls.group,
+                        text=f'Свежий {i}')
+        cls.old_post = Post.objects.get(text='Старый 0')
+        for i in range(3):
+            Comment.objects.create(
+                post=cls.old_post, author=cls.reader, text=f'Ответ {i}')
+        cls.order = list(Post.objects.order_by(
+            '-pub_date', '-pk').values_list('pk', flat=True))
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.reader)
+
+    def archive_old(self):
+        call_command('archive_posts', batch_size=4, pause=0,
+                     stdout=StringIO())
+
+    def test_move(self):
+        """Старые посты с комментариями уходят в архив пачками,
+        счётчики учитывают оба яруса."""
+        out = StringIO()
+        call_command('archive_posts', batch_size=4, pause=0, stdout=out)
+        self.assertIn('Перенесено постов: 4', out.getvalue())
+        self.assertEqual(ArchivedPost.objects.count(), OLD)
+        self.assertEqual(Post.objects.count(), FRESH)
+        self.assertEqual(ArchivedComment.objects.filter(
+            post_id=self.old_post.pk).count(), 3)
+        self.assertFalse(Comment.objects.exists())
+        self.assertFalse(FeedEntry.objects.filter(
+            post_id=self.old_post.pk).exists())
+        self.assertEqual(
+            counters.get_count(counters.AUTHOR, self.author.pk), OLD + FRESH)
+        counters.rebuild_counts()
+        self.assertEqual(
+            counters.get_count(counters.GROUP, self.group.pk), OLD + FRESH)
+        self.assertEqual(archive.horizon(), ArchivedPost.objects.latest(
+            'pub_date').pub_date)
+
+    def test_feeds_read_both_tiers(self):
+        """Профиль, группа и главная листают свежие посты и архив."""
+        self.archive_old()
+        for url in (
+            reverse('posts:profile', args=[self.author.username]),
+            reverse('posts:group_list', args=[self.group.slug]),
+            reverse('posts:index'),
+        ):
+            with self.subTest(url=url):
+                seen, params = [], {}
+                while True:
+                    page = self.guest_client.get(
+                        url, params).context['page_obj']
+                    seen.extend(post.pk for post in page)
+                    if not page.next_cursor:
+                        break
+                    params = {'after': page.next_cursor}
+                self.assertEqual(seen, self.order)
+                page = self.guest_client.get(
+                    url, {'page': 2}).context['page_obj']
+                self.assertEqual([post.pk for post in page],
+                                 self.order[10:20])
+
+    def test_fresh_page_skips_archive(self):
+        """Страница из свежих постов не обращается к архиву."""
+        self.archive_old()
+        archive.horizon()
+        counters.get_count(counters.AUTHOR, self.author.pk)
+        with CaptureQueriesContext(connection) as queries:
+            self.guest_client.get(
+                reverse('posts:profile', args=[self.author.username]))
+        self.assertFalse(any('posts_archivedpost' in query['sql']
+                             for query in queries.captured_queries))
+
+    def test_archived_post_detail(self):
+        """Архивный пост открывается по прежнему адресу, только для
+        чтения."""
+        self.archive_old()
+        url = reverse('posts:post_detail', args=[self.old_post.pk])
+        response = self.authorized_client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.context['post'].archived)
+        self.assertEqual(len(response.context['comments']), 3)
+        self.assertContains(response, 'Пост в архиве')
+        self.assertNotContains(response, reverse(
+            'posts:add_comment', args=[self.old_post.pk]))
+        response = self.authorized_client.post(
+            reverse('posts:add_comment', args=[self.old_post.pk]),
+            {'text': 'Поздно'})
+        self.assertEqual(response.status_code, 404)
+        response = self.guest_client.get(
+            reverse('api:post_detail', args=[self.old_post.pk]))
+        self.assertEqual(response.status_code, 200)
+
+    def test_follow_feed(self):
+        """В ленте подписок остаются только свежие посты."""
+        self.archive_old()
+        page = FeedPaginator(self.reader, 50).get_keyset_page()
+        self.assertEqual([post.pk for post in page], self.order[:FRESH])
+
+    def test_delete_archived_post(self):
+        """Удалённый архивный пост вычитается из счётчиков."""
+        self.archive_old()
+        for scope, key in counters.post_scopes(self.author.pk, self.group.pk):
+            counters.get_count(scope, key)
+        ArchivedPost.objects.get(pk=self.old_post.pk).delete()
+        self.assertEqual(
+            counters.get_count(counters.AUTHOR, self.author.pk),
+            OLD + FRESH - 1)
+        self.assertEqual(
+            counters.get_count(counters.GROUP, self.group.pk),
+            OLD + FRESH - 1)
+        self.assertEqual(counters.get_count(counters.ALL), OLD + FRESH - 1)
+
+    def test_export(self):
+        """Выгрузка автора включает архивные посты с комментариями."""
+        self.archive_old()
+        rows = [row for row in export.records(
+            export.sources(author=self.author)) if row['type'] == 'post']
+        self.assertEqual(len(rows), OLD + FRESH)
+        old = next(row for row in rows if row['id'] == self.old_post.pk)
+        self.assertEqual(len(old['comments']), 3)
@@ -0,0 +1,48 @@
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+
+from posts import benchmark
+from posts.models import Post, User
+from yatube.wsgi import application
+
+
+class BenchmarkTests(TestCase):
+    def test_percentile(self):
+        """Перцентиль берётся по ближайшему рангу."""
+        values = list(range(1, 101))
+        self.assertEqual(benchmark.percentile(values, 50), 50)
+        self.assertEqual(benchmark.percentile(values, 99), 99)
+        self.assertEqual(benchmark.percentile([7], 95), 7)
+
+    def test_compare(self):
+        """Регрессией считается рост p95 сверх порога или лишний запрос."""
+        baseline = {
+            'index': {'p95_ms': 10.0, 'queries': 3},
+            'profile': {'p95_ms': 10.0, 'queries': 3},
+            'search': {'p95_ms': 10.0, 'queries': 3},
+        }
+        results = {
+            'index': {'p95_ms': 11.0, 'queries': 3},
+            'profile': {'p95_ms': 13.0, 'queries': 3},
+            'search': {'p95_ms': 9.0, 'queries': 4},
+            'new': {'p95_ms': 1.0, 'queries': 1},
+        }
+        rows, regressions = benchmark.compare(results, baseline, 20)
+        self.assertEqual(len(rows), 3)
+        self.assertEqual(regressions, ['profile', 'search'])
+
+    def test_wsgi_run(self):
+        """Прогон через WSGI считает задержки и SQL-запросы."""
+        user = User.objects.create_user(username='bench')
+        Post.objects.create(author=user, text='Пост')
+        cache.clear()
+        url = reverse('posts:profile', args=[user.username])
+        status, elapsed, queries = benchmark.wsgi_get(application, url)
+        self.assertEqual(status, 200)
+        self.assertGreater(queries, 0)
+        summary = benchmark.run_warm(
+            application, url, benchmark.session_cookie(user), 5, 1)
+        self.assertEqual(summary['requests'], 5)
+        self.assertEqual(summary['errors'], 0)
+        self.assertLessEqual(summary['p50_ms'], summary['p99_ms'])
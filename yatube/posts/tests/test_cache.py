@@ -2,7 +2,8 @@ from django.core.cache import cache
 from django.test import TestCase
 from django.urls import reverse
 
-from posts.models import Post, User
+from posts import caching
+from posts.models import Comment, Group, Post, User
 
 
 INDEX = reverse('posts:index')
@@ -13,18 +14,164 @@ class CacheTests(TestCase):
     def setUpClass(cls):
         super().setUpClass()
         cls.test_user = User.objects.create(username='cache')
+        cls.group = Group.objects.create(
+            title='Группа',
+            slug='cache-slug',
+            description='Описание',
+        )
         cls.post = Post.objects.create(
             text='Тестовое описание поста',
             author=cls.test_user,
+            group=cls.group,
+        )
+        cls.urls = (
+            INDEX,
+            reverse('posts:group_list', args=[cls.group.slug]),
+            reverse('posts:profile', args=[cls.test_user.username]),
         )
 
+    def setUp(self):
+        cache.clear()
+
     def test_pages_uses_correct_template(self):
         """Кэширование данных на главной странице работает корректно"""
         response = self.client.get(INDEX)
         cached_response_content = response.content
-        Post.objects.create(text='Второй пост', author=self.test_user)
+        Post.objects.filter(pk=self.post.pk).update(text='Без сигнала')
         response = self.client.get(INDEX)
         self.assertEqual(cached_response_content, response.content)
         cache.clear()
         response = self.client.get(INDEX)
         self.assertNotEqual(cached_response_content, response.content)
+
+    def test_unchanged_pages_stay_cached(self):
+        """Без изменений данных страницы берутся из кэша."""
+        for url in self.urls:
+            with self.subTest(url=url):
+                cached_content = self.client.get(url).content
+                Post.objects.filter(pk=self.post.pk).update(text='Тихо')
+                self.assertEqual(self.client.get(url).content, cached_content)
+                Post.objects.filter(pk=self.post.pk).update(
+                    text=self.post.text)
+
+    def test_post_changes_invalidate_pages(self):
+        """Создание, правка и удаление поста сразу видны на страницах."""
+        for url in self.urls:
+            self.client.get(url)
+        post = Post.objects.create(
+            text='Новый пост', author=self.test_user, group=self.group)
+        for url in self.urls:
+            with self.subTest(url=url, action='create'):
+                self.assertContains(self.client.get(url), 'Новый пост')
+        post.text = 'Исправленный пост'
+        post.save()
+        for url in self.urls:
+            with self.subTest(url=url, action='edit'):
+                self.assertContains(self.client.get(url), 'Исправленный')
+        post.delete()
+        for url in self.urls:
+            with self.subTest(url=url, action='delete'):
+                self.assertNotContains(self.client.get(url), 'Исправленный')
+
+    def test_group_change_invalidates_pages(self):
+        """Правка группы сбрасывает кэш страниц с её постами."""
+        self.client.get(INDEX)
+        self.group.slug = 'cache-renamed'
+        self.group.save()
+        self.assertContains(self.client.get(INDEX), 'cache-renamed')
+
+    def test_author_rename_invalidates_pages(self):
+        """Новое имя автора появляется в лентах и на его странице."""
+        for url in self.urls:
+            self.client.get(url)
+        self.test_user.first_name = 'Переименованный'
+        self.test_user.save()
+        for url in self.urls:
+            with self.subTest(url=url):
+                self.assertContains(self.client.get(url), 'Переименованный')
+
+    def test_comment_bumps_post_generation(self):
+        """Комментарий меняет поколение своего поста."""
+        scope = caching.post_scope(self.post.pk)
+        version = caching.get_version(scope)
+        Comment.objects.create(
+            post=self.post, author=self.test_user, text='Комментарий')
+        self.assertNotEqual(caching.get_version(scope), version)
+
+
+class AnonymousPageCacheTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='page_cache')
+        cls.group = Group.objects.create(
+            title='Группа',
+            slug='page-cache-slug',
+            description='Описание',
+        )
+        cls.post = Post.objects.create(
+            text='Пост для кэша', author=cls.user, group=cls.group)
+        cls.urls = (
+            INDEX,
+            reverse('posts:group_list', args=[cls.group.slug]),
+            reverse('posts:profile', args=[cls.user.username]),
+            reverse('posts:post_detail', args=[cls.post.pk]),
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def test_guest_pages_served_from_cache(self):
+        """Повторный запрос гостя отдаётся из кэша без рендеринга."""
+        for url in self.urls:
+            with self.subTest(url=url):
+                first = self.client.get(url)
+                self.assertIsNotNone(first.context)
+                second = self.client.get(url)
+                self.assertIsNone(second.context)
+                self.assertEqual(second.content, first.content)
+                self.assertEqual(second['ETag'], first['ETag'])
+
+    def test_conditional_get(self):
+        """Повторный запрос с ETag или Last-Modified получает 304."""
+        for url in self.urls:
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertEqual(self.client.get(
+                    url, HTTP_IF_NONE_MATCH=response['ETag']
+                ).status_code, 304)
+                self.assertEqual(self.client.get(
+                    url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified']
+                ).status_code, 304)
+
+    def test_changes_refresh_cached_pages(self):
+        """После изменения данных гость получает новую страницу."""
+        etags = {url: self.client.get(url)['ETag'] for url in self.urls}
+        self.post.text = 'Исправленный пост'
+        self.post.save()
+        for url in self.urls:
+            with self.subTest(url=url):
+                response = self.client.get(
+                    url, HTTP_IF_NONE_MATCH=etags[url])
+                self.assertEqual(response.status_code, 200)
+                self.assertContains(response, 'Исправленный пост')
+
+    def test_authorized_pages_not_cached(self):
+        """Страницы пользователя не берутся из кэша гостей."""
+        self.client.force_login(self.user)
+        for url in self.urls:
+            with self.subTest(url=url):
+                self.client.get(url)
+                response = self.client.get(url)
+                self.assertIsNotNone(response.context)
+                self.assertFalse(response.has_header('ETag'))
+
+    def test_query_string_varies_cache(self):
+        """Разные параметры запроса кэшируются отдельно."""
+        Post.objects.bulk_create(
+            Post(text=f'Пост {i}', author=self.user) for i in range(12))
+        cache.clear()
+        first = self.client.get(INDEX)
+        second = self.client.get(INDEX + '?page=2')
+        self.assertIsNotNone(second.context)
+        self.assertNotEqual(first.content, second.content)
@@ -1,7 +1,9 @@
+from django.core.cache import cache
 from django.test import Client, TestCase
 from django.urls import reverse
 
 from posts.models import Comment, Post, User
+from posts.views import COUNT_COMMENTS
 
 
 class CommentTests(TestCase):
@@ -36,3 +38,57 @@ class CommentTests(TestCase):
         count_comments = Comment.objects.count()
         self.guest_client.post(CommentTests.comment_url)
         self.assertEqual(count_comments, Comment.objects.count())
+
+
+class CommentPaginationTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create(username='commenter')
+        cls.post = Post.objects.create(
+            text='Популярный пост', author=cls.user)
+        Comment.objects.bulk_create(
+            Comment(post=cls.post, author=cls.user, text=f'Комментарий {i}')
+            for i in range(COUNT_COMMENTS * 2 + 5)
+        )
+        cls.expected = list(
+            cls.post.comments.order_by('-created', '-pk'))
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+
+    def test_first_page_is_limited(self):
+        """На странице поста только первая порция комментариев."""
+        response = self.guest_client.get(
+            reverse('posts:post_detail', args=[self.post.pk]))
+        comments = response.context['comments']
+        self.assertEqual(list(comments), self.expected[:COUNT_COMMENTS])
+        self.assertContains(response, 'data-load-more')
+
+    def test_load_more_fragment(self):
+        """Фрагмент «Показать ещё» дочитывает ветку до конца."""
+        loaded = []
+        url = reverse('posts:post_detail', args=[self.post.pk])
+        comments = self.guest_client.get(url).context['comments']
+        loaded.extend(comments)
+        fragment_url = reverse('posts:post_comments', args=[self.post.pk])
+        while comments.next_cursor:
+            response = self.guest_client.get(
+                fragment_url, {'after': comments.next_cursor})
+            self.assertNotContains(response, '<html')
+            comments = response.context['comments']
+            loaded.extend(comments)
+        self.assertEqual(loaded, self.expected)
+        self.assertNotContains(response, 'data-load-more')
+
+    def test_fragment_query_count(self):
+        """Фрагмент читает порцию вместе с авторами одним запросом."""
+        first = self.guest_client.get(
+            reverse('posts:post_detail', args=[self.post.pk])
+        ).context['comments']
+        cache.clear()
+        with self.assertNumQueries(3):
+            self.guest_client.get(
+                reverse('posts:post_comments', args=[self.post.pk]),
+                {'after': first.next_cursor})
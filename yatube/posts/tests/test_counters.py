@@ -0,0 +1,84 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts import counters
+from posts.models import Group, Post, PostCounter, User
+from posts.paginators import CountedPaginator
+
+
+class PostCounterTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='counter')
+        cls.group = Group.objects.create(
+            title='Группа',
+            slug='counter-slug',
+            description='Описание',
+        )
+        cls.other_group = Group.objects.create(
+            title='Другая группа',
+            slug='counter-other',
+            description='Описание',
+        )
+        cls.post = Post.objects.create(
+            text='Первый пост', author=cls.user, group=cls.group)
+
+    def setUp(self):
+        self.client = Client()
+
+    def counts(self):
+        return (
+            counters.get_count(counters.ALL),
+            counters.get_count(counters.AUTHOR, self.user.pk),
+            counters.get_count(counters.GROUP, self.group.pk),
+            counters.get_count(counters.GROUP, self.other_group.pk),
+        )
+
+    def test_counters_follow_create_edit_delete(self):
+        """Счётчики обновляются при создании, переносе и удалении поста."""
+        self.assertEqual(self.counts(), (1, 1, 1, 0))
+        post = Post.objects.create(
+            text='Второй пост', author=self.user, group=self.group)
+        self.assertEqual(self.counts(), (2, 2, 2, 0))
+        post.group = self.other_group
+        post.save()
+        self.assertEqual(self.counts(), (2, 2, 1, 1))
+        post.delete()
+        self.assertEqual(self.counts(), (1, 1, 1, 0))
+
+    def test_paginator_reads_counter(self):
+        """Пагинатор берёт общее количество из счётчика без COUNT(*)."""
+        counters.get_count(counters.ALL)
+        paginator = CountedPaginator(
+            Post.objects.all(), 10, count_key=(counters.ALL, 0))
+        with self.assertNumQueries(1):
+            self.assertEqual(paginator.count, 1)
+
+    def test_profile_and_detail_show_counter(self):
+        """Профиль и страница поста показывают число постов автора."""
+        PostCounter.objects.update_or_create(
+            scope=counters.AUTHOR, key=self.user.pk,
+            defaults={'value': 42})
+        urls = (
+            reverse('posts:profile', args=[self.user.username]),
+            reverse('posts:post_detail', args=[self.post.pk]),
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertEqual(response.context['count'], 42)
+
+    def test_rebuild_command(self):
+        """Команда rebuild_counters пересчитывает счётчики."""
+        counters.get_count(counters.ALL)
+        Post.objects.bulk_create(
+            Post(text='Импорт', author=self.user, group=self.other_group)
+            for _ in range(3)
+        )
+        self.assertEqual(counters.get_count(counters.ALL), 1)
+        call_command('rebuild_counters', stdout=StringIO())
+        self.assertEqual(self.counts(), (4, 4, 1, 3))
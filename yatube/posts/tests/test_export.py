@@ -0,0 +1,128 @@
+import csv
+import io
+import json
+import os
+import shutil
+import tempfile
+import zipfile
+from unittest import mock
+
+from django.conf import settings
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts import export
+from posts.models import Comment, Group, Post, User
+
+TEMP_DIR = tempfile.mkdtemp(dir=settings.BASE_DIR)
+SMALL_GIF = (b'\x47\x49\x46\x38\x39\x61\x02\x00'
+             b'\x01\x00\x80\x00\x00\x00\x00\x00'
+             b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+             b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+             b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+             b'\x0A\x00\x3B')
+POSTS = 7
+
+
+@override_settings(MEDIA_ROOT=TEMP_DIR, THUMBNAIL_WORKERS=0)
+class ExportTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='exporter')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(
+            title='Группа', slug='export-group', description='Описание')
+        for i in range(POSTS):
+            post = Post.objects.create(
+                author=cls.author, text=f'Пост {i}',
+                group=cls.group if i % 2 else None)
+            Comment.objects.create(
+                post=post, author=cls.reader, text=f'Комментарий {i}')
+        cls.image_post = Post.objects.create(
+            author=cls.author, text='С картинкой',
+            image=SimpleUploadedFile(
+                'export.gif', SMALL_GIF, content_type='image/gif'))
+        cls.url = reverse('posts:profile_export', args=[cls.author.username])
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_DIR, ignore_errors=True)
+
+    def setUp(self):
+        self.client = Client()
+        self.client.force_login(self.author)
+
+    def content(self, response):
+        self.assertTrue(response.streaming)
+        return b''.join(response.streaming_content)
+
+    def test_jsonl_export(self):
+        """Владелец выгружает посты с комментариями в JSONL."""
+        response = self.client.get(self.url)
+        rows = [json.loads(line)
+                for line in self.content(response).decode().splitlines()]
+        posts = [row for row in rows if row['type'] == 'post']
+        self.assertEqual(len(posts), POSTS + 1)
+        self.assertEqual(rows[0]['type'], 'post')
+        self.assertEqual(
+            [row['slug'] for row in rows if row['type'] == 'group'],
+            [self.group.slug])
+        self.assertEqual(posts[0]['comments'][0]['author'], 'reader')
+        self.assertIn('attachment', response['Content-Disposition'])
+
+    def test_csv_export(self):
+        """В CSV комментарии идут строками после своего поста."""
+        response = self.client.get(self.url, {'format': 'csv'})
+        rows = list(csv.DictReader(
+            io.StringIO(self.content(response).decode())))
+        self.assertEqual(rows[0]['type'], 'post')
+        self.assertEqual(rows[1]['type'], 'comment')
+        self.assertEqual(rows[1]['post_id'], rows[0]['id'])
+
+    def test_zip_export(self):
+        """Архив содержит выгрузку и файлы картинок."""
+        response = self.client.get(self.url, {'images': '1'})
+        archive = zipfile.ZipFile(io.BytesIO(self.content(response)))
+        names = archive.namelist()
+        self.assertIn('posts.jsonl', names)
+        self.assertIn(f'media/{self.image_post.image.name}', names)
+        self.assertEqual(
+            archive.read(f'media/{self.image_post.image.name}'), SMALL_GIF)
+
+    def test_zip_reads_image_storage(self):
+        """Картинки читаются из хранилища поля, а не из default_storage."""
+        storage = Post._meta.get_field('image').storage
+        with mock.patch.object(storage, 'open', wraps=storage.open) as open_:
+            response = self.client.get(self.url, {'images': '1'})
+            self.content(response)
+        open_.assert_called_once_with(self.image_post.image.name)
+
+    def test_only_owner(self):
+        """Чужие посты выгрузить нельзя."""
+        self.client.force_login(self.reader)
+        self.assertEqual(self.client.get(self.url).status_code, 403)
+
+    def test_chunks_keep_queries_bounded(self):
+        """Один запрос постов и по запросу комментариев на порцию."""
+        posts = export.sources(author=self.author)
+        # Пустой архив стоит одного запроса.
+        with self.assertNumQueries(1 + 1 + 3):
+            rows = list(export.records(posts, chunk_size=3))
+        self.assertEqual(
+            len([row for row in rows if row['type'] == 'post']), POSTS + 1)
+
+    def test_command(self):
+        """Команда выгружает группу в файл и в stdout."""
+        out = io.StringIO()
+        call_command('export_content', '--group', self.group.slug, stdout=out)
+        rows = [json.loads(line) for line in out.getvalue().splitlines()]
+        self.assertEqual(rows[0]['type'], 'group')
+        self.assertEqual(len(rows), 1 + POSTS // 2)
+        path = os.path.join(TEMP_DIR, 'author.zip')
+        call_command('export_content', '--author', self.author.username,
+                     '--images', '--output', path)
+        self.assertTrue(zipfile.is_zipfile(path))
@@ -0,0 +1,85 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts import feed
+from posts.models import FeedEntry, Follow, Post, User
+
+FOLLOW_URL = reverse('posts:follow_index')
+
+
+class FeedTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.reader = User.objects.create_user(username='reader')
+        cls.author = User.objects.create_user(username='writer')
+        cls.star = User.objects.create_user(username='star')
+        cls.old_post = Post.objects.create(
+            text='Старый пост', author=cls.author)
+
+    def setUp(self):
+        self.client = Client()
+        self.client.force_login(self.reader)
+
+    def feed(self, query=''):
+        return self.client.get(FOLLOW_URL + query).context['page_obj']
+
+    def test_follow_backfills_and_unfollow_trims(self):
+        """Подписка заполняет ленту, отписка её очищает."""
+        self.client.get(
+            reverse('posts:profile_follow', args=[self.author.username]))
+        self.assertEqual(list(self.feed()), [self.old_post])
+        self.client.get(
+            reverse('posts:profile_unfollow', args=[self.author.username]))
+        self.assertFalse(FeedEntry.objects.filter(user=self.reader).exists())
+        self.assertEqual(list(self.feed()), [])
+
+    def test_new_post_fans_out(self):
+        """Новый пост попадает в ленты подписчиков."""
+        Follow.objects.create(user=self.reader, author=self.author)
+        post = Post.objects.create(text='Новый пост', author=self.author)
+        self.assertTrue(
+            FeedEntry.objects.filter(user=self.reader, post=post).exists())
+        self.assertEqual(list(self.feed()), [post, self.old_post])
+
+    @override_settings(FEED_PULL_LIMIT=1, FEED_PUSH_LIMIT=0)
+    def test_popular_author_is_pulled(self):
+        """Посты популярного автора читаются на лету и сливаются с лентой."""
+        other = User.objects.create_user(username='other')
+        Follow.objects.create(user=other, author=self.star)
+        Follow.objects.create(user=self.reader, author=self.star)
+        Follow.objects.create(user=self.reader, author=self.author)
+        star_post = Post.objects.create(text='Звезда', author=self.star)
+        new_post = Post.objects.create(text='Новый пост', author=self.author)
+        self.assertFalse(FeedEntry.objects.filter(post=star_post).exists())
+        expected = [new_post, star_post, self.old_post]
+        self.assertEqual(list(self.feed()), expected)
+        self.assertEqual(list(self.feed('?page=1')), expected)
+
+    @override_settings(FEED_PULL_LIMIT=2, FEED_PUSH_LIMIT=1)
+    def test_pulled_author_returns_only_below_push_limit(self):
+        """У границы автор остаётся на чтении на лету, к раскладке его
+        возвращает rebuild_feeds --returning."""
+        others = [User.objects.create_user(username=f'fan{i}')
+                  for i in range(2)]
+        for user in others:
+            Follow.objects.create(user=user, author=self.star)
+        Follow.objects.create(user=self.reader, author=self.star)
+        self.assertTrue(feed.is_pulled(self.star.pk))
+        Follow.objects.filter(user=others[0], author=self.star).delete()
+        Follow.objects.create(user=others[0], author=self.star)
+        Follow.objects.filter(user=others[0], author=self.star).delete()
+        self.assertTrue(feed.is_pulled(self.star.pk))
+        self.assertFalse(FeedEntry.objects.filter(author=self.star).exists())
+        star_post = Post.objects.create(text='Звезда', author=self.star)
+        call_command('rebuild_feeds', returning=True, stdout=StringIO())
+        self.assertTrue(feed.is_pulled(self.star.pk))
+        Follow.objects.filter(user=others[1], author=self.star).delete()
+        call_command('rebuild_feeds', returning=True, stdout=StringIO())
+        self.assertFalse(feed.is_pulled(self.star.pk))
+        self.assertTrue(FeedEntry.objects.filter(
+            user=self.reader, post=star_post).exists())
+        self.assertEqual(list(self.feed()), [star_post])
@@ -0,0 +1,94 @@
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+from django.utils.http import parse_http_date
+
+from posts.models import Group, Post, User
+
+
+class FeedTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='writer')
+        cls.other = User.objects.create_user(username='other')
+        cls.group = Group.objects.create(
+            title='Новости', slug='news', description='Описание группы')
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.group_post = Post.objects.create(
+            author=self.author, text='Пост в группе', group=self.group)
+        self.other_post = Post.objects.create(
+            author=self.other, text='Пост без группы')
+
+    def test_feeds(self):
+        """Ленты содержат только посты своей области."""
+        cases = (
+            ('posts:feed_rss', (), 'application/rss+xml',
+             [self.group_post, self.other_post]),
+            ('posts:group_atom', (self.group.slug,), 'application/atom+xml',
+             [self.group_post]),
+            ('posts:profile_rss', (self.other.username,),
+             'application/rss+xml', [self.other_post]),
+        )
+        for name, args, content_type, posts in cases:
+            with self.subTest(name=name):
+                response = self.client.get(reverse(name, args=args))
+                self.assertTrue(response['Content-Type'].startswith(
+                    content_type))
+                for post in Post.objects.all():
+                    url = reverse('posts:post_detail', args=[post.pk])
+                    if post in posts:
+                        self.assertContains(response, url)
+                    else:
+                        self.assertNotContains(response, url)
+
+    def test_conditional_get(self):
+        """Повторный опрос с ETag или Last-Modified получает 304."""
+        url = reverse('posts:feed_atom')
+        response = self.client.get(url)
+        self.assertIn('Last-Modified', response)
+        etag = response['ETag']
+        with self.assertNumQueries(0):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        response = self.client.get(
+            url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified'])
+        self.assertEqual(response.status_code, 304)
+
+    def test_last_modified_follows_changes(self):
+        """Last-Modified — время изменения данных ленты, а не дата
+        самого свежего поста: правка старого поста его сдвигает."""
+        url = reverse('posts:group_rss', args=[self.group.slug])
+        last_modified = self.client.get(url)['Last-Modified']
+        later = parse_http_date(last_modified) + 10
+        with mock.patch('posts.caching.time.time', lambda: later):
+            self.group_post.text = 'Исправленный пост'
+            self.group_post.save()
+            response = self.client.get(
+                url, HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertContains(response, 'Исправленный пост')
+        self.assertEqual(parse_http_date(response['Last-Modified']), later)
+
+    def test_invalidation(self):
+        """Новый и изменённый пост сразу попадают в ленту группы."""
+        url = reverse('posts:group_rss', args=[self.group.slug])
+        etag = self.client.get(url)['ETag']
+        post = Post.objects.create(
+            author=self.other, text='Свежая новость', group=self.group)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertContains(response, 'Свежая новость')
+        etag = response['ETag']
+        post.text = 'Исправленная новость'
+        post.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertContains(response, 'Исправленная новость')
+
+    def test_unknown_group(self):
+        """Лента несуществующей группы отвечает 404."""
+        response = self.client.get(reverse('posts:group_rss', args=['none']))
+        self.assertEqual(response.status_code, 404)
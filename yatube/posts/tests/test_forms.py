@@ -1,3 +1,4 @@
+import hashlib
 import shutil
 import tempfile
 
@@ -16,12 +17,14 @@ SMALL_GIF = (b'\x47\x49\x46\x38\x39\x61\x02\x00'
              b'\x00\x00\x00\x2C\x00\x00\x00\x00'
              b'\x02\x00\x01\x00\x00\x02\x02\x0C'
              b'\x0A\x00\x3B')
+SMALL_GIF_HASH = hashlib.sha256(SMALL_GIF).hexdigest()
+SMALL_GIF_NAME = f'posts/{SMALL_GIF_HASH[:2]}/{SMALL_GIF_HASH}.gif'
 
 USERNAME = 'post_author'
 INDEX_URL = reverse('posts:index')
 
 
-@override_settings(MEDIA_ROOT=TEMP_DIR)
+@override_settings(MEDIA_ROOT=TEMP_DIR, THUMBNAIL_WORKERS=0)
 class PostCreateFormTests(TestCase):
     @classmethod
     def setUpClass(cls):
@@ -76,7 +79,7 @@ class PostCreateFormTests(TestCase):
                 author='1',
                 text='Тестовый текст',
                 group='1',
-                image='posts/small.gif',
+                image=SMALL_GIF_NAME,
             ).exists()
         )
 
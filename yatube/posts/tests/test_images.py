@@ -0,0 +1,97 @@
+import os
+import shutil
+import tempfile
+from io import BytesIO, StringIO
+
+from django.conf import settings
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from PIL import Image
+
+from posts.models import Post, User
+
+TEMP_DIR = tempfile.mkdtemp(dir=settings.BASE_DIR)
+SMALL_GIF = (b'\x47\x49\x46\x38\x39\x61\x02\x00'
+             b'\x01\x00\x80\x00\x00\x00\x00\x00'
+             b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+             b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+             b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+             b'\x0A\x00\x3B')
+
+
+def photo(size, orientation=None):
+    """JPEG с EXIF: модель камеры и, при необходимости, поворот."""
+    exif = Image.Exif()
+    exif[0x0110] = 'Camera'
+    if orientation:
+        exif[0x0112] = orientation
+    output = BytesIO()
+    Image.new('RGB', size, 'red').save(
+        output, 'JPEG', quality=100, exif=exif.tobytes())
+    return output.getvalue()
+
+
+@override_settings(MEDIA_ROOT=TEMP_DIR, THUMBNAIL_WORKERS=0,
+                   IMAGE_MAX_SIZE=200)
+class ImageNormalizeTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='photographer')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_DIR, ignore_errors=True)
+
+    def setUp(self):
+        self.client = Client()
+        self.client.force_login(self.user)
+
+    def upload(self, name, content):
+        self.client.post(reverse('posts:post_create'), {
+            'text': name,
+            'image': SimpleUploadedFile(name, content, 'image/jpeg'),
+        })
+        return Post.objects.get(text=name).image
+
+    def test_upload_normalized(self):
+        """Оригинал повёрнут, уменьшен и сохранён без EXIF."""
+        image = self.upload('photo.jpg', photo((400, 300), orientation=6))
+        self.assertTrue(image.name.endswith('.jpg'))
+        with Image.open(image.path) as saved:
+            self.assertEqual(saved.format, 'JPEG')
+            self.assertEqual(saved.size, (150, 200))
+            self.assertFalse(saved.getexif())
+
+    def test_small_gif_untouched(self):
+        """Маленький файл без метаданных сохраняется как есть."""
+        image = self.upload('tiny.gif', SMALL_GIF)
+        with open(image.path, 'rb') as saved:
+            self.assertEqual(saved.read(), SMALL_GIF)
+
+    def test_command(self):
+        """Команда нормализует уже загруженные файлы и считает
+        экономию; пробный прогон ничего не меняет."""
+        os.makedirs(os.path.join(TEMP_DIR, 'posts'), exist_ok=True)
+        path = os.path.join(TEMP_DIR, 'posts', 'old.jpg')
+        with open(path, 'wb') as file:
+            file.write(photo((800, 600)))
+        Post.objects.create(author=self.user, text='Старое фото',
+                            image='posts/old.jpg')
+        size = os.path.getsize(path)
+        out = StringIO()
+        call_command('normalize_images', dry_run=True, stdout=out)
+        self.assertIn('изменено: 1', out.getvalue())
+        self.assertEqual(os.path.getsize(path), size)
+        out = StringIO()
+        call_command('normalize_images', stdout=out)
+        self.assertIn('Диск:', out.getvalue())
+        image = Post.objects.get(text='Старое фото').image
+        self.assertNotEqual(image.name, 'posts/old.jpg')
+        self.assertFalse(os.path.exists(path))
+        self.assertLess(image.size, size)
+        with Image.open(image.path) as saved:
+            self.assertEqual(saved.size, (200, 150))
@@ -0,0 +1,156 @@
+import io
+import json
+import os
+import shutil
+import tempfile
+from unittest import mock
+
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+
+from posts import counters, fulltext
+from posts.importer import Importer
+from posts.models import FeedEntry, Follow, Group, Post, User
+
+ROWS = [
+    {'type': 'group', 'slug': 'travel', 'title': 'Путешествия'},
+    {'type': 'post', 'author': 'leo', 'text': 'Поездка на Байкал',
+     'group': 'travel', 'pub_date': '2015-06-01T10:00:00+00:00'},
+    {'type': 'post', 'author': 'anna', 'text': 'Пост без группы'},
+    {'type': 'follow', 'user': 'anna', 'author': 'leo'},
+    {'type': 'post', 'author': 'leo', 'text': 'Новая группа',
+     'group': 'cooking'},
+    {'type': 'unknown'},
+    {'type': 'post', 'author': 'anna', 'text': 'Ещё один пост'},
+]
+
+
+class ImportContentTests(TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'content.jsonl')
+        with open(self.path, 'w', encoding='utf-8') as stream:
+            for row in ROWS:
+                stream.write(json.dumps(row, ensure_ascii=False) + '\n')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def run_import(self, *args, path=None):
+        out, err = io.StringIO(), io.StringIO()
+        call_command('import_content', path or self.path, *args,
+                     stdout=out, stderr=err)
+        return out.getvalue(), err.getvalue()
+
+    def test_import(self):
+        """Импорт создаёт объекты и пересчитывает производные данные."""
+        out, err = self.run_import('--batch-size', '2')
+        self.assertIn('строк/с', out)
+        self.assertIn('Строка 6', err)
+        self.assertEqual(Post.objects.count(), 4)
+        self.assertEqual(
+            set(Group.objects.values_list('slug', flat=True)),
+            {'travel', 'cooking'})
+        leo = User.objects.get(username='leo')
+        self.assertFalse(leo.has_usable_password())
+        post = Post.objects.get(text='Поездка на Байкал')
+        self.assertEqual(post.pub_date.year, 2015)
+        self.assertEqual(post.group.title, 'Путешествия')
+        self.assertTrue(Follow.objects.filter(
+            user__username='anna', author=leo).exists())
+        self.assertEqual(counters.get_count(counters.AUTHOR, leo.pk), 2)
+        self.assertEqual(FeedEntry.objects.filter(
+            user__username='anna').count(), 2)
+        self.assertEqual(
+            list(fulltext.search_posts('Байкал')[:1]), [post])
+
+    def test_non_string_values(self):
+        """Значения не тех типов в JSON — ошибки строк, а не сбой импорта."""
+        path = os.path.join(self.directory, 'types.jsonl')
+        rows = [
+            {'type': 'post', 'author': 'a', 'text': 5},
+            {'type': 1},
+            {'type': 'post', 'author': 'a', 'text': 'Пост', 'group': []},
+            {'type': 'post', 'author': 'a', 'text': 'Пост',
+             'pub_date': 2015},
+            {'type': 'post', 'author': 'a', 'text': 'Целый пост'},
+        ]
+        with open(path, 'w', encoding='utf-8') as stream:
+            for row in rows:
+                stream.write(json.dumps(row) + '\n')
+        _, err = self.run_import('--skip-rebuild', path=path)
+        for line in range(1, 5):
+            self.assertIn(f'Строка {line}', err)
+        self.assertIn('поле text должно быть строкой', err)
+        self.assertIn('поле type должно быть строкой', err)
+        self.assertEqual(
+            list(Post.objects.values_list('text', flat=True)),
+            ['Целый пост'])
+
+    def test_concurrent_post_keeps_auto_date(self):
+        """Импорт не отключает дату по умолчанию у постов, которые
+        сохраняются одновременно с ним."""
+        insert = Post.objects._insert
+        saved = []
+
+        def insert_with_concurrent_post(*args, **kwargs):
+            author = User.objects.get_or_create(username='live')[0]
+            saved.append(Post.objects.create(author=author, text='Живой'))
+            return insert(*args, **kwargs)
+
+        with mock.patch.object(Post.objects, '_insert',
+                               insert_with_concurrent_post):
+            self.run_import('--skip-rebuild')
+        self.assertTrue(saved)
+        self.assertEqual(
+            Post.objects.get(pk=saved[0].pk).pub_date.date(),
+            timezone.now().date())
+        self.assertEqual(Post.objects.get(
+            text='Поездка на Байкал').pub_date.year, 2015)
+
+    def test_resume_after_crash(self):
+        """После сбоя импорт продолжается без повторов."""
+        save_posts = Importer.save_posts
+        calls = []
+
+        def crash_on_third_batch(importer, rows):
+            calls.append(rows)
+            if len(calls) == 3:
+                raise RuntimeError('сбой')
+            return save_posts(importer, rows)
+
+        with mock.patch.object(Importer, 'save_posts', crash_on_third_batch):
+            with self.assertRaises(RuntimeError):
+                self.run_import('--batch-size', '2', '--skip-rebuild')
+        self.assertEqual(Post.objects.count(), 2)
+        self.run_import('--batch-size', '2')
+        self.assertEqual(Post.objects.count(), 4)
+        self.assertEqual(Follow.objects.count(), 1)
+        out, _ = self.run_import('--batch-size', '2')
+        self.assertEqual(Post.objects.count(), 4)
+        self.assertIn('Строк: 0', out)
+
+    def test_large_batch(self):
+        """Пачка больше предела SQLite на один INSERT записывается."""
+        path = os.path.join(self.directory, 'large.jsonl')
+        with open(path, 'w', encoding='utf-8') as stream:
+            for i in range(1200):
+                stream.write(json.dumps(
+                    {'type': 'post', 'author': f'user{i % 600}',
+                     'text': f'Пост {i}'}) + '\n')
+        self.run_import('--skip-rebuild', path=path)
+        self.assertEqual(Post.objects.count(), 1200)
+        self.assertEqual(User.objects.count(), 600)
+
+    def test_csv(self):
+        """CSV читается с теми же колонками, что и JSONL."""
+        path = os.path.join(self.directory, 'posts.csv')
+        with open(path, 'w', encoding='utf-8', newline='') as stream:
+            stream.write('type,author,text,group,slug,title\n')
+            stream.write('group,,,,news,Новости\n')
+            stream.write('post,leo,"Текст, с запятой",news,,\n')
+        self.run_import(path=path)
+        post = Post.objects.get()
+        self.assertEqual(post.text, 'Текст, с запятой')
+        self.assertEqual(post.group.slug, 'news')
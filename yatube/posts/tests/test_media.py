@@ -0,0 +1,117 @@
+import os
+import shutil
+import tempfile
+from io import StringIO
+from unittest import mock
+
+from django.conf import settings
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+from posts import media
+from posts.models import ArchivedPost, Post, User
+
+TEMP_DIR = tempfile.mkdtemp(dir=settings.BASE_DIR)
+SMALL_GIF = (b'\x47\x49\x46\x38\x39\x61\x02\x00'
+             b'\x01\x00\x80\x00\x00\x00\x00\x00'
+             b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+             b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+             b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+             b'\x0A\x00\x3B')
+OTHER_GIF = SMALL_GIF.replace(b'\xFF\xFF\xFF', b'\x00\xFF\x00')
+
+
+def run_on_commit(func):
+    func()
+
+
+@override_settings(MEDIA_ROOT=TEMP_DIR, THUMBNAIL_WORKERS=0,
+                   MEDIA_RELEASE_GRACE=0)
+@mock.patch('posts.media.transaction.on_commit', run_on_commit)
+class ContentAddressedMediaTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='meme_lord')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_DIR, ignore_errors=True)
+
+    def create(self, name, content=SMALL_GIF):
+        return Post.objects.create(
+            author=self.user, text=name,
+            image=SimpleUploadedFile(name, content, 'image/gif'))
+
+    def legacy(self, name, content=SMALL_GIF):
+        path = os.path.join(TEMP_DIR, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as file:
+            file.write(content)
+        return path
+
+    def test_identical_uploads_share_file(self):
+        """Одинаковые загрузки получают одно имя и один файл."""
+        first = self.create('meme.gif')
+        second = self.create('meme-copy.gif')
+        self.assertEqual(first.image.name, second.image.name)
+        self.assertTrue(media.ADDRESSED.match(first.image.name))
+        self.assertNotEqual(
+            self.create('other.gif', OTHER_GIF).image.name, first.image.name)
+        self.assertEqual(
+            [name for name in media.stored_names()
+             if name == first.image.name], [first.image.name])
+
+    def test_delete_last_reference(self):
+        """Файл удаляется вместе с последним постом, который на него
+        ссылается, в том числе из архива."""
+        first = self.create('meme.gif')
+        second = self.create('meme-copy.gif')
+        name = first.image.name
+        ArchivedPost.objects.create(
+            id=10000, author=self.user, text='Архив', image=name,
+            pub_date=first.pub_date)
+        first.delete()
+        self.assertTrue(media.storage().exists(name))
+        second.delete()
+        self.assertTrue(media.storage().exists(name))
+        ArchivedPost.objects.get(pk=10000).delete()
+        self.assertFalse(media.storage().exists(name))
+
+    def test_replace_image(self):
+        """Заменённая картинка удаляется, если больше никому не нужна."""
+        post = self.create('meme.gif')
+        old_name = post.image.name
+        post = Post.objects.get(pk=post.pk)
+        post.image = SimpleUploadedFile('new.gif', OTHER_GIF, 'image/gif')
+        post.save()
+        self.assertFalse(media.storage().exists(old_name))
+        self.assertTrue(media.storage().exists(post.image.name))
+
+    @override_settings(MEDIA_RELEASE_GRACE=60)
+    def test_fresh_file_kept(self):
+        """Только что записанный файл не удаляется: ссылка на него может
+        быть ещё не сохранена."""
+        name = self.create('meme.gif').image.name
+        Post.objects.filter(image=name).delete()
+        self.assertTrue(media.storage().exists(name))
+        self.assertTrue(media.release(name, grace=0))
+
+    def test_dedupe_command(self):
+        """Команда переводит старые файлы на имена по содержимому,
+        сводит дубликаты и удаляет файлы без ссылок."""
+        old_paths = [self.legacy('posts/a.gif'), self.legacy('posts/b.gif')]
+        orphan = self.legacy('posts/orphan.gif', OTHER_GIF)
+        for name in ('posts/a.gif', 'posts/b.gif'):
+            Post.objects.create(author=self.user, text=name, image=name)
+        out = StringIO()
+        call_command('dedupe_media', stdout=out)
+        self.assertIn('Переименовано: 2, из них дубликатов: 1', out.getvalue())
+        self.assertIn('удалено файлов без ссылок: 1', out.getvalue())
+        names = set(Post.objects.values_list('image', flat=True))
+        self.assertEqual(len(names), 1)
+        self.assertTrue(media.ADDRESSED.match(names.pop()))
+        for path in old_paths + [orphan]:
+            self.assertFalse(os.path.exists(path))
@@ -0,0 +1,126 @@
+import time
+
+from django.core.cache import cache
+from django.template.loader import render_to_string
+from django.test import Client, RequestFactory, TestCase
+from django.urls import reverse
+
+from posts import counters
+from posts.models import Group, Post, PostCounter, User
+from posts.paginators import (CountedPaginator, decode_cursor,
+                              elided_page_range, encode_cursor)
+from posts.views import COUNTP
+
+POST_TEST = 25
+INDEX = reverse('posts:index')
+
+
+class KeysetPaginatorTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='keyset')
+        cls.group = Group.objects.create(
+            title='Группа',
+            slug='keyset-slug',
+            description='Описание',
+        )
+        Post.objects.bulk_create(
+            Post(author=cls.user, text=f'Пост {i}', group=cls.group)
+            for i in range(POST_TEST)
+        )
+        cls.expected = list(Post.objects.order_by('-pub_date', '-pk'))
+
+    def setUp(self):
+        self.client = Client()
+        cache.clear()
+
+    def test_cursor_round_trip(self):
+        """Курсор кодируется и раскодируется без потерь."""
+        post = self.expected[0]
+        self.assertEqual(
+            decode_cursor(encode_cursor(post)), (post.pub_date, post.pk)
+        )
+        self.assertIsNone(decode_cursor('испорчен'))
+        self.assertIsNone(decode_cursor(''))
+
+    def test_walk_forward_and_back(self):
+        """По курсорам лента проходится вперёд и назад без пропусков."""
+        pages = []
+        url = INDEX
+        while url:
+            page_obj = self.client.get(url).context['page_obj']
+            pages.append(list(page_obj))
+            url = (f'{INDEX}?after={page_obj.next_cursor}'
+                   if page_obj.next_cursor else None)
+        walked = [post for page in pages for post in page]
+        self.assertEqual(walked, self.expected)
+        self.assertEqual(len(pages[0]), COUNTP)
+
+        cache.clear()
+        last = self.client.get(
+            f'{INDEX}?after={encode_cursor(self.expected[COUNTP - 1])}'
+        ).context['page_obj']
+        previous = self.client.get(
+            f'{INDEX}?before={last.previous_cursor}'
+        ).context['page_obj']
+        self.assertEqual(list(previous), self.expected[:COUNTP])
+        self.assertIsNone(previous.previous_cursor)
+
+    def test_keyset_page_skips_count(self):
+        """Страница по курсору не выполняет COUNT(*)."""
+        page_obj = self.client.get(INDEX).context['page_obj']
+        after = page_obj.next_cursor
+        with self.assertNumQueries(1):
+            page_obj.paginator.get_keyset_page(after=after)
+
+    def test_legacy_page_number(self):
+        """Старые ссылки ?page=N продолжают работать."""
+        response = self.client.get(
+            reverse('posts:group_list', args=[self.group.slug]) + '?page=2'
+        )
+        page_obj = response.context['page_obj']
+        self.assertEqual(page_obj.number, 2)
+        self.assertEqual(list(page_obj), self.expected[COUNTP:COUNTP * 2])
+
+    def test_broken_cursor_shows_first_page(self):
+        """Испорченный курсор открывает первую страницу."""
+        response = self.client.get(f'{INDEX}?after=!!!')
+        self.assertEqual(
+            list(response.context['page_obj']), self.expected[:COUNTP]
+        )
+
+
+class PageWindowTests(TestCase):
+    def test_elided_page_range(self):
+        """В навигации края, окно вокруг текущей страницы и пропуски."""
+        self.assertEqual(elided_page_range(5, 3), [1, 2, 3, 4, 5])
+        self.assertEqual(
+            elided_page_range(20000, 10000),
+            [1, None, 9998, 9999, 10000, 10001, 10002, None, 20000])
+        self.assertEqual(
+            elided_page_range(100, 1), [1, 2, 3, None, 100])
+        self.assertEqual(
+            elided_page_range(100, 4), [1, 2, 3, 4, 5, 6, None, 100])
+        self.assertEqual(elided_page_range(1, 1), [1])
+
+    def test_large_page_count_renders_fast(self):
+        """Страница из 20 000 не выводит 20 000 ссылок."""
+        pages = 20000
+        counters.get_count(counters.ALL)
+        PostCounter.objects.filter(scope=counters.ALL).update(
+            value=pages * COUNTP)
+        paginator = CountedPaginator(
+            Post.objects.all(), COUNTP, count_key=(counters.ALL, 0))
+        page_obj = paginator.get_page(pages // 2)
+        request = RequestFactory().get(INDEX, {'page': pages // 2})
+        started = time.perf_counter()
+        html = render_to_string(
+            'posts/includes/paginator.html',
+            {'page_obj': page_obj}, request=request)
+        elapsed = time.perf_counter() - started
+        self.assertEqual(paginator.num_pages, pages)
+        self.assertLessEqual(html.count('class="page-link"'), 13)
+        self.assertIn(f'?page={pages}', html)
+        self.assertLess(len(html), 5000)
+        self.assertLess(elapsed, 0.5)
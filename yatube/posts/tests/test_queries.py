@@ -0,0 +1,96 @@
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts import archive, counters
+from posts.models import Comment, Follow, Group, Post, User
+
+POSTS = 10
+
+# Запросы на страницу гостя и пользователя при прогретых счётчиках и
+# горизонте архива; гостю добавляется поиск областей кэша страницы,
+# пользователю — сессия, сам пользователь и проверки подписки.
+BUDGETS = {
+    'posts:index': (1, 3),
+    'posts:group_list': (3, 4),
+    'posts:profile': (4, 6),
+    'posts:post_detail': (4, 5),
+}
+
+
+class QueryBudgetTests(TestCase):
+    """Число запросов страницы не зависит от числа записей на ней."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(
+            username='budget', first_name='Имя', last_name='Фамилия')
+        cls.reader = User.objects.create_user(username='budget_reader')
+        Follow.objects.create(user=cls.reader, author=cls.user)
+        cls.group = Group.objects.create(
+            title='Группа',
+            slug='budget-slug',
+            description='Описание',
+        )
+        for i in range(POSTS):
+            Post.objects.create(
+                text=f'Пост {i}', author=cls.user, group=cls.group)
+        cls.post = Post.objects.latest('pub_date')
+        for i in range(POSTS):
+            commenter = User.objects.create_user(username=f'commenter{i}')
+            Comment.objects.create(
+                post=cls.post, author=commenter, text=f'Комментарий {i}')
+        counters.get_count(counters.ALL)
+        counters.get_count(counters.AUTHOR, cls.user.pk)
+        counters.get_count(counters.GROUP, cls.group.pk)
+
+    def setUp(self):
+        cache.clear()
+        archive.horizon()
+        self.guest_client = Client()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.reader)
+        self.urls = {
+            'posts:index': reverse('posts:index'),
+            'posts:group_list':
+                reverse('posts:group_list', args=[self.group.slug]),
+            'posts:profile':
+                reverse('posts:profile', args=[self.user.username]),
+            'posts:post_detail':
+                reverse('posts:post_detail', args=[self.post.pk]),
+        }
+
+    def assertBudget(self, client, url, budget):
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertLessEqual(
+            len(queries), budget,
+            '\n'.join(query['sql'] for query in queries.captured_queries)
+        )
+
+    def test_guest_budgets(self):
+        """Страницы для гостя укладываются в бюджет запросов."""
+        for name, (budget, _) in BUDGETS.items():
+            with self.subTest(name=name):
+                self.assertBudget(self.guest_client, self.urls[name], budget)
+
+    def test_authorized_budgets(self):
+        """Страницы для пользователя укладываются в бюджет запросов."""
+        for name, (_, budget) in BUDGETS.items():
+            with self.subTest(name=name):
+                self.assertBudget(
+                    self.authorized_client, self.urls[name], budget)
+
+    def test_follow_index_budget(self):
+        """Лента подписок укладывается в бюджет запросов."""
+        self.assertBudget(self.authorized_client,
+                          reverse('posts:follow_index'), 4)
+
+    def test_legacy_page_budget(self):
+        """Старая постраничная навигация не добавляет COUNT(*)."""
+        self.assertBudget(self.guest_client,
+                          reverse('posts:index') + '?page=1', 2)
@@ -0,0 +1,121 @@
+from unittest import skipUnless
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts import counters
+from posts.models import Comment, Follow, Group, Post, User
+from posts.paginators import encode_cursor
+
+POSTS = 15
+
+
+@skipUnless(connection.vendor == 'sqlite', 'EXPLAIN QUERY PLAN из SQLite')
+class QueryPlanTests(TestCase):
+    """Запросы лент идут по индексам, без полного обхода и сортировки.
+
+    Планы берутся для всех SELECT, которые выполнили страницы: запрос с
+    WHERE должен искать по индексу (SEARCH), запрос без условий может
+    только читать индекс по порядку, и нигде нет USE TEMP B-TREE.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='planner')
+        cls.popular = User.objects.create_user(username='popular')
+        cls.reader = User.objects.create_user(username='plan_reader')
+        cls.group = Group.objects.create(
+            title='Группа', slug='plan-group', description='Описание')
+        for i in range(POSTS):
+            Post.objects.create(author=cls.author, text=f'Пост {i}',
+                                group=cls.group if i % 2 else None)
+            Post.objects.create(author=cls.popular, text=f'Популярное {i}')
+        cls.post = Post.objects.filter(author=cls.author).latest('pub_date')
+        for i in range(POSTS):
+            Comment.objects.create(
+                post=cls.post, author=cls.reader, text=f'Комментарий {i}')
+        Follow.objects.create(user=cls.reader, author=cls.author)
+        Follow.objects.create(user=cls.reader, author=cls.popular)
+        cls.middle = Post.objects.filter(
+            author=cls.author).order_by('-pub_date')[5]
+        cls.comment = cls.post.comments.order_by('-created')[5]
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.reader)
+
+    def plans(self, client, url, params=None):
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get(url, params)
+        self.assertEqual(response.status_code, 200)
+        with connection.cursor() as cursor:
+            for query in queries.captured_queries:
+                sql = query['sql']
+                if not sql.startswith('SELECT'):
+                    continue
+                cursor.execute('EXPLAIN QUERY PLAN ' + sql)
+                yield sql, [row[-1] for row in cursor.fetchall()]
+
+    def assertIndexedPlans(self, client, url, params=None):
+        for sql, plan in self.plans(client, url, params):
+            details = '\n'.join([sql] + plan)
+            for step in plan:
+                self.assertNotIn('TEMP B-TREE', step, details)
+                if step.startswith('SCAN'):
+                    self.assertNotIn(' WHERE ', sql, details)
+                    self.assertIn('USING', step, details)
+
+    def test_post_feeds(self):
+        """Главная, группа и профиль: первая, следующая и старая
+        постраничная выдача."""
+        cursor = encode_cursor(self.middle)
+        for url in (
+            reverse('posts:index'),
+            reverse('posts:group_list', args=[self.group.slug]),
+            reverse('posts:profile', args=[self.author.username]),
+        ):
+            for params in ({}, {'after': cursor}, {'before': cursor},
+                           {'page': 2}):
+                with self.subTest(url=url, params=params):
+                    self.assertIndexedPlans(self.guest_client, url, params)
+
+    def test_comments(self):
+        """Комментарии поста и их догрузка."""
+        self.assertIndexedPlans(
+            self.guest_client,
+            reverse('posts:post_detail', args=[self.post.pk]))
+        self.assertIndexedPlans(
+            self.guest_client,
+            reverse('posts:post_comments', args=[self.post.pk]),
+            {'after': encode_cursor(self.comment, 'created')})
+
+    @override_settings(FEED_PULL_LIMIT=1, FEED_PUSH_LIMIT=0)
+    def test_follow_feed(self):
+        """Лента подписок вместе с постами авторов, читаемых на лету."""
+        Follow.objects.create(user=self.author, author=self.popular)
+        counters.rebuild_counts()
+        url = reverse('posts:follow_index')
+        for params in ({}, {'after': encode_cursor(self.middle)}):
+            with self.subTest(params=params):
+                self.assertIndexedPlans(self.authorized_client, url, params)
+
+    def test_feed_indexes(self):
+        """Ленты группы и автора читают составные индексы."""
+        cases = (
+            (reverse('posts:group_list', args=[self.group.slug]),
+             'post_group_date'),
+            (reverse('posts:profile', args=[self.author.username]),
+             'post_author_date'),
+        )
+        for url, index in cases:
+            with self.subTest(url=url):
+                plans = '\n'.join(
+                    step for _, plan in self.plans(self.guest_client, url)
+                    for step in plan)
+                self.assertIn(f'USING INDEX {index}', plans)
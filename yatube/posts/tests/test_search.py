@@ -0,0 +1,109 @@
+from django.contrib.admin.sites import site
+from django.core.cache import cache
+from django.test import Client, RequestFactory, TestCase
+from django.urls import reverse
+
+from posts import fulltext
+from posts.models import Comment, Group, Post, User
+from posts.views import COUNTP
+
+SEARCH_URL = reverse('posts:search')
+
+
+class FullTextSearchTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+        self.user = User.objects.create_user(
+            username='writer', first_name='Лев', last_name='Толстой')
+        self.group = Group.objects.create(
+            title='Домашние животные',
+            slug='pets',
+            description='Описание',
+        )
+        self.cat_post = Post.objects.create(
+            author=self.user, text='Наш кот спит на подоконнике')
+        self.group_post = Post.objects.create(
+            author=self.user, text='Прогулка в парке', group=self.group)
+
+    def search(self, query):
+        return list(fulltext.search_posts(query)[:COUNTP])
+
+    def test_russian_word_forms(self):
+        """Поиск находит другие формы слова."""
+        self.assertEqual(self.search('котами'), [self.cat_post])
+        self.assertEqual(self.search('кота на подоконниках'), [self.cat_post])
+        self.assertEqual(self.search('подокон'), [self.cat_post])
+        self.assertEqual(self.search('собака'), [])
+        self.assertEqual(self.search('!!!'), [])
+
+    def test_group_and_author(self):
+        """Индекс включает название группы и имя автора."""
+        self.assertEqual(self.search('животных'), [self.group_post])
+        self.assertCountEqual(
+            self.search('Толстого'), [self.cat_post, self.group_post])
+
+    def test_text_ranks_above_author(self):
+        """Совпадение в тексте выше совпадения в имени автора."""
+        namesake = User.objects.create_user(username='kot', first_name='Кот')
+        Post.objects.create(author=namesake, text='Про погоду')
+        self.assertEqual(self.search('кот')[0], self.cat_post)
+
+    def test_index_follows_changes(self):
+        """Правки постов, групп и авторов сразу видны в поиске."""
+        self.cat_post.text = 'Наша собака спит'
+        self.cat_post.save()
+        self.assertEqual(self.search('собаки'), [self.cat_post])
+        self.assertEqual(self.search('кот'), [])
+
+        self.group.title = 'Прогулки'
+        self.group.save()
+        self.assertEqual(self.search('животные'), [])
+        self.assertIn(self.group_post, self.search('прогулки'))
+
+        self.user.first_name = 'Фёдор'
+        self.user.save()
+        self.assertEqual(len(self.search('Федор')), 2)
+
+        self.group.delete()
+        self.assertEqual(self.search('прогулками'), [self.group_post])
+        self.cat_post.delete()
+        self.assertEqual(self.search('собаки'), [])
+
+    def test_search_page(self):
+        """Страница поиска разбита на страницы и помнит запрос."""
+        Post.objects.bulk_create(
+            Post(author=self.user, text=f'Кошка номер {i}')
+            for i in range(COUNTP + 3)
+        )
+        fulltext.rebuild()
+        response = self.guest_client.get(SEARCH_URL, {'q': 'кошки'})
+        page_obj = response.context['page_obj']
+        self.assertEqual(len(page_obj), COUNTP)
+        self.assertEqual(page_obj.paginator.count, COUNTP + 3)
+        self.assertContains(
+            response, '?q=%D0%BA%D0%BE%D1%88%D0%BA%D0%B8&amp;page=2')
+        response = self.guest_client.get(
+            SEARCH_URL, {'q': 'кошки', 'page': 2})
+        self.assertEqual(len(response.context['page_obj']), 3)
+
+    def test_empty_query(self):
+        """Без запроса страница поиска показывает только форму."""
+        response = self.guest_client.get(SEARCH_URL)
+        self.assertEqual(response.status_code, 200)
+        self.assertIsNone(response.context['page_obj'])
+
+    def test_admin_uses_index(self):
+        """Поиск в админке идёт по индексу, а не по LIKE."""
+        request = RequestFactory().get('/admin/')
+        Comment.objects.create(
+            post=self.cat_post, author=self.user, text='Рыжие коты лучше')
+        for model, query, expected in (
+                (Post, 'котов', [self.cat_post]),
+                (Comment, 'рыжий', list(Comment.objects.all()))):
+            with self.subTest(model=model.__name__):
+                model_admin = site._registry[model]
+                queryset, distinct = model_admin.get_search_results(
+                    request, model.objects.all(), query)
+                self.assertNotIn('LIKE', str(queryset.query))
+                self.assertEqual(list(queryset), expected)
@@ -0,0 +1,159 @@
+import shutil
+import tempfile
+import threading
+from io import BytesIO
+from unittest import mock
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.template.loader import render_to_string
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from PIL import Image
+
+from posts import thumbnails
+from posts.models import Post, User
+
+TEMP_DIR = tempfile.mkdtemp(dir=settings.BASE_DIR)
+SMALL_GIF = (b'\x47\x49\x46\x38\x39\x61\x02\x00'
+             b'\x01\x00\x80\x00\x00\x00\x00\x00'
+             b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+             b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+             b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+             b'\x0A\x00\x3B')
+GEOMETRY, OPTIONS = thumbnails.POST_THUMBNAILS[0]
+
+
+def ready(post):
+    return thumbnails.backend.get_ready_thumbnail(
+        post.image.name, GEOMETRY, **OPTIONS)
+
+
+def large_image(name, size=(2400, 1600)):
+    content = BytesIO()
+    Image.new('RGB', size, 'teal').save(content, 'PNG')
+    return SimpleUploadedFile(
+        name=name, content=content.getvalue(), content_type='image/png')
+
+
+@override_settings(MEDIA_ROOT=TEMP_DIR, THUMBNAIL_WORKERS=0)
+class ThumbnailTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='thumbs')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_DIR, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def create_post(self, name):
+        return Post.objects.create(
+            author=self.user,
+            text='Пост с картинкой',
+            image=SimpleUploadedFile(
+                name=name, content=SMALL_GIF, content_type='image/gif'),
+        )
+
+    def test_upload_builds_thumbnail(self):
+        """Миниатюра строится при сохранении формы, а не при показе."""
+        self.authorized_client.post(reverse('posts:post_create'), data={
+            'text': 'Новый пост',
+            'image': SimpleUploadedFile(
+                name='upload.gif', content=SMALL_GIF,
+                content_type='image/gif'),
+        })
+        post = Post.objects.get(text='Новый пост')
+        thumbnail = ready(post)
+        self.assertIsNotNone(thumbnail)
+        self.assertTrue(thumbnail.exists())
+
+    def test_post_without_image(self):
+        """У поста без картинки нет ни миниатюры, ни заглушки."""
+        post = Post.objects.create(author=self.user, text='Без картинки')
+        self.assertIsNone(thumbnails.post_picture(post))
+        response = self.authorized_client.get(
+            reverse('posts:post_detail', args=[post.pk]))
+        self.assertNotContains(response, 'placeholder.svg')
+
+    @override_settings(THUMBNAIL_WORKERS=1)
+    def test_placeholder_until_ready(self):
+        """Пока миниатюры строятся, шаблон показывает заглушку."""
+        post = self.create_post('pending.gif')
+        release = threading.Event()
+        with mock.patch.object(
+                thumbnails, '_generate',
+                side_effect=lambda *args: release.wait(5)) as generate:
+            html = render_to_string(
+                'posts/includes/post_image.html', {'post': post})
+            self.assertIn('placeholder.svg', html)
+            thumbnails.queue_post_thumbnails(post)
+            release.set()
+            for future in list(thumbnails._pending.values()):
+                future.result(5)
+        self.assertEqual(generate.call_count, 1)
+
+    @override_settings(THUMBNAIL_WORKERS=1, THUMBNAIL_QUEUE_LIMIT=1)
+    def test_queue_limit(self):
+        """При полной очереди картинка не ставится в неё и ждёт
+        следующего показа."""
+        first = self.create_post('first.gif')
+        second = Post.objects.create(
+            author=self.user, text='Другая картинка',
+            image=large_image('second.png', size=(20, 10)))
+        release = threading.Event()
+        with mock.patch.object(
+                thumbnails, '_generate',
+                side_effect=lambda *args: release.wait(5)) as generate:
+            thumbnails.queue_post_thumbnails(first)
+            thumbnails.queue_post_thumbnails(second)
+            self.assertEqual(len(thumbnails._pending), 1)
+            release.set()
+            for future in list(thumbnails._pending.values()):
+                future.result(5)
+        self.assertEqual(generate.call_count, 1)
+        self.assertIsNone(cache.get(thumbnails.LOCK_KEY.format(
+            thumbnails._image_key(second.image.name))))
+
+    @override_settings(THUMBNAIL_WORKERS=1)
+    def test_lock_skips_other_processes(self):
+        """Миниатюру, которую строит другой процесс, не ставят в очередь."""
+        post = self.create_post('locked.gif')
+        cache.add(thumbnails.LOCK_KEY.format(
+            thumbnails._image_key(post.image.name)), 1)
+        with mock.patch.object(thumbnails, '_generate') as generate:
+            self.assertIsNone(thumbnails.post_picture(post))
+        generate.assert_not_called()
+
+    def test_responsive_picture(self):
+        """Шаблон отдаёт srcset из WebP и JPEG с ленивой загрузкой."""
+        post = Post.objects.create(
+            author=self.user, text='Большая картинка',
+            image=large_image('large.png'))
+        response = self.authorized_client.get(
+            reverse('posts:post_detail', args=[post.pk]))
+        picture = thumbnails.post_picture(post)
+        self.assertEqual(picture['width'], 960)
+        self.assertEqual(picture['srcset'].count('.jpg'), 4)
+        self.assertIn('1920w', picture['sources'][0]['srcset'])
+        self.assertContains(response, 'type="image/webp"')
+        self.assertContains(response, 'loading="lazy"')
+        self.assertContains(response, picture['src'])
+
+    def test_small_original_not_upscaled(self):
+        """Маленький оригинал не растягивается и не дублируется в srcset."""
+        post = Post.objects.create(
+            author=self.user, text='Маленькая картинка',
+            image=large_image('small.png', size=(400, 200)))
+        picture = thumbnails.post_picture(post)
+        self.assertEqual(picture['width'], 400)
+        self.assertEqual(
+            [entry.split()[1] for entry in picture['srcset'].split(', ')],
+            ['320w', '400w'])
@@ -0,0 +1,259 @@
+import hashlib
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+from sorl.thumbnail import default
+from sorl.thumbnail.base import ThumbnailBackend
+from sorl.thumbnail.conf import defaults as default_settings
+from sorl.thumbnail.conf import settings as thumbnail_settings
+from sorl.thumbnail.images import ImageFile
+from sorl.thumbnail.parsers import parse_geometry
+
+from core import timing
+
+from .signals import expire_post_pages
+
+logger = logging.getLogger(__name__)
+
+# Производные изображения поста: ширины для srcset в двух форматах,
+# пропорции прежней обложки 960x339. Маленькие оригиналы не растягиваются.
+WIDTHS = (320, 640, 960, 1920)
+FORMATS = ('WEBP', 'JPEG')
+FALLBACK_FORMAT = 'JPEG'
+FALLBACK_WIDTH = 960
+ASPECT = 339 / 960
+SIZES = '(min-width: 1200px) 855px, (min-width: 768px) 75vw, 100vw'
+POST_THUMBNAILS = tuple(
+    (f'{width}x{round(width * ASPECT)}',
+     {'crop': 'center', 'upscale': False, 'format': format_})
+    for format_ in FORMATS
+    for width in WIDTHS
+)
+LEGACY_THUMBNAIL = ('960x339', {'crop': 'center', 'upscale': True})
+LOCK_KEY = 'thumbnail-lock:{}'
+LOCK_TIMEOUT = 60
+PICTURE_KEY = 'post-picture:{}'
+
+
+class ReadyThumbnailBackend(ThumbnailBackend):
+    """Бэкенд sorl, умеющий проверить готовность миниатюры без её
+    построения и построить несколько миниатюр за одно чтение оригинала."""
+
+    def thumbnail_options(self, source, options):
+        options = dict(options)
+        if thumbnail_settings.THUMBNAIL_PRESERVE_FORMAT:
+            options.setdefault('format', self._get_format(source))
+        for key, value in self.default_options.items():
+            options.setdefault(key, value)
+        for key, attr in self.extra_options:
+            value = getattr(thumbnail_settings, attr)
+            if value != getattr(default_settings, attr):
+                options.setdefault(key, value)
+        return options
+
+    def thumbnail_file(self, file_, geometry_string, options):
+        source = ImageFile(file_)
+        options = self.thumbnail_options(source, options)
+        name = self._get_thumbnail_filename(source, geometry_string, options)
+        return ImageFile(name, default.storage)
+
+    def get_ready_thumbnail(self, file_, geometry_string, **options):
+        thumbnail = self.thumbnail_file(file_, geometry_string, options)
+        return default.kvstore.get(thumbnail)
+
+    def get_thumbnails(self, file_, specs):
+        """Строит недостающие миниатюры, декодируя оригинал один раз."""
+        source = ImageFile(file_)
+        missing = []
+        for geometry_string, options in specs:
+            thumbnail = self.thumbnail_file(file_, geometry_string, options)
+            if default.kvstore.get(thumbnail) is None:
+                missing.append((geometry_string, options, thumbnail))
+        if not missing:
+            return
+        source_image = default.engine.get_image(source)
+        try:
+            source.set_size(default.engine.get_image_size(source_image))
+            image_info = default.engine.get_image_info(source_image)
+            for geometry_string, options, thumbnail in missing:
+                options = self.thumbnail_options(source, options)
+                options['image_info'] = image_info
+                if (thumbnail_settings.THUMBNAIL_FORCE_OVERWRITE
+                        or not thumbnail.exists()):
+                    self._create_thumbnail(
+                        source_image, geometry_string, options, thumbnail)
+                default.kvstore.get_or_set(source)
+                default.kvstore.set(thumbnail, source)
+        finally:
+            default.engine.cleanup(source_image)
+
+    def render(self, source, source_image, geometry_string, options):
+        """Байты миниатюры без записи в хранилище, для отчётов."""
+        options = self.thumbnail_options(source, options)
+        ratio = default.engine.get_image_ratio(source_image, options)
+        geometry = parse_geometry(geometry_string, ratio)
+        image = default.engine.create(source_image, geometry, options)
+        return default.engine._get_raw_data(
+            image, options['format'], options['quality'],
+            image_info=default.engine.get_image_info(source_image),
+            progressive=options.get(
+                'progressive', thumbnail_settings.THUMBNAIL_PROGRESSIVE),
+        )
+
+
+backend = ReadyThumbnailBackend()
+_pending = {}
+_pending_lock = threading.Lock()
+_executor = None
+_executor_pid = None
+
+
+def _get_executor():
+    global _executor, _executor_pid
+    if _executor_pid != os.getpid():
+        _executor = ThreadPoolExecutor(
+            max_workers=settings.THUMBNAIL_WORKERS,
+            thread_name_prefix='thumbnails',
+        )
+        _executor_pid = os.getpid()
+    return _executor
+
+
+def _image_key(name):
+    return hashlib.md5(name.encode()).hexdigest()
+
+
+def forget(name):
+    """Удаляет миниатюры изображения, их записи в sorl и <picture> в кэше."""
+    default.kvstore.delete(ImageFile(name))
+    cache.delete(PICTURE_KEY.format(_image_key(name)))
+
+
+def _generate(name):
+    try:
+        with timing.measure('thumb'):
+            backend.get_thumbnails(name, POST_THUMBNAILS)
+    except Exception:
+        logger.exception('Не удалось построить миниатюры %s', name)
+        return False
+    return True
+
+
+def _generate_in_worker(post, name, lock_key):
+    try:
+        if _generate(name):
+            # Страницы, закэшированные с заглушкой, пора перестроить.
+            expire_post_pages(post, post.group_id)
+    finally:
+        cache.delete(lock_key)
+        connection.close()
+
+
+def queue_post_thumbnails(post):
+    """Ставит построение производных изображения поста в очередь.
+
+    Повторные запросы того же изображения, пока оно обрабатывается в этом
+    или другом процессе, ничего не добавляют в очередь, как и запросы
+    при полной очереди.
+    """
+    if not post.image:
+        return
+    name = post.image.name
+    if not settings.THUMBNAIL_WORKERS:
+        _generate(name)
+        return
+    key = _image_key(name)
+    lock_key = LOCK_KEY.format(key)
+    with _pending_lock:
+        # Очередь процесса ограничена: при всплеске загрузок лишние
+        # картинки подождут следующего показа страницы с заглушкой.
+        if (key in _pending
+                or len(_pending) >= settings.THUMBNAIL_QUEUE_LIMIT
+                or not cache.add(lock_key, 1, LOCK_TIMEOUT)):
+            return
+        future = _get_executor().submit(
+            _generate_in_worker, post, name, lock_key)
+        _pending[key] = future
+    timing.thumbnail_queued()
+    future.add_done_callback(lambda _: _pending.pop(key, None))
+
+
+def _srcset(images):
+    return ', '.join(f'{url} {width}w' for width, url, _ in images)
+
+
+def _picture(name):
+    found = {}
+    for geometry_string, options in POST_THUMBNAILS:
+        thumbnail = backend.get_ready_thumbnail(
+            name, geometry_string, **options)
+        if thumbnail is None:
+            return None
+        # У маленького оригинала несколько ширин дают одну и ту же
+        # картинку, в srcset она попадает один раз.
+        found.setdefault(options['format'], {}).setdefault(
+            thumbnail.width,
+            (thumbnail.width, thumbnail.url, thumbnail.height),
+        )
+    fallback = found[FALLBACK_FORMAT]
+    width = max(
+        (width for width in fallback if width <= FALLBACK_WIDTH),
+        default=min(fallback),
+    )
+    _, src, height = fallback[width]
+    return {
+        'sources': [
+            {'type': f'image/{format_.lower()}',
+             'srcset': _srcset(sorted(found[format_].values()))}
+            for format_ in FORMATS if format_ != FALLBACK_FORMAT
+        ],
+        'srcset': _srcset(sorted(fallback.values())),
+        'sizes': SIZES,
+        'src': src,
+        'width': width,
+        'height': height,
+    }
+
+
+def post_picture(post):
+    """Данные для <picture> изображения поста или None.
+
+    Пока производные не готовы, они ставятся в очередь и возвращается
+    None — шаблон показывает заглушку.
+    """
+    if not post.image:
+        return None
+    name = post.image.name
+    key = PICTURE_KEY.format(_image_key(name))
+    picture = cache.get(key)
+    if picture is None:
+        picture = _picture(name)
+        if picture is None:
+            queue_post_thumbnails(post)
+            if settings.THUMBNAIL_WORKERS:
+                return None
+            picture = _picture(name)
+        if picture is not None:
+            cache.set(key, picture, None)
+    return picture
+
+
+def size_report(name):
+    """Размеры в байтах прежней обложки и новых производных."""
+    source = ImageFile(name)
+    source_image = default.engine.get_image(source)
+    try:
+        report = {'legacy': len(
+            backend.render(source, source_image, *LEGACY_THUMBNAIL))}
+        for geometry_string, options in POST_THUMBNAILS:
+            width = int(geometry_string.split('x')[0])
+            report[options['format'], width] = len(backend.render(
+                source, source_image, geometry_string, options))
+        return report
+    finally:
+        default.engine.cleanup(source_image)
@@ -1,45 +1,93 @@
 from xml.etree.ElementTree import Comment
-from django.core.paginator import Paginator
 from django.contrib.auth.decorators import login_required
+from django.core.exceptions import PermissionDenied
+from django.http import StreamingHttpResponse
 from django.shortcuts import render, get_object_or_404, redirect
+from django.core.paginator import Paginator
+from django.utils.http import urlencode
+from core.db import retry_write
+from . import archive, caching, counters, export, fulltext, thumbnails
+from .feed import FeedPaginator
 from .forms import PostForm, CommentForm
-from .models import Comment, Follow, Group, Post, User
+from .models import ArchivedPost, Comment, Follow, Group, Post, User
+from .paginators import CommentPaginator, page_for_request, paginate
 
 
 COUNTP = 10
+COUNT_COMMENTS = 20
+
+
+def index_scopes():
+    return caching.POSTS, caching.GROUPS
+
+
+def group_scopes(slug):
+    group_id = Group.objects.filter(
+        slug=slug).values_list('pk', flat=True).first()
+    if group_id is not None:
+        return (caching.group_scope(group_id),)
+
 
+def profile_scopes(username):
+    author_id = User.objects.filter(
+        username=username).values_list('pk', flat=True).first()
+    if author_id is not None:
+        return caching.author_scope(author_id), caching.GROUPS
 
+
+def post_scopes(post_id):
+    for model in (Post, ArchivedPost):
+        author_id = model.objects.filter(
+            pk=post_id).values_list('author_id', flat=True).first()
+        if author_id is not None:
+            break
+    if author_id is not None:
+        return (caching.post_scope(post_id), caching.author_scope(author_id),
+                caching.GROUPS)
+
+
+@caching.cache_anonymous_page(index_scopes)
 def index(request):
-    post_list = Post.objects.all().order_by('-pub_date')
-    paginator = Paginator(post_list, COUNTP)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    cache_version = caching.get_version(*index_scopes())
+    post_list = Post.objects.for_feed().order_by('-pub_date')
+    page_obj = paginate(request, post_list, COUNTP,
+                        count_key=(counters.ALL, 0),
+                        archived=ArchivedPost.objects.for_feed())
     context = {
         'page_obj': page_obj,
+        'cache_version': cache_version,
     }
     return render(request, 'posts/index.html', context)
 
 
+@caching.cache_anonymous_page(group_scopes)
 def group_posts(request, slug):
     group = get_object_or_404(Group, slug=slug)
-    post_list = Post.objects.filter(group=group).order_by('-pub_date')
-    paginator = Paginator(post_list, COUNTP)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    cache_version = caching.get_version(caching.group_scope(group.pk))
+    post_list = Post.objects.for_feed().filter(group=group)
+    page_obj = paginate(
+        request, post_list, COUNTP,
+        count_key=(counters.GROUP, group.pk),
+        archived=ArchivedPost.objects.for_feed().filter(group=group))
     context = {
         'group': group,
         'page_obj': page_obj,
+        'cache_version': cache_version,
     }
     return render(request, 'posts/group_list.html', context)
 
 
+@caching.cache_anonymous_page(profile_scopes)
 def profile(request, username):
     author = get_object_or_404(User, username=username)
-    posts = Post.objects.filter(author=author).order_by('-pub_date')
-    count = posts.count()
-    paginator = Paginator(posts, COUNTP)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    cache_version = caching.get_version(
+        caching.author_scope(author.pk), caching.GROUPS)
+    posts = Post.objects.for_feed().filter(author=author)
+    count = counters.get_count(counters.AUTHOR, author.pk)
+    page_obj = paginate(
+        request, posts, COUNTP,
+        count_key=(counters.AUTHOR, author.pk),
+        archived=ArchivedPost.objects.for_feed().filter(author=author))
     follow = (request.user.is_authenticated and author != request.user
               and Follow.objects.filter(
                   author=author,
@@ -49,14 +97,38 @@ def profile(request, username):
         'count': count,
         'following': follow,
         'page_obj': page_obj,
-        'paginator':paginator,
+        'paginator': page_obj.paginator,
+        'cache_version': cache_version,
     }
     return render(request, 'posts/profile.html', context)
 
 
+@login_required
+def profile_export(request, username):
+    if request.user.username != username:
+        raise PermissionDenied
+    format_ = request.GET.get('format')
+    if format_ not in export.FORMATS:
+        format_ = export.FORMATS[0]
+    images = request.GET.get('images') == '1'
+    posts = export.sources(author=request.user)
+    if images:
+        stream = export.zip_stream(posts, format_)
+        content_type = export.CONTENT_TYPES['zip']
+    else:
+        stream = export.lines(posts, format_)
+        content_type = export.CONTENT_TYPES[format_]
+    response = StreamingHttpResponse(stream, content_type=content_type)
+    name = export.filename(f'posts-{request.user.pk}', format_, images)
+    response['Content-Disposition'] = f'attachment; filename="{name}"'
+    return response
+
+
+@caching.cache_anonymous_page(post_scopes)
 def post_detail(request, post_id):
-    post = get_object_or_404(Post, pk=post_id)
-    comments = post.comments.all()
+    post = archive.get_post(post_id)
+    comments = CommentPaginator(
+        post.comments.for_thread(), COUNT_COMMENTS).get_keyset_page()
     form = CommentForm()
     author = post.author
     template = 'posts/post_detail.html'
@@ -65,10 +137,39 @@ def post_detail(request, post_id):
         'form': form,
         'comments': comments,
         'author': author,
+        'count': counters.get_count(counters.AUTHOR, author.pk),
     }
     return render(request, template, context)
 
 
+@caching.cache_anonymous_page(index_scopes)
+def search(request):
+    query = request.GET.get('q', '').strip()
+    page_obj = None
+    if query:
+        paginator = Paginator(fulltext.search_posts(query), COUNTP)
+        page_obj = paginator.get_page(request.GET.get('page'))
+    context = {
+        'query': query,
+        'page_obj': page_obj,
+        'page_params': urlencode({'q': query}) + '&',
+    }
+    return render(request, 'posts/search.html', context)
+
+
+@caching.cache_anonymous_page(post_scopes)
+def post_comments(request, post_id):
+    post = archive.get_post(post_id)
+    comments = CommentPaginator(
+        post.comments.for_thread(), COUNT_COMMENTS
+    ).get_keyset_page(after=request.GET.get('after'))
+    context = {
+        'post': post,
+        'comments': comments,
+    }
+    return render(request, 'includes/comment_list.html', context)
+
+
 @login_required
 def post_create(request):
     template = 'posts/post_create.html'
@@ -79,7 +180,9 @@ def post_create(request):
     if form.is_valid():
         post = form.save(commit=False)
         post.author = request.user
-        post.save()
+        retry_write(post.save)
+        if 'image' in form.changed_data:
+            thumbnails.queue_post_thumbnails(post)
         return redirect('posts:profile', username=post.author)
     context = {
         'form': form,
@@ -103,6 +206,8 @@ def post_edit(request, post_id):
         post = form.save(commit=False)
         post.author = request.user
         post.save()
+        if 'image' in form.changed_data:
+            thumbnails.queue_post_thumbnails(post)
         return redirect('posts:post_detail', post_id)
     context = {
         'form': form,
@@ -114,22 +219,21 @@ def post_edit(request, post_id):
 
 @login_required
 def add_comment(request, post_id):
-    post = Post.objects.get(id=post_id)
+    post = get_object_or_404(Post, pk=post_id)
     form = CommentForm(request.POST or None)
     if form.is_valid():
         comment = form.save(commit=False)
         comment.author = request.user
         comment.post = post
-        comment.save()
+        retry_write(comment.save)
     return redirect('posts:post_detail', post_id=post_id)
 
 
 @login_required
 def follow_index(request):
-    post_list = Post.objects.filter(author__following__user=request.user)
-    paginator = Paginator(post_list, COUNTP)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    page_obj = page_for_request(
+        request, FeedPaginator(request.user, COUNTP)
+    )
     context = {
         'page_obj': page_obj,
     }
@@ -139,13 +243,9 @@ def follow_index(request):
 @login_required
 def profile_follow(request, username):
     author = get_object_or_404(User, username=username)
-    if (author != request.user
-        and not Follow.objects.filter(user=request.user,
-                                      author=author).exists()):
-        Follow.objects.create(
-            user=request.user,
-            author=author,
-        )
+    if author != request.user:
+        retry_write(Follow.objects.get_or_create,
+                    user=request.user, author=author)
     return redirect('posts:profile', username=username)
 
 
@@ -43,6 +43,7 @@ INSTALLED_APPS = [
     'core.apps.CoreConfig',
     'users.apps.UsersConfig',
     'posts.apps.PostsConfig',
+    'api.apps.ApiConfig',
     'django.contrib.admin',
     'django.contrib.auth',
     'django.contrib.contenttypes',
@@ -50,10 +51,11 @@ INSTALLED_APPS = [
     'django.contrib.messages',
     'django.contrib.staticfiles',
     'sorl.thumbnail',
-    'debug_toolbar',
 ]
 
 MIDDLEWARE = [
+    'core.middleware.ServerTimingMiddleware',
+    'core.middleware.ReplicaMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -61,9 +63,12 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
-    'debug_toolbar.middleware.DebugToolbarMiddleware',
 ]
 
+if DEBUG:
+    INSTALLED_APPS += ['debug_toolbar']
+    MIDDLEWARE += ['debug_toolbar.middleware.DebugToolbarMiddleware']
+
 ROOT_URLCONF = 'yatube.urls'
 
 TEMPLATES = [
@@ -84,16 +89,48 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'yatube.wsgi.application'
 
+# Значения настроек для тестов включает core.runner.
+TEST_RUNNER = 'core.runner.TestSettingsRunner'
+
 
 # Database
 # https://docs.djangoproject.com/en/2.2/ref/settings/#databases
 
+# SQLite в режиме WAL (core/db_backends/sqlite3), соединения живут
+# между запросами. Записи в представлениях повторяются при блокировке
+# базы (core.db.retry_write): пауза от DB_RETRY_DELAY секунд растёт
+# вдвое до DB_RETRY_MAX_DELAY, всего DB_WRITE_ATTEMPTS попыток.
+SQLITE = {
+    'ENGINE': 'core.db_backends.sqlite3',
+    'CONN_MAX_AGE': 600,
+    'OPTIONS': {
+        'pragmas': {'busy_timeout': 5000},
+    },
+}
+# replica — копия db.sqlite3, которую обновляет
+# `python manage.py sync_replica --every 5`. Пока копия не сделана,
+# все чтения идут в default (core.replicas).
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
+        **SQLITE,
         'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
-    }
+    },
+    'replica': {
+        **SQLITE,
+        'NAME': os.path.join(BASE_DIR, 'db-replica.sqlite3'),
+        'TEST': {'MIRROR': 'default'},
+    },
 }
+DATABASE_ROUTERS = ['core.replicas.ReplicaRouter']
+DB_WRITE_ATTEMPTS = 5
+DB_RETRY_DELAY = 0.05
+DB_RETRY_MAX_DELAY = 1
+# В тестах реплика — зеркало тестовой базы (TEST['MIRROR']), и
+# core.replicas её не выбирает.
+DATABASE_REPLICAS = ['replica']
+# Сколько секунд после записи пользователь может читать основную базу,
+# пока реплики не догонят; дольше синхронизация не отстаёт.
+REPLICA_PIN_SECONDS = 300
 
 
 # Password validation
@@ -137,7 +174,8 @@ STATIC_URL = '/static/'
 TEMPLATES_DIR = os.path.join(BASE_DIR, 'templates')
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        # Шаблоны Django с замером отрисовки для Server-Timing.
+        'BACKEND': 'core.template_backends.TimedDjangoTemplates',
         'DIRS': [TEMPLATES_DIR],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -152,6 +190,12 @@ TEMPLATES = [
     }
 ]
 STATICFILES_DIRS = [os.path.join(BASE_DIR, 'static')]
+# collectstatic собирает в STATIC_ROOT файлы с хэшем в имени и их .gz/.br
+# копии, неиспользуемые файлы проекта отбрасываются (core.staticfiles).
+# STATIC_KEEP — файлы, на которые шаблоны ссылаются не через {% static %}.
+STATIC_ROOT = os.path.join(BASE_DIR, 'static_root')
+STATICFILES_STORAGE = 'core.staticfiles.CompressedManifestStaticFilesStorage'
+STATIC_KEEP = []
 
 LOGIN_URL = 'users:login'
 LOGIN_REDIRECT_URL = 'posts:index'
@@ -165,13 +209,67 @@ MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
 THUMBNAIL_DEBUG = True
-
+# Миниатюры строятся в фоновых потоках; 0 — строить прямо в запросе
+# (так в тестах, core.runner). Каждый процесс держит в очереди не
+# больше THUMBNAIL_QUEUE_LIMIT картинок.
+THUMBNAIL_WORKERS = 2
+THUMBNAIL_QUEUE_LIMIT = 100
+# Загружаемые оригиналы: длинная сторона не больше IMAGE_MAX_SIZE,
+# качество пережатия JPEG и WebP (posts.images).
+IMAGE_MAX_SIZE = 2560
+IMAGE_QUALITY = 82
+# Картинки постов хранятся по хэшу содержимого (posts.storage); файл,
+# записанный позже стольких секунд назад, не удаляется как ненужный.
+MEDIA_RELEASE_GRACE = 60
+
+# Общий для всех процессов кэш в SQLite: воркеры видят одни и те же
+# фрагменты и поколения, внешние сервисы не нужны. Тесты получают свой
+# пустой файл кэша (core.runner).
 CACHES = {
     'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'BACKEND': 'core.cache_backends.SQLiteCache',
+        'LOCATION': os.path.join(BASE_DIR, 'cache.sqlite3'),
+        'OPTIONS': {
+            'MAX_ENTRIES': 10000,
+        },
     }
 }
 
+# Посты автора, у которого подписчиков больше FEED_PULL_LIMIT, не
+# раскладываются по лентам, а читаются при показе ленты. Обратно к
+# раскладке автор возвращается, когда подписчиков не больше
+# FEED_PUSH_LIMIT, и только через rebuild_feeds --returning.
+FEED_PULL_LIMIT = 1000
+FEED_PUSH_LIMIT = 800
+FEED_BACKFILL_LIMIT = 1000
+
+# Посты старше стольких дней archive_posts переносит в архив.
+ARCHIVE_AFTER_DAYS = 365
+
+# Замеры запросов (core.middleware.ServerTimingMiddleware) пишутся
+# строкой JSON в логгер core.timing; при прогоне тестов — только
+# предупреждения и ошибки (core.runner).
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {
+        'timing': {'format': '%(asctime)s %(message)s'},
+    },
+    'handlers': {
+        'timing': {
+            'class': 'logging.StreamHandler',
+            'formatter': 'timing',
+        },
+    },
+    'loggers': {
+        'core.timing': {
+            'handlers': ['timing'],
+            'level': 'INFO',
+            'propagate': False,
+        },
+    },
+}
+
 INTERNAL_IPS = [
     '127.0.0.1',
 ]